@@ -0,0 +1,11 @@
+"""Benchmark suite for tgui.
+
+Run all benchmarks, or a selection of them, from the repository root:
+
+    python -m benchmarks [import startup layout render listview input codec
+                          discovery download]
+                         [-o results.json]
+
+Results are printed (or written) as a single JSON document so they can be
+compared between releases.
+"""
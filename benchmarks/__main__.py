@@ -0,0 +1,49 @@
+"""Run the benchmark suite and print the results as JSON.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+
+
+BENCHMARKS = ('import', 'startup', 'layout', 'render', 'listview',
+              'input', 'codec', 'discovery', 'download')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('names', nargs='*', default=BENCHMARKS,
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('-o', '--output', help='write results to a file')
+    args = parser.parse_args(argv)
+
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+               'benchmarks': {}}
+
+    for name in args.names:
+        try:
+            module = importlib.import_module(f'.bench_{name}', __package__)
+            results['benchmarks'][name] = module.run()
+        except ImportError as error:
+            # e.g. discovery needs netifaces
+            results['benchmarks'][name] = {'skipped': str(error)}
+        except Exception as error:
+            results['benchmarks'][name] = {'error': repr(error)}
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Helpers shared by the benchmarks.
+"""
+
+import statistics
+import time
+
+from tgui.backends import VirtualBackend, set_backend
+
+
+def measure(func, repeat=5):
+    """Time a function over several runs.
+
+    Args:
+        func (callable): the function to time, called without arguments.
+        repeat (int): (optional) number of runs.
+
+    Return:
+        return a dict with the min, median and max run time in seconds.
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times += [time.perf_counter() - start]
+
+    return {'min': min(times), 'median': statistics.median(times),
+            'max': max(times), 'runs': repeat}
+
+
+def virtual_screen(lines=24, cols=80):
+    """Install a fresh headless backend.
+
+    Return:
+        return the VirtualBackend object.
+    """
+
+    backend = VirtualBackend(lines, cols)
+    set_backend(backend)
+
+    return backend
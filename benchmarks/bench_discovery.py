@@ -0,0 +1,101 @@
+"""Hosts per second for Protocol.get_active_hosts against loopback servers,
+and for a multicast discovery answered by loopback responders.
+"""
+
+import asyncio
+import time
+
+from tgui.controllers import codec, datagram
+from tgui.controllers.protocol import FRAME_HEADER, Protocol
+
+
+async def _serve(addr, port, handlers):
+    async def handle(reader, writer):
+        handlers.add(asyncio.current_task())
+        try:
+            while True:
+                length, = FRAME_HEADER.unpack(
+                    await reader.readexactly(FRAME_HEADER.size))
+                request = codec.decode(await reader.readexactly(length))
+
+                answer = codec.negotiate(request.get('accept-codec'))
+                response = {'status': (200, 'OK'), 'hostname': f'bench-{addr}',
+                            'host': addr, 'port': port, 'codec': answer}
+                data = codec.encode(response, answer)
+                writer.write(FRAME_HEADER.pack(len(data)) + data)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    return await asyncio.start_server(handle, addr, port)
+
+
+async def _sweep(count):
+    # every 127.0.0.0/8 address is routed to the loopback interface
+    addrs = [f'127.0.{i // 250}.{i % 250 + 1}' for i in range(count)]
+
+    first = await asyncio.start_server(lambda r, w: None, addrs[0], 0)
+    port = first.sockets[0].getsockname()[1]
+    first.close()
+    await first.wait_closed()
+
+    handlers = set()
+    servers = [await _serve(addr, port, handlers) for addr in addrs]
+
+    protocol = Protocol()
+    protocol.port = port
+
+    start = time.perf_counter()
+    await protocol.get_active_hosts(addrs)
+    elapsed = time.perf_counter() - start
+
+    found = 0
+    for host in protocol.hosts:
+        _, writer = host.io
+        if writer is not None:
+            found += 1
+            writer.close()
+    protocol.close()
+
+    await asyncio.gather(*handlers, return_exceptions=True)
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+    return {'hosts': count, 'found': found, 'seconds': elapsed,
+            'hosts_per_second': count / elapsed}
+
+
+async def _multicast(count):
+    probe = datagram.probe_socket(datagram.BROADCAST)
+    port = probe.getsockname()[1]
+    probe.close()
+
+    responders = [await datagram.respond(f'bench-{i}', 2000 + i, port,
+                                         interface='127.0.0.1')
+                  for i in range(count)]
+
+    protocol = Protocol()
+    protocol.discovery = datagram.MULTICAST
+    protocol.discovery_port = port
+    protocol.multicast_interface = '127.0.0.1'
+
+    # until the last answer, the discovery itself waits out its timeout
+    found = 0
+    start = time.perf_counter()
+    async for _ in protocol.discover(timeout=5.0):
+        found += 1
+        if found == count:
+            break
+    elapsed = time.perf_counter() - start
+
+    for transport in responders:
+        transport.close()
+
+    return {'hosts': count, 'found': found, 'seconds': elapsed,
+            'hosts_per_second': count / elapsed}
+
+
+def run(count=256):
+    return {'get_active_hosts': asyncio.run(_sweep(count)),
+            'multicast': asyncio.run(_multicast(count))}
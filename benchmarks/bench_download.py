@@ -0,0 +1,98 @@
+"""Throughput of Protocol.download_segmented from one and several loopback
+hosts, each throttled to the bandwidth of a LAN peer.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+from tgui.controllers import codec
+from tgui.controllers.protocol import FRAME_HEADER, Protocol
+
+
+# bytes per second sent by each host
+RATE = 8 * 1024 * 1024
+
+CHUNK = 64 * 1024
+
+
+async def _serve(content, handlers):
+    # shared by the connections of the host, so that RATE is per host
+    link = asyncio.Lock()
+
+    async def handle(reader, writer):
+        handlers.add(asyncio.current_task())
+        try:
+            while True:
+                length, = FRAME_HEADER.unpack(
+                    await reader.readexactly(FRAME_HEADER.size))
+                request = codec.decode(await reader.readexactly(length))
+
+                start, _, last = request['range'][6:].partition('-')
+                start = int(start)
+                end = min(int(last) + 1 if last else len(content),
+                          len(content))
+                body = content[start:end]
+
+                answer = codec.negotiate(request.get('accept-codec'))
+                response = {'status': (206, 'Partial Content'),
+                            'content-length': end - start,
+                            'content-range':
+                                f'bytes {start}-{end - 1}/{len(content)}',
+                            'digest': 'sha256=' +
+                                      hashlib.sha256(body).hexdigest()}
+                data = codec.encode(response, answer)
+                writer.write(FRAME_HEADER.pack(len(data)) + data)
+
+                for pos in range(0, len(body), CHUNK):
+                    async with link:
+                        writer.write(body[pos:pos + CHUNK])
+                        await writer.drain()
+                        await asyncio.sleep(CHUNK / RATE)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            writer.close()
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def _transfer(count, size):
+    content = os.urandom(size)
+    handlers = set()
+    servers = [await _serve(content, handlers) for _ in range(count)]
+    hosts = [f'127.0.0.1:{server.sockets[0].getsockname()[1]}'
+             for server in servers]
+
+    protocol = Protocol()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'content')
+
+        start = time.perf_counter()
+        status = await protocol.download_segmented(
+            '/content', path,
+            [_Host(*host.split(':')) for host in hosts])
+        elapsed = time.perf_counter() - start
+
+        with open(path, 'rb') as file:
+            valid = file.read() == content
+
+    protocol.close()
+    await asyncio.gather(*handlers, return_exceptions=True)
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+    return {'hosts': count, 'bytes': size, 'status': list(status),
+            'valid': valid, 'seconds': elapsed,
+            'megabytes_per_second': size / elapsed / 1e6}
+
+
+class _Host:
+    def __init__(self, addr, port):
+        self.addr, self.port, self.name = addr, int(port), None
+
+
+def run(size=16 * 1024 * 1024):
+    return {f'hosts_{count}': asyncio.run(_transfer(count, size))
+            for count in (1, 4)}
@@ -0,0 +1,75 @@
+"""Time taken by `import tgui`, measured with python -X importtime.
+
+Importing tgui must only load the core; the subsystems listed in LAZY are
+loaded on first use. The results tell whether the import fits BUDGET.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+
+# microseconds, cumulative time of the tgui package
+BUDGET = 30000
+
+# modules that must not be loaded by `import tgui` alone
+LAZY = ('asyncio', 'json', 'ipaddress', 'netifaces', 'tgui.controllers',
+        'tgui.layouts', 'tgui.views', 'tgui.widgets')
+
+_CODE = '''import sys
+import tgui
+print(','.join(name for name in sys.argv[1:] if name in sys.modules))
+'''
+
+
+def _import_time(env):
+    """Import tgui in a new interpreter.
+
+    Return:
+        return a tuple containing the cumulative import time of tgui in
+        microseconds, and the LAZY modules that were loaded.
+    """
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CODE,
+                             *LAZY],
+                            env=env, capture_output=True, text=True,
+                            check=True)
+
+    total = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'tgui':
+            total = int(fields[1])
+
+    loaded = result.stdout.strip()
+
+    return total, loaded.split(',') if loaded else []
+
+
+def run(repeat=10):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [root, env.get('PYTHONPATH')]))
+
+    times, loaded = [], set()
+    for _ in range(repeat):
+        total, modules = _import_time(env)
+        times += [total]
+        loaded.update(modules)
+
+    return {'import_tgui_us': {'min': min(times),
+                               'median': statistics.median(times),
+                               'max': max(times), 'runs': repeat},
+            'budget_us': BUDGET,
+            'within_budget': min(times) <= BUDGET and not loaded,
+            'eagerly_loaded': sorted(loaded)}
+
+
+if __name__ == '__main__':
+    # usable as a check, e.g. in CI: python -m benchmarks.bench_import
+    results = run()
+    print(results)
+    sys.exit(0 if results['within_budget'] else 1)
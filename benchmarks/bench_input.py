@@ -0,0 +1,47 @@
+"""Time to handle a burst of arrow keys on a focused ListView, one key per
+frame against all the pending keys at once.
+"""
+
+import curses
+import time
+
+from tgui import TGUI
+from tgui.layouts import LinearLayout
+from tgui.widgets import ListView
+
+from ._utils import virtual_screen
+
+
+def _burst(keys, batched, count=10000):
+    backend = virtual_screen(24, 80)
+    app = TGUI()
+    app.__app__(backend.initscr())
+
+    layout = LinearLayout(size=(24, 80), anchor=(0, 0), orient='vertical')
+    view = ListView(layout, items=(f'item {i}' for i in range(count)))
+    layout.add_widget(view)
+    view.show()
+    layout.show()
+    app.set_focus(view)
+    app.render(force=True)
+
+    before = backend.bytes_written
+    start = time.perf_counter()
+    if batched:
+        backend.push_keys(*[curses.KEY_DOWN] * keys)
+        app._read_keys()
+        app.render(force=True)
+    else:
+        for _ in range(keys):
+            backend.push_keys(curses.KEY_DOWN)
+            app._read_keys()
+            app.render(force=True)
+    elapsed = time.perf_counter() - start
+
+    return {'keys': keys, 'selected': view.selected, 'seconds': elapsed,
+            'bytes': backend.bytes_written - before}
+
+
+def run(keys=500):
+    return {'one_key_per_frame': _burst(keys, False),
+            'batched': _burst(keys, True)}
@@ -0,0 +1,46 @@
+"""Cost of creating and laying out labels in a LinearLayout.
+"""
+
+from tgui import TGUI
+from tgui.layouts import LinearLayout
+from tgui.widgets import Label
+
+from ._utils import measure, virtual_screen
+
+
+def _build(count):
+    backend = virtual_screen(count + 1, 80)
+    TGUI().__app__(backend.initscr())
+
+    layout = LinearLayout(size=(count, 40), anchor=(0, 0),
+                          orient='vertical', padding=0)
+    labels = []
+    for i in range(count):
+        label = Label(layout, text=f'label {i:05}', padding=0)
+        layout.add_widget(label)
+        labels.append(label)
+
+    layout.update_layout()
+
+    return layout, labels
+
+
+def _relayout(layout, label):
+    # same measured size, so only the label is redrawn
+    label.set_text(label.text[::-1])
+    layout.update_layout()
+
+
+def run():
+    results = {}
+    for count in (1000, 10000):
+        stats = measure(lambda: _build(count), repeat=3)
+        stats['per_label'] = stats['min'] / count
+        results[f'labels_{count}'] = stats
+
+        layout, labels = _build(count)
+        label = labels[count // 2]
+        results[f'relayout_one_of_{count}'] = measure(
+            lambda: _relayout(layout, label), repeat=100)
+
+    return results
@@ -0,0 +1,41 @@
+"""Frame time of a ListView as the number of items grows.
+"""
+
+from tgui import TGUI
+from tgui.layouts import LinearLayout
+from tgui.widgets import ListView
+
+from ._utils import measure, virtual_screen
+
+
+def _frames(count, frames):
+    backend = virtual_screen(24, 80)
+    app = TGUI()
+    app.__app__(backend.initscr())
+
+    layout = LinearLayout(size=(24, 80), anchor=(0, 0), orient='vertical')
+    view = ListView(layout, items=(f'item {i}' for i in range(count)),
+                    follow=True)
+    layout.add_widget(view)
+    view.show()
+    layout.show()
+    app.render(force=True)
+
+    def scroll():
+        view.scroll(count // frames)
+        app.render()
+
+    def append():
+        view.append('appended')
+        app.render()
+
+    return {'scroll_frame_time': measure(scroll, repeat=frames),
+            'append_frame_time': measure(append, repeat=frames)}
+
+
+def run(frames=100):
+    results = {}
+    for count in (1000, 100000):
+        results[f'items_{count}'] = _frames(count, frames)
+
+    return results
@@ -0,0 +1,57 @@
+"""Bytes written per frame when a single label changes, and the time of
+those frames with the profiler enabled.
+"""
+
+from tgui import TGUI
+from tgui.layouts import LinearLayout
+from tgui.widgets import Label
+
+from ._utils import measure, virtual_screen
+
+
+def _frames(count, frames, profile=False):
+    backend = virtual_screen(count + 1, 80)
+    app = TGUI()
+    if profile:
+        app.set_profiling()
+    app.__app__(backend.initscr())
+
+    layout = LinearLayout(size=(count, 40), anchor=(0, 0), orient='vertical',
+                          padding=0)
+    labels = []
+    for i in range(count):
+        label = Label(layout, text=f'label {i:05}', padding=0)
+        layout.add_widget(label)
+        label.show()
+        labels += [label]
+    layout.show()
+
+    app.render(force=True)
+    first = backend.bytes_written
+
+    label = labels[count // 2]
+    state = {'frame': 0}
+
+    def frame():
+        state['frame'] += 1
+        label._win.addstr(0, 0, f'tick {state["frame"] % 10}')
+        app._renderer.mark()
+        app.render(force=True)
+
+    before = backend.bytes_written
+    stats = measure(frame, repeat=frames)
+
+    if profile:
+        app.set_profiling(False)
+
+    return first, (backend.bytes_written - before) / frames, stats
+
+
+def run(count=200, frames=100):
+    first, per_frame, stats = _frames(count, frames)
+    _, _, profiled = _frames(count, frames, profile=True)
+
+    return {'first_frame_bytes': first,
+            'single_label_bytes_per_frame': per_frame,
+            'single_label_frame_time': stats,
+            'profiled_frame_time': profiled}
@@ -0,0 +1,48 @@
+"""Time from TGUI.run() to the first frame.
+"""
+
+import time
+
+from tgui import TGUI
+from tgui.layouts import LinearLayout
+from tgui.widgets import Label
+
+from ._utils import measure, virtual_screen
+
+
+class _App(TGUI):
+    def __app__(self, arg):
+        super().__app__(arg)
+
+        layout = LinearLayout(size=(20, 60), anchor=(0, 0), orient='vertical',
+                              color=(15, 57))
+        for i in range(10):
+            label = Label(layout, text=f'label {i}', color=(15, 57 + i),
+                          padding=0)
+            layout.add_widget(label)
+            label.show()
+        layout.show()
+
+
+def run():
+    first_frames = []
+
+    def startup():
+        backend = virtual_screen()
+        doupdate = backend.doupdate
+        frames = []
+
+        def record():
+            frames.append(time.perf_counter())
+            return doupdate()
+
+        backend.doupdate = record
+
+        start = time.perf_counter()
+        _App().run()
+        first_frames.append(frames[0] - start)
+
+    stats = measure(startup)
+    stats['first_frame'] = min(first_frames)
+
+    return {'run_to_first_frame': stats}
@@ -1,4 +1,39 @@
 """Init modules.
+
+Only the core (the application, colors, rendering, timers, input and the
+profiler) is loaded by `import tgui`. Subpackages, and the classes they
+export, are loaded on first access, e.g. tgui.widgets or tgui.Label, so that
+tools using only part of tgui don't pay for the rest (controllers pull in
+asyncio and netifaces).
 """
 
+import importlib
+
 from ._tgui import *
+from ._colors import *
+from ._render import *
+from ._timers import *
+from ._input import *
+from ._profile import *
+
+# loaded on first access, see __getattr__
+_SUBPACKAGES = ('controllers', 'layouts', 'models', 'views', 'widgets')
+_EXPORTS = {'Widget': 'widgets', 'Label': 'widgets', 'ListView': 'widgets',
+            'Layout': 'layouts', 'LinearLayout': 'layouts',
+            'ListModel': 'models'}
+
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        return importlib.import_module(f'.{name}', __name__)
+
+    if name in _EXPORTS:
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+
+        return getattr(module, name)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBPACKAGES) | set(_EXPORTS))
@@ -0,0 +1,110 @@
+"""Color pair allocation module.
+"""
+
+import curses
+from collections import OrderedDict
+
+from .backends import get_backend
+
+
+def color_spec(color):
+    """Split a color argument into its foreground and background colors.
+
+    Args:
+        color (obj): None for the default colors, an int for both colors,
+                     or a (fg, bg) tuple.
+
+    Return:
+        return a (fg, bg) tuple.
+    """
+
+    if color is None:
+        # TODO use the terminal default display color
+        return curses.COLOR_BLACK, curses.COLOR_WHITE
+
+    if isinstance(color, tuple):
+        return color
+
+    return color, color
+
+
+class ColorPairs:
+    """Lazy, bounded allocator for curses color pairs.
+
+    Pairs are initialized on demand the first time a (fg, bg) combination is
+    requested and cached in insertion order. Once the terminal's pair limit
+    is reached, the least recently used pair is reclaimed and re-initialized
+    for the new combination.
+    """
+
+    def __init__(self, limit=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            limit (int): (optional) maximum number of pairs to allocate.
+                         Defaults to what the terminal supports.
+        """
+
+        self._limit = limit
+        self._max = None
+        self._pairs = OrderedDict()     # (fg, bg) -> pair number
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def __contains__(self, color):
+        return color in self._pairs
+
+    def _max_pairs(self):
+        """Get the number of usable pairs, excluding the reserved pair 0.
+
+        curses.color_pair() packs the pair number into the 8-bit A_COLOR field
+        of an attribute, so pairs above 255 can't be used with bkgd/attron.
+        """
+
+        if self._max is None:
+            self._max = min(get_backend().color_pairs(), 256) - 1
+            if self._limit is not None:
+                self._max = min(self._max, self._limit)
+
+        return self._max
+
+    def get(self, color):
+        """Get the attribute for a color pair, allocating it if needed.
+
+        Args:
+            color (tuple): a (fg, bg) tuple.
+
+        Return:
+            return the attribute value of the color pair.
+        """
+
+        pair_no = self._pairs.get(color)
+        if pair_no is not None:
+            self._pairs.move_to_end(color)
+
+            return get_backend().color_pair(pair_no)
+
+        if len(self._pairs) < self._max_pairs():
+            pair_no = len(self._pairs) + 1
+        else:
+            # reclaim the least recently used pair
+            _, pair_no = self._pairs.popitem(last=False)
+
+        fg, bg = color
+        backend = get_backend()
+        backend.init_pair(pair_no, fg, bg)
+        self._pairs[color] = pair_no
+
+        return backend.color_pair(pair_no)
+
+    def reset(self):
+        """Forget all allocated pairs, e.g. when curses is re-initialized.
+        """
+
+        self._pairs.clear()
+        self._max = None
+
+
+# shared by every TGUI object and view of an application
+color_pairs = ColorPairs()
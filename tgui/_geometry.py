@@ -0,0 +1,366 @@
+"""Geometry module. Helpers and base class for the layout engine.
+"""
+
+import curses
+
+from ._colors import color_pairs, color_spec
+from ._profile import profiler
+from ._props import ARRANGE, COLOR, MEASURE, Prop, PropsMeta, init_props
+from ._render import renderer
+from .backends import get_backend
+
+
+def size_spec(size):
+    """Split a size argument into its height and width specs.
+
+    Each spec is an int > 0 for a fixed size, 0 to fill the parent, or None
+    to wrap the content.
+
+    Args:
+        size (obj): None, an int, or a (height, width) tuple.
+
+    Return:
+        return a tuple containing the height spec and the width spec.
+    """
+
+    if isinstance(size, tuple):
+        return size
+
+    return size, size
+
+
+def padding_spec(padding):
+    """Split a padding argument into its four sides.
+
+    Args:
+        padding (obj): None, an int, or a (left, right, top, bottom) tuple.
+
+    Return:
+        return a tuple containing the left, right, top and bottom padding.
+    """
+
+    if isinstance(padding, tuple):
+        return padding
+
+    padding = padding or 0
+
+    return padding, padding, padding, padding
+
+
+def fit(y, x, height, width, max_height, max_width):
+    """Clip a rectangle to the area of its parent.
+
+    Return:
+        return the clipped (height, width), 0 on an axis that doesn't fit.
+    """
+
+    height = max(0, min(height, max_height - y)) if y >= 0 else 0
+    width = max(0, min(width, max_width - x)) if x >= 0 else 0
+
+    return height, width
+
+
+class Node(metaclass=PropsMeta):
+    """Base of the widgets and layouts placed by the layout engine.
+
+    Layout is done in two passes. measure() computes the content size a
+    node wants and caches it until the node is invalidated. arrange() gives
+    the node its final position and size within its parent window, and only
+    touches the window if they changed. Invalidating a node re-measures it
+    and its ancestors, and re-arranges only the layouts along that path.
+
+    Properties are declared with Prop, each saying which of these passes
+    runs again when it changes. Subclasses create the window with _create.
+    """
+
+    __slots__ = ('_layout', '_parent', '_measured', '_slot', '_shown',
+                 '_attr', '_win', '_pan')
+
+    size = Prop(None, MEASURE)
+    anchor = Prop(None, ARRANGE)
+    color = Prop(None, COLOR)
+    padding = Prop(0, ARRANGE)
+
+    def __init__(self, layout=None, **kwargs):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            layout (obj): (optional) the layout whose window the node is
+                          derived from, None for the screen.
+            kwargs (dict): values of the props of the node.
+        """
+
+        self._layout = layout
+        self._parent = None     # layout arranging the node, see add_widget
+        self._measured = None   # cached content (height, width)
+        self._slot = None       # (y, x, height, width) in the parent window
+        self._shown = False
+        self._attr = 0
+        self._win, self._pan = None, None
+
+        init_props(self, kwargs)
+
+    def _parent_win(self):
+        return self._layout._win
+
+    def _visible(self):
+        """False if the node was clipped out of its parent window.
+        """
+
+        return self._slot is None or bool(self._slot[2] and self._slot[3])
+
+    def _anchor_yx(self):
+        """Get the position given by the anchor, None if the node is placed
+        by the layout it's added to.
+        """
+
+        anchor = self.anchor
+        if anchor is None or isinstance(anchor, tuple):
+            return anchor
+
+        return anchor, anchor
+
+    def _anchored_slot(self):
+        """Get the slot of the node from its anchor and measured size.
+
+        Return:
+            return a tuple containing the y, x, height and width within the
+            parent window, with a 0 height and width if the node has no
+            anchor or doesn't fit.
+        """
+
+        anchor = self._anchor_yx()
+        if anchor is None:
+            return 0, 0, 0, 0
+
+        y, x = anchor
+        max_height, max_width = self._parent_win().getmaxyx()
+        height, width = self.measure()
+
+        # 0 means to fill the parent
+        height = height or max_height - y
+        width = width or max_width - x
+        height, width = fit(y, x, height, width, max_height, max_width)
+
+        return y, x, height, width
+
+    def _create(self):
+        """Create the window and the hidden panel of the node, at its anchor.
+        """
+
+        parent = self._parent_win()
+        y, x, height, width = self._slot = self._anchored_slot()
+
+        if height and width:
+            self._win = parent.derwin(height, width, y, x)
+        else:
+            # not placed yet, keep a placeholder until arranged
+            self._win = parent.derwin(1, 1, 0, 0)
+
+        self._pan = get_backend().new_panel(self._win)
+        self._pan.hide()
+
+        self._attr = color_pairs.get(color_spec(self.color))
+        if height and width:
+            self._draw()
+
+    def _content_size(self):
+        """Get the size of the content, used to wrap it.
+        """
+
+        return 1, 1
+
+    def margins(self):
+        """Get the padding around the node, within the parent layout.
+
+        Return:
+            return a tuple containing the left, right, top and bottom padding.
+        """
+
+        return padding_spec(self.padding)
+
+    def measure(self):
+        """Get the size the node wants, without padding.
+
+        Return:
+            return a tuple containing the height and width, where 0 means to
+            fill the parent.
+        """
+
+        if self._measured is None:
+            height, width = size_spec(self.size)
+            if height is None or width is None:
+                content = self._content_size()
+                height = content[0] if height is None else height
+                width = content[1] if width is None else width
+
+            self._measured = (height, width)
+
+        return self._measured
+
+    def paint(self):
+        """Draw the node in its window.
+        """
+
+        self._win.bkgd(' ', self._attr)
+
+    def _draw(self):
+        """Paint the node, timed while the profiler is enabled.
+        """
+
+        if profiler.enabled:
+            profiler.paint(self)
+        else:
+            self.paint()
+
+    def _erase(self):
+        """Clear the cells of the current window with the parent background,
+        before the window is moved or resized.
+        """
+
+        if self._slot is not None and self._visible():
+            self._win.bkgdset(self._parent_win().getbkgd())
+            self._win.erase()
+
+    def _place(self, y, x, height, width, force=False):
+        """Move and resize the window, then draw it.
+
+        Args:
+            y (int): vertical position within the parent window.
+            x (int): horizontal position within the parent window.
+            height (int): height of the window.
+            width (int): width of the window.
+            force (bool): (optional) the parent window was moved or resized,
+                          so the window is moved along with it.
+        """
+
+        parent = self._parent_win()
+        max_height, max_width = parent.getmaxyx()
+        height, width = fit(y, x, height, width, max_height, max_width)
+
+        old = self._slot
+        self._slot = (y, x, height, width)
+
+        if not height or not width:
+            # nothing left to show, keep the old window hidden
+            self._pan.hide()
+            renderer.mark()
+
+            return
+
+        if old is None or not old[2] or not old[3]:
+            # the window is a placeholder
+            self._derive(parent, y, x, height, width)
+        elif force or old != self._slot:
+            try:
+                self._move(parent, y, x, height, width)
+            except curses.error:
+                self._derive(parent, y, x, height, width)
+
+        self._draw()
+        if self._shown and self._pan.hidden():
+            self._pan.show()
+        renderer.mark()
+
+    def _derive(self, parent, y, x, height, width):
+        self._win = parent.derwin(height, width, y, x)
+        self._pan.replace(self._win)
+
+    def _move(self, parent, y, x, height, width):
+        """Move and resize the window in place, keeping its panel.
+        """
+
+        win = self._win
+        cur_height, cur_width = win.getmaxyx()
+
+        # shrink first, so that the window fits at its new position
+        if height < cur_height or width < cur_width:
+            win.resize(min(height, cur_height), min(width, cur_width))
+
+        # the position on the screen and the cells shown within the parent
+        # are moved separately, as with curses subwindows. The cells are
+        # mapped again even if the position didn't change, in case the
+        # parent itself was moved.
+        par_y, par_x = parent.getbegyx()
+        if win.getbegyx() != (par_y + y, par_x + x):
+            self._pan.move(par_y + y, par_x + x)
+        win.mvderwin(y, x)
+
+        if win.getmaxyx() != (height, width):
+            win.resize(height, width)
+
+    def arrange(self, y, x, height, width, force=False):
+        """Give the node its position and size within the parent window.
+
+        Args:
+            y (int): vertical position within the parent window.
+            x (int): horizontal position within the parent window.
+            height (int): height of the window.
+            width (int): width of the window.
+            force (bool): (optional) the parent window was moved or resized,
+                          so the window is moved along with it.
+        """
+
+        if force or self._slot != (y, x, height, width):
+            if not force:
+                self._erase()
+
+            self._arrange(y, x, height, width, force)
+
+    def _arrange(self, y, x, height, width, force):
+        """Place the node once its old cells are erased, see arrange.
+        """
+
+        self._place(y, x, height, width, force)
+
+    def _invalidate(self):
+        """Re-measure the node after a change of its content or size.
+
+        The node is arranged again only if the measured size changed,
+        otherwise it's just redrawn in place.
+        """
+
+        old = self._measured
+        self._measured = None
+
+        if self.measure() != old:
+            self._rearrange()
+        else:
+            self._repaint()
+
+    def _rearrange(self):
+        """Arrange the node again, e.g. after its anchor or padding changed.
+        """
+
+        self._measured = None
+
+        if self._parent is not None:
+            self._parent._invalidate()
+        else:
+            self.arrange(*self._anchored_slot())
+
+    def _repaint(self):
+        if self._win is not None and self._visible():
+            self._draw()
+            renderer.mark()
+
+    def _recolor(self):
+        self._attr = color_pairs.get(color_spec(self.color))
+        self._repaint()
+
+    def show(self):
+        """Make the node visible, with all its children.
+        """
+
+        self._shown = True
+        if self._visible():
+            self._pan.show()
+        renderer.mark()
+
+    def hide(self):
+        """Make the node invisible, with all its children.
+        """
+
+        self._shown = False
+        self._pan.hide()
+        renderer.mark()
@@ -0,0 +1,353 @@
+"""Input module. Decodes the keys read from the terminal into named key
+events, and routes them through keymaps.
+"""
+
+import curses
+from collections import namedtuple
+
+
+ESC = 27
+
+# a decoded key. code is the key code as returned by getch, None if the key
+# was decoded from several codes (an escape sequence, a UTF-8 character)
+KeyEvent = namedtuple('KeyEvent', ('name', 'code'))
+
+# names of the curses keys that differ from their constant, e.g. KEY_PPAGE
+_ALIASES = {'ppage': 'pgup', 'npage': 'pgdn', 'dc': 'delete', 'ic': 'insert',
+            'btab': 'S-tab'}
+
+_CONTROLS = {0: 'C-space', 8: 'backspace', 9: 'tab', 10: 'enter',
+             13: 'enter', 27: 'esc', 28: 'C-\\', 29: 'C-]', 30: 'C-^',
+             31: 'C-_', 32: 'space', 127: 'backspace'}
+
+# keys of the escape sequences, as sent by xterm and most terminals. curses
+# decodes those it knows of in keypad mode, the others are decoded here.
+_CSI = {'A': 'up', 'B': 'down', 'C': 'right', 'D': 'left', 'H': 'home',
+        'F': 'end'}
+_SS3 = dict(_CSI, P='f1', Q='f2', R='f3', S='f4')
+_TILDE = {'1': 'home', '2': 'insert', '3': 'delete', '4': 'end', '5': 'pgup',
+          '6': 'pgdn', '7': 'home', '8': 'end', '11': 'f1', '12': 'f2',
+          '13': 'f3', '14': 'f4', '15': 'f5', '17': 'f6', '18': 'f7',
+          '19': 'f8', '20': 'f9', '21': 'f10', '23': 'f11', '24': 'f12'}
+_MODIFIERS = {'2': 'S-', '3': 'M-', '4': 'M-S-', '5': 'C-', '6': 'C-S-',
+              '7': 'C-M-', '8': 'C-M-S-'}
+
+# names of the ncurses extended keys, e.g. kUP5 for ctrl+up
+_EXTENDED = {'kUP': 'up', 'kDN': 'down', 'kLFT': 'left', 'kRIT': 'right',
+             'kHOM': 'home', 'kEND': 'end', 'kPRV': 'pgup', 'kNXT': 'pgdn',
+             'kDC': 'delete', 'kIC': 'insert'}
+
+# incremented by every change of a keymap, see Keymap.generation
+_generation = 0
+
+
+def _key_names():
+    names = {}
+    for attr in dir(curses):
+        if attr.startswith('KEY_') and attr not in ('KEY_MIN', 'KEY_MAX'):
+            name = attr[4:].lower()
+            names.setdefault(getattr(curses, attr), _ALIASES.get(name, name))
+
+    names.update(_CONTROLS)
+    for code in range(1, 27):
+        names.setdefault(code, f'C-{chr(code + 96)}')
+    for code in range(33, 127):
+        names[code] = chr(code)
+
+    return names
+
+
+def _sequences():
+    sequences = {}
+    for final, name in _CSI.items():
+        sequences[f'\x1b[{final}'] = name
+        for mod, prefix in _MODIFIERS.items():
+            sequences[f'\x1b[1;{mod}{final}'] = prefix + name
+    for final, name in _SS3.items():
+        sequences[f'\x1bO{final}'] = name
+    for number, name in _TILDE.items():
+        sequences[f'\x1b[{number}~'] = name
+        for mod, prefix in _MODIFIERS.items():
+            sequences[f'\x1b[{number};{mod}~'] = prefix + name
+
+    return {tuple(map(ord, seq)): name for seq, name in sequences.items()}
+
+
+# compiled once: key code -> name, escape sequence -> name, and every
+# strict prefix of a sequence
+KEY_NAMES = _key_names()
+SEQUENCES = _sequences()
+_PREFIXES = {seq[:i] for seq in SEQUENCES for i in range(1, len(seq))}
+
+
+def key_name(code):
+    """Get the name of a key code, e.g. 'a', 'C-a', 'enter', 'up' or 'f1'.
+
+    Return:
+        return the name, 'key-<code>' if the key is unknown.
+    """
+
+    name = KEY_NAMES.get(code)
+    if name is not None:
+        return name
+
+    if 160 <= code < 256:
+        # latin-1, from a terminal that doesn't send UTF-8
+        return chr(code)
+
+    # an ncurses extended key, e.g. kUP5, named once curses is initialized
+    try:
+        extended = curses.keyname(code).decode()
+    except (curses.error, ValueError):
+        return f'key-{code}'
+
+    base = extended.rstrip('0123456789')
+    if base in _EXTENDED:
+        name = _MODIFIERS.get(extended[len(base):], '') + _EXTENDED[base]
+    else:
+        name = f'key-{code}'
+    KEY_NAMES[code] = name
+
+    return name
+
+
+def parse_key(key):
+    """Get the name of a key as given to a keymap.
+
+    Args:
+        key (obj): a key code, e.g. curses.KEY_UP, or a name, e.g. 'up',
+                   'C-x', 'M-x', 'ctrl+x' or 'alt+x'.
+
+    Return:
+        return the name, as given to decode_keys.
+    """
+
+    if isinstance(key, int):
+        return key_name(key)
+
+    if len(key) > 1 and '+' in key:
+        *mods, base = key.split('+')
+        mods = {{'ctrl': 'C', 'alt': 'M', 'meta': 'M',
+                 'shift': 'S'}.get(mod.lower(), mod) for mod in mods}
+        key = ''.join(f'{mod}-' for mod in sorted(mods)) + base
+
+    if len(key) == 1:
+        return KEY_NAMES.get(ord(key), key)
+
+    return key
+
+
+def _utf8_length(code):
+    if 0xc2 <= code < 0xe0:
+        return 2
+    if 0xe0 <= code < 0xf0:
+        return 3
+    if 0xf0 <= code < 0xf5:
+        return 4
+
+    return 0
+
+
+def decode_keys(codes):
+    """Decode the key codes read in one go into key events.
+
+    Escape sequences that curses left undecoded are named after their key,
+    with its modifiers (e.g. 'C-up'), an ESC followed by another key is that
+    key with alt (e.g. 'M-x'), and the bytes of a UTF-8 character are joined
+    into the character. A sequence cut at the end of codes is decoded as
+    separate keys, which is never the case when every pending key is read.
+
+    Args:
+        codes (list): key codes, as returned by getch.
+
+    Return:
+        return a list of KeyEvent objects.
+    """
+
+    events = []
+    i, count = 0, len(codes)
+    while i < count:
+        code = codes[i]
+
+        if code == ESC and i + 1 < count:
+            # the longest sequence starting at i
+            seq, j, match = (ESC,), i + 1, None
+            while j < count:
+                seq += (codes[j],)
+                if seq in SEQUENCES:
+                    match = j + 1
+                if seq not in _PREFIXES:
+                    break
+                j += 1
+
+            if match is not None:
+                events += [KeyEvent(SEQUENCES[tuple(codes[i:match])], None)]
+                i = match
+                continue
+
+            following = codes[i + 1]
+            if following != ESC and following < 256:
+                events += [KeyEvent(f'M-{key_name(following)}', None)]
+                i += 2
+                continue
+
+        length = _utf8_length(code)
+        if length and i + length <= count and \
+                all(0x80 <= byte < 0xc0 for byte in codes[i + 1:i + length]):
+            char = bytes(codes[i:i + length]).decode('utf-8', 'replace')
+            events += [KeyEvent(char, None)]
+            i += length
+            continue
+
+        events += [KeyEvent(key_name(code), code)]
+        i += 1
+
+    return events
+
+
+class Binding:
+    """Action bound to a key in a Keymap.
+    """
+
+    __slots__ = ('action', 'args', 'repeat')
+
+    def __init__(self, action, args=(), repeat=False):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            action (obj): a callable, or the name of a method of the object
+                          the keymap belongs to.
+            args (tuple): (optional) arguments of the call.
+            repeat (bool): (optional) True to call the action once for a
+                           run of the key, with the number of presses as its
+                           count argument, e.g. to scroll.
+        """
+
+        self.action = action
+        self.args = args
+        self.repeat = repeat
+
+    def __repr__(self):
+        return f'Binding({self.action!r}, {self.args!r})'
+
+    def __call__(self, target, count=1):
+        """Call the action.
+
+        Args:
+            target (obj): the object the keymap belongs to.
+            count (int): (optional) number of presses of the key.
+
+        Return:
+            return the value returned by the action, False if the key is to
+            be handled by the next keymap.
+        """
+
+        action = self.action
+        if isinstance(action, str):
+            action = getattr(target, action)
+
+        if self.repeat:
+            return action(*self.args, count=count)
+
+        return action(*self.args)
+
+
+class Keymap:
+    """Bindings of key names to actions.
+
+    Keys are named when bound, see parse_key, so that routing a key event
+    is a dict lookup.
+    """
+
+    def __init__(self, bindings=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            bindings (dict): (optional) actions by key, see bind.
+        """
+
+        self._bindings = {}
+        for key, action in (bindings or {}).items():
+            self.bind(key, action)
+
+    def __contains__(self, key):
+        return parse_key(key) in self._bindings
+
+    def __iter__(self):
+        return iter(self._bindings.items())
+
+    @property
+    def generation(self):
+        """Counter of the changes of every keymap, to tell when tables
+        merging keymaps are stale.
+        """
+
+        return _generation
+
+    def bind(self, keys, action, *args, repeat=False):
+        """Bind keys to an action, see Binding.
+
+        Args:
+            keys (obj): a key, or a list of keys, see parse_key.
+            action (obj): a callable, or the name of a method of the object
+                          the keymap belongs to.
+            args: arguments of the call.
+            repeat (bool): (optional) True to coalesce repeated presses.
+        """
+
+        global _generation
+
+        if isinstance(keys, (str, int)):
+            keys = [keys]
+
+        for key in keys:
+            self._bindings[parse_key(key)] = Binding(action, args, repeat)
+        _generation += 1
+
+    def unbind(self, keys):
+        global _generation
+
+        if isinstance(keys, (str, int)):
+            keys = [keys]
+
+        for key in keys:
+            self._bindings.pop(parse_key(key), None)
+        _generation += 1
+
+    def get(self, name):
+        """Get the binding of a key name, None if the key isn't bound.
+        """
+
+        return self._bindings.get(name)
+
+    def copy(self):
+        """Get a new keymap with the same bindings, e.g. for an object to
+        bind keys without changing a keymap shared with others.
+        """
+
+        global _generation
+
+        keymap = Keymap()
+        keymap._bindings = dict(self._bindings)
+        _generation += 1
+
+        return keymap
+
+
+def compile_keymaps(chain):
+    """Merge keymaps into a single table.
+
+    Args:
+        chain (list): (keymap, target) tuples, the first keymaps taking
+                      precedence, e.g. the focused widget first.
+
+    Return:
+        return a dict of (Binding, target) tuples, by key name.
+    """
+
+    table = {}
+    for keymap, target in reversed(chain):
+        for name, binding in keymap:
+            table[name] = (binding, target)
+
+    return table
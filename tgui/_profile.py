@@ -0,0 +1,495 @@
+"""Render profiling module.
+"""
+
+import curses
+import time
+from collections import deque
+
+from .backends import get_backend, set_backend
+
+
+# curses calls counted between two frames
+COUNTED = ('refresh', 'noutrefresh', 'doupdate', 'addstr', 'derwin',
+           'init_pair')
+
+# number of frames kept by a profiler
+HISTORY = 120
+
+# number of widgets listed as the slowest of a frame
+SLOWEST = 5
+
+
+def _name(node):
+    return f'{type(node).__name__}@{id(node):x}'
+
+
+def _unwrap(obj):
+    return obj._obj if isinstance(obj, (ProfiledWindow, ProfiledPanel)) \
+        else obj
+
+
+class ProfiledWindow:
+    """Window counting the curses calls made on it, see ProfilingBackend.
+
+    Other attributes are those of the wrapped window.
+    """
+
+    __slots__ = ('_obj', '_calls')
+
+    def __init__(self, win, calls):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            win (window): the curses or virtual window.
+            calls (dict): number of calls, by name, shared with the profiler.
+        """
+
+        self._obj = win
+        self._calls = calls
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+    def addstr(self, *args):
+        self._calls['addstr'] += 1
+
+        return self._obj.addstr(*args)
+
+    def derwin(self, *args):
+        self._calls['derwin'] += 1
+
+        return ProfiledWindow(self._obj.derwin(*args), self._calls)
+
+    def noutrefresh(self):
+        self._calls['noutrefresh'] += 1
+
+        return self._obj.noutrefresh()
+
+    def refresh(self):
+        self._calls['refresh'] += 1
+
+        return self._obj.refresh()
+
+
+class ProfiledPanel:
+    """Panel of a ProfiledWindow, which gives the wrapped window to curses.
+    """
+
+    __slots__ = ('_obj', '_win')
+
+    def __init__(self, pan, win):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            pan (panel): the curses or virtual panel.
+            win (obj): the window of the panel, as given to new_panel.
+        """
+
+        self._obj = pan
+        self._win = win
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+    def window(self):
+        return self._win
+
+    def replace(self, win):
+        self._obj.replace(_unwrap(win))
+        self._win = win
+
+
+class ProfilingBackend:
+    """Backend wrapping another one to count the curses calls, installed by
+    Profiler.enable.
+
+    Windows created through it, and the windows derived from them, are
+    ProfiledWindow objects. Other attributes are those of the wrapped
+    backend, e.g. push_keys of a VirtualBackend.
+    """
+
+    def __init__(self, backend, calls):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            backend (obj): the wrapped backend.
+            calls (dict): number of calls, by name, shared with the profiler.
+        """
+
+        self.backend = backend
+        self._calls = calls
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def wrapper(self, func, *args, **kwds):
+        def app(stdscr, *args, **kwds):
+            return func(ProfiledWindow(stdscr, self._calls), *args, **kwds)
+
+        return self.backend.wrapper(app, *args, **kwds)
+
+    def initscr(self):
+        return ProfiledWindow(self.backend.initscr(), self._calls)
+
+    def newwin(self, *args):
+        return ProfiledWindow(self.backend.newwin(*args), self._calls)
+
+    def new_panel(self, win):
+        return ProfiledPanel(self.backend.new_panel(_unwrap(win)), win)
+
+    def doupdate(self):
+        self._calls['doupdate'] += 1
+
+        return self.backend.doupdate()
+
+    def init_pair(self, pair_number, fg, bg):
+        self._calls['init_pair'] += 1
+
+        return self.backend.init_pair(pair_number, fg, bg)
+
+
+class FrameStats:
+    """Measures of one frame, see Profiler.
+
+    Times are in seconds. paint is the time spent painting widgets since
+    the previous frame, whether during the frame (e.g. once arranged) or
+    right away (e.g. a label whose text changed). layout is the rest of the
+    time spent before the windows are copied to the screen: deferred calls,
+    measures and arranges. flush is the time spent copying the windows and
+    updating the terminal.
+    """
+
+    __slots__ = ('index', 'time', 'layout', 'paint', 'flush', 'calls',
+                 'bytes', 'widgets')
+
+    def __init__(self, index, layout, paint, flush, calls, written, widgets):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            index (int): number of the frame since the profiler was enabled.
+            layout (float): seconds spent in deferred calls and layout.
+            paint (float): seconds spent painting widgets.
+            flush (float): seconds spent drawing the frame.
+            calls (dict): number of curses calls since the previous frame,
+                          by name, see COUNTED.
+            written (int): bytes written to the terminal, None if the
+                           backend doesn't tell, as with curses.
+            widgets (list): the (name, seconds) of the widgets that took the
+                            longest to paint, slowest first.
+        """
+
+        self.index = index
+        self.time = time.time()
+        self.layout = layout
+        self.paint = paint
+        self.flush = flush
+        self.calls = calls
+        self.bytes = written
+        self.widgets = widgets
+
+    def __repr__(self):
+        return (f'FrameStats({self.index}, total={self.total * 1e3:.2f}ms, '
+                f'bytes={self.bytes})')
+
+    @property
+    def total(self):
+        return self.layout + self.paint + self.flush
+
+    def as_dict(self):
+        """Get the measures as a dict, e.g. to dump them as JSON.
+        """
+
+        return {'frame': self.index, 'time': self.time, 'total': self.total,
+                'layout': self.layout, 'paint': self.paint,
+                'flush': self.flush, 'calls': self.calls,
+                'bytes': self.bytes, 'widgets': self.widgets}
+
+
+class Profiler:
+    """Opt-in instrumentation of the frames drawn by the Renderer.
+
+    While enabled, each frame is timed, split into layout, paint and flush,
+    along with the curses calls made since the previous frame, the bytes
+    written to the terminal and the widgets that took the longest to paint.
+    The last frames are kept in frames, and can be shown on the screen by an
+    overlay, or appended to a JSON lines log.
+
+    Calls are counted by a ProfilingBackend wrapping the active backend, so
+    only the windows created once the profiler is enabled are counted:
+    enable it before creating any window, e.g. before TGUI.run, and after
+    set_backend. While disabled, the renderer and the widgets only check
+    the enabled attribute.
+    """
+
+    def __init__(self, history=HISTORY):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            history (int): (optional) number of frames kept.
+        """
+
+        self.enabled = False
+        self.frames = deque(maxlen=history)
+        self.calls = dict.fromkeys(COUNTED, 0)  # since the last frame
+        self.count = 0          # frames measured
+
+        self._paint = 0.0       # seconds painting since the last frame
+        # [seconds, paints] of each widget since the last frame and since
+        # enabled, by name
+        self._widgets = {}
+        self._totals = {}
+
+        self._log = None
+        self._own_log = False
+
+        self._overlay = False
+        self._overlay_time = 0.0
+        self._screen = None
+        self._win, self._pan = None, None
+
+    def enable(self, overlay=False, log=None):
+        """Start measuring the frames.
+
+        Args:
+            overlay (bool): (optional) True to show the measures of the last
+                            frame at the top right of the screen.
+            log (obj): (optional) path of a file, or a text file object, to
+                       append the measures of each frame to, one JSON object
+                       per line.
+        """
+
+        self.disable()
+        self.reset()
+
+        backend = get_backend()
+        if not isinstance(backend, ProfilingBackend):
+            set_backend(ProfilingBackend(backend, self.calls))
+
+        if isinstance(log, str):
+            self._log = open(log, 'a', buffering=1)
+            self._own_log = True
+        else:
+            self._log = log
+            self._own_log = False
+
+        self._overlay = overlay
+        self.enabled = True
+
+    def disable(self):
+        """Stop measuring the frames, and restore the backend. The frames
+        measured are kept until reset or enabled again.
+        """
+
+        self.enabled = False
+
+        backend = get_backend()
+        if isinstance(backend, ProfilingBackend):
+            set_backend(backend.backend)
+
+        if self._own_log:
+            self._log.close()
+        self._log, self._own_log = None, False
+
+        self._overlay = False
+        if self._pan is not None:
+            self._pan.hide()
+
+    def reset(self):
+        """Forget the frames measured.
+        """
+
+        self.frames.clear()
+        self.count = 0
+        for name in self.calls:
+            self.calls[name] = 0
+
+        self._paint = 0.0
+        self._widgets.clear()
+        self._totals.clear()
+
+    def set_screen(self, stdscr):
+        """Set the screen the overlay is shown on, e.g. when curses is
+        initialized.
+        """
+
+        self._screen = _unwrap(stdscr)
+        self._win, self._pan = None, None
+
+    def paint(self, node):
+        """Paint a widget or layout, timing it. See Node._draw.
+        """
+
+        start = time.perf_counter()
+        try:
+            node.paint()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._paint += elapsed
+
+            stats = self._widgets.setdefault(_name(node), [0.0, 0])
+            stats[0] += elapsed
+            stats[1] += 1
+
+    @property
+    def painted(self):
+        """Seconds spent painting since the last frame.
+        """
+
+        return self._paint
+
+    def end_frame(self, start, painted, laid_out, written):
+        """Record the measures of a frame, at the end of Renderer.render.
+
+        Args:
+            start (float): perf_counter at the start of the frame.
+            painted (float): painted at the start of the frame.
+            laid_out (float): perf_counter once the layouts were updated.
+            written (obj): the value returned by doupdate.
+
+        Return:
+            return the FrameStats object.
+        """
+
+        now = time.perf_counter()
+
+        layout = laid_out - start - (self._paint - painted)
+        flush = now - laid_out - self._overlay_time
+
+        calls = dict(self.calls)
+        for name in self.calls:
+            self.calls[name] = 0
+
+        for name, (seconds, paints) in self._widgets.items():
+            total = self._totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += paints
+
+        widgets = sorted(((name, seconds) for name, (seconds, _)
+                          in self._widgets.items()),
+                         key=lambda item: item[1], reverse=True)
+
+        self.count += 1
+        frame = FrameStats(self.count, max(0.0, layout), self._paint, flush,
+                           calls, written if isinstance(written, int) else
+                           None, widgets[:SLOWEST])
+        self.frames.append(frame)
+
+        self._paint = 0.0
+        self._widgets.clear()
+        self._overlay_time = 0.0
+
+        if self._log is not None:
+            # imported on first use, json isn't needed by the core otherwise
+            import json
+
+            self._log.write(json.dumps(frame.as_dict()) + '\n')
+
+        return frame
+
+    def slowest(self, count=10):
+        """Get the widgets that took the longest to paint since enabled.
+
+        Return:
+            return a list of (name, seconds, paints) tuples, slowest first,
+            where the name is the class and the id of the widget.
+        """
+
+        totals = sorted(self._totals.items(), key=lambda item: item[1][0],
+                        reverse=True)
+
+        return [(name, seconds, paints)
+                for name, (seconds, paints) in totals[:count]]
+
+    def summary(self):
+        """Get the mean and max of the measures of the frames kept.
+
+        Return:
+            return a dict, e.g. to dump it as JSON.
+        """
+
+        frames = self.frames
+        if not frames:
+            return {'frames': 0}
+
+        summary = {'frames': len(frames)}
+        for phase in ('total', 'layout', 'paint', 'flush'):
+            values = [getattr(frame, phase) for frame in frames]
+            summary[phase] = {'mean': sum(values) / len(values),
+                              'max': max(values)}
+
+        summary['calls'] = {name: sum(frame.calls[name] for frame in frames) /
+                            len(frames) for name in COUNTED}
+
+        written = [frame.bytes for frame in frames if frame.bytes is not None]
+        summary['bytes'] = sum(written) / len(written) if written else None
+        summary['slowest'] = self.slowest(SLOWEST)
+
+        return summary
+
+    def _overlay_lines(self):
+        if not self.frames:
+            return ['profiling...']
+
+        frame = self.frames[-1]
+        calls = frame.calls
+
+        lines = [f'frame {frame.total * 1e3:6.2f}ms  '
+                 f'L {frame.layout * 1e3:.2f}  P {frame.paint * 1e3:.2f}  '
+                 f'F {frame.flush * 1e3:.2f}',
+                 f'addstr {calls["addstr"]}  '
+                 f'refresh {calls["refresh"] + calls["noutrefresh"]}  '
+                 f'derwin {calls["derwin"]}  pair {calls["init_pair"]}']
+
+        slowest = frame.widgets[0] if frame.widgets else ('-', 0.0)
+        written = '?' if frame.bytes is None else frame.bytes
+        lines += [f'{written} B  slowest {slowest[0]} '
+                  f'{slowest[1] * 1e3:.2f}ms']
+
+        return lines
+
+    def draw_overlay(self):
+        """Draw the measures of the last frame on top of the screen, if the
+        overlay is enabled. Called by Renderer.render before the panels are
+        updated. The window of the overlay isn't counted.
+        """
+
+        if not self._overlay or self._screen is None:
+            return
+
+        start = time.perf_counter()
+
+        lines = self._overlay_lines()
+        max_height, max_width = self._screen.getmaxyx()
+        height = min(len(lines), max_height)
+        width = min(max(len(line) for line in lines) + 2, max_width)
+        if not height or not width:
+            return
+
+        y, x = 0, max_width - width
+        win = self._win
+        if win is None or win.getmaxyx() != (height, width) or \
+                win.getbegyx() != (y, x):
+            backend = get_backend()
+            if isinstance(backend, ProfilingBackend):
+                backend = backend.backend
+
+            win = self._win = backend.newwin(height, width, y, x)
+            if self._pan is None:
+                self._pan = backend.new_panel(win)
+            else:
+                self._pan.replace(win)
+
+        for row, line in enumerate(lines[:height]):
+            try:
+                win.addstr(row, 0, f' {line}'.ljust(width)[:width],
+                           curses.A_REVERSE)
+            except curses.error:
+                # curses fails after writing the last cell of the window
+                pass
+
+        self._pan.top()
+        self._overlay_time = time.perf_counter() - start
+
+
+# shared by every TGUI object and widget of an application
+profiler = Profiler()
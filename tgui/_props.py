@@ -0,0 +1,116 @@
+"""Property module. Declarative, slot-backed properties of widgets and
+layouts.
+"""
+
+# what to redo when a property changes, as the name of a method of the node
+MEASURE = '_invalidate'     # the size of the content may change
+ARRANGE = '_rearrange'      # the position within the parent may change
+PAINT = '_repaint'          # only the look of the node changes
+COLOR = '_recolor'          # the color pair must be allocated again
+
+
+class Prop:
+    """Property of a widget or layout, declared in the class body.
+
+    The value is stored in a slot named after the property with a leading
+    underscore, added to the class by PropsMeta. Setting a new value runs
+    the pass the property affects, so that e.g. a new text re-measures a
+    label, while a new alignment only redraws it.
+    """
+
+    __slots__ = ('name', 'default', 'affects', '_member')
+
+    def __init__(self, default=None, affects=PAINT):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            default (obj): (optional) value used if none is given to the
+                           constructor.
+            affects (str): (optional) the pass to run when the value changes,
+                           one of MEASURE, ARRANGE, PAINT or COLOR. None if
+                           the value isn't drawn.
+        """
+
+        self.name = None
+        self.default = default
+        self.affects = affects
+
+        self._member = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+        # the slot, added to the class or to one of its bases
+        self._member = getattr(owner, '_' + name)
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        return self._member.__get__(obj, owner)
+
+    def __set__(self, obj, value):
+        old = self._member.__get__(obj)
+        self._member.__set__(obj, value)
+
+        # nothing is drawn until the window is created
+        if value != old and self.affects and obj._win is not None:
+            getattr(obj, self.affects)()
+
+
+class PropsMeta(type):
+    """Metaclass of the classes declaring props.
+
+    Adds a slot for each Prop declared in the class body, and collects the
+    props of the class and its bases once, in cls._props, so that the
+    keyword arguments of a constructor are checked against a dict instead
+    of a per-class list of names.
+
+    A subclass declaring neither props nor __slots__ is left unchanged, and
+    so gets a __dict__ as usual.
+    """
+
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        props = [key for key, value in namespace.items()
+                 if isinstance(value, Prop)]
+
+        if props or '__slots__' in namespace:
+            slots = list(namespace.get('__slots__', ()))
+            for key in props:
+                # a prop redeclared by a subclass, e.g. with another default,
+                # keeps the slot of its base
+                if not any(hasattr(base, '_' + key) for base in bases):
+                    slots += ['_' + key]
+
+            namespace['__slots__'] = tuple(slots)
+
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+
+        cls._props = {}
+        for klass in reversed(cls.__mro__):
+            for key, value in vars(klass).items():
+                if isinstance(value, Prop):
+                    cls._props[key] = value
+
+        return cls
+
+
+def init_props(obj, kwargs):
+    """Set every prop of a new object, without running any pass.
+
+    Args:
+        obj (obj): the object, an instance of a class using PropsMeta.
+        kwargs (dict): values given to the constructor, by prop name.
+    """
+
+    props = obj._props
+
+    for key in kwargs:
+        if key not in props:
+            error = f'{type(obj).__name__}.__init__() got an unexpected '
+            error += f"keyword argument '{key}'"
+
+            raise TypeError(error)
+
+    for key, prop in props.items():
+        prop._member.__set__(obj, kwargs.get(key, prop.default))
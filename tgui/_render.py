@@ -0,0 +1,194 @@
+"""Render scheduler module.
+"""
+
+import time
+
+from ._profile import profiler
+from .backends import get_backend
+
+
+class Renderer:
+    """Frame-batched render scheduler.
+
+    Windows are marked dirty instead of being refreshed directly. A frame
+    copies every dirty window to the virtual screen with noutrefresh, updates
+    the panel stack once, and flushes the terminal with a single doupdate.
+    """
+
+    def __init__(self, fps=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            fps (int): (optional) maximum number of frames per second.
+                       Defaults to no limit.
+        """
+
+        self._dirty = {}    # ordered set of windows not backed by a panel
+        self._layouts = {}  # ordered set of layouts to measure and arrange
+        self._deferred = {}  # callback -> args of its last call
+        self._pending = False
+        self._last = 0.0
+        self._callback = None
+
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        """Set or reset the frame rate cap.
+
+        Args:
+            fps (int): maximum number of frames per second, None for no limit.
+        """
+
+        self._interval = 1 / fps if fps else 0.0
+
+    def mark(self, win=None):
+        """Schedule a window to be drawn on the next frame.
+
+        Args:
+            win (window): (optional) a window that isn't managed by a panel,
+                          e.g. stdscr. Panel windows are drawn by
+                          update_panels, so they only need to request a frame.
+        """
+
+        if win is not None:
+            self._dirty[win] = None
+
+        if not self._pending:
+            self._pending = True
+            if self._callback is not None:
+                self._callback()
+
+    def set_callback(self, callback):
+        """Set a function called when a frame is first requested, e.g. to
+        schedule the frame on an event loop.
+
+        Args:
+            callback (callable): function taking no arguments, None to unset.
+        """
+
+        self._callback = callback
+
+    def defer(self, callback, *args):
+        """Call a function once, right before the next frame is drawn.
+
+        Calls deferred again before the frame replace the previous ones, so
+        many updates of a model (e.g. progress events) cost at most one
+        redraw per frame.
+
+        Args:
+            callback (callable): the function, e.g. a method redrawing a
+                                 widget.
+            args: arguments of the call, those of the latest call are used.
+        """
+
+        self._deferred[callback] = args
+        self.mark()
+
+    def request_layout(self, layout):
+        """Schedule a layout pass on the next frame.
+
+        Args:
+            layout (obj): a layout object with changed children.
+        """
+
+        self._layouts[layout] = None
+        self.mark()
+
+    def update_layouts(self):
+        """Run the pending layout passes.
+        """
+
+        while self._layouts:
+            layout = next(iter(self._layouts))
+            del self._layouts[layout]
+
+            layout._update_layout()
+
+    @property
+    def interval(self):
+        """Minimum number of seconds between two frames, 0 if no cap.
+        """
+
+        return self._interval
+
+    @property
+    def pending(self):
+        """True if a frame has been requested but not drawn yet.
+        """
+
+        return self._pending
+
+    def due(self):
+        """Get the time left before the next frame may be drawn.
+
+        Return:
+            return the number of seconds to wait, 0 if a frame can be drawn.
+        """
+
+        if not self._interval:
+            return 0.0
+
+        return max(0.0, self._last + self._interval - time.monotonic())
+
+    def render(self, force=False):
+        """Draw a frame if one is pending.
+
+        Args:
+            force (bool): (optional) ignore the frame rate cap.
+
+        Return:
+            return True if a frame was drawn, False otherwise.
+        """
+
+        if not self._pending or (not force and self.due()):
+            return False
+
+        timed = profiler.enabled
+        if timed:
+            start, painted = time.perf_counter(), profiler.painted
+
+        deferred, self._deferred = self._deferred, {}
+        for callback, args in deferred.items():
+            callback(*args)
+
+        self.update_layouts()
+
+        if timed:
+            laid_out = time.perf_counter()
+
+        for win in self._dirty:
+            win.noutrefresh()
+        self._dirty.clear()
+
+        if timed:
+            profiler.draw_overlay()
+
+        backend = get_backend()
+        backend.update_panels()
+        written = backend.doupdate()
+
+        if timed:
+            profiler.end_frame(start, painted, laid_out, written)
+
+        self._pending = False
+        self._last = time.monotonic()
+
+        if self._deferred:
+            # deferred while drawing, e.g. by a deferred call
+            self.mark()
+
+        return True
+
+    def reset(self):
+        """Drop all pending work, e.g. when curses is re-initialized.
+        """
+
+        self._dirty.clear()
+        self._layouts.clear()
+        self._deferred.clear()
+        self._pending = False
+        self._last = 0.0
+
+
+# shared by every TGUI object and view of an application
+renderer = Renderer()
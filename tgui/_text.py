@@ -0,0 +1,210 @@
+"""Text layout module. Measures, wraps and aligns text in terminal cells.
+"""
+
+import unicodedata
+from collections import OrderedDict
+
+
+def char_width(ch):
+    """Get the number of terminal cells taken by a character.
+
+    Return:
+        return 2 for wide (e.g. CJK) characters, 0 for combining and control
+        characters, 1 otherwise. Ambiguous characters, such as box-drawing
+        and block elements, take a single cell.
+    """
+
+    if ch < '\u0300':
+        # fast path for latin text
+        return 1 if ' ' <= ch != '\x7f' else 0
+
+    if unicodedata.combining(ch) or \
+            unicodedata.category(ch) in ('Mn', 'Me', 'Cf', 'Cc'):
+        return 0
+
+    return 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+
+
+class TextLayout:
+    """Memoized text measurement and wrapping.
+
+    Results are cached in insertion order, keyed by their arguments, so
+    redrawing an unchanged label costs a dict lookup. Once maxsize entries
+    are cached, the least recently used one is dropped.
+    """
+
+    def __init__(self, maxsize=1024):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            maxsize (int): (optional) maximum number of cached entries.
+        """
+
+        self.maxsize = maxsize
+        self.hits, self.misses = 0, 0
+
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _cached(self, key, func, *args):
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+        self.misses += 1
+        value = self._cache[key] = func(*args)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+        return value
+
+    def width(self, text):
+        """Get the number of cells taken by a single line of text.
+        """
+
+        if text.isascii() and text.isprintable():
+            return len(text)
+
+        return self._cached(('width', text), self._width, text)
+
+    def _width(self, text):
+        return sum(map(char_width, text))
+
+    def clip(self, text, width):
+        """Cut a single line of text to at most width cells.
+        """
+
+        if text.isascii() and text.isprintable():
+            return text[:width]
+
+        return self._cached(('clip', text, width), self._clip, text, width)
+
+    def _clip(self, text, width):
+        used = 0
+        for i, ch in enumerate(text):
+            used += char_width(ch)
+            if used > width:
+                return text[:i]
+
+        return text
+
+    def _split(self, line, width):
+        """Break a single line at word boundaries, and words longer than
+        width anywhere.
+        """
+
+        lines, current, used = [], '', 0
+        for word in line.split(' '):
+            size = self.width(word)
+            if current and used + 1 + size <= width:
+                current, used = current + ' ' + word, used + 1 + size
+                continue
+
+            if current:
+                lines += [current]
+                current, used = '', 0
+
+            while size > width:
+                head = self._clip(word, width) or word[0]
+                lines += [head]
+                word = word[len(head):]
+                size = self.width(word)
+
+            current, used = word, size
+
+        return lines + [current]
+
+    def wrap(self, text, width):
+        """Split text into lines of at most width cells, on newlines and at
+        word boundaries.
+
+        Return:
+            return a tuple of lines.
+        """
+
+        return self._cached(('wrap', text, width), self._wrap, text, width)
+
+    def _wrap(self, text, width):
+        width = max(width, 1)
+        lines = []
+        for line in text.split('\n'):
+            lines += self._split(line, width)
+
+        return tuple(lines)
+
+    def align(self, line, width, align='left'):
+        """Pad a single line of text to width cells.
+
+        Args:
+            line (str): the line of text.
+            width (int): width of the area, in cells.
+            align (str): (optional) 'left', 'center' or 'right'.
+
+        Return:
+            return the padded line, clipped to width.
+        """
+
+        line = self.clip(line, width)
+        space = width - self.width(line)
+        if align == 'center':
+            left = space // 2
+        elif align == 'right':
+            left = space
+        else:
+            left = 0
+
+        return ' ' * left + line + ' ' * (space - left)
+
+    def layout(self, text, width, align='left', multiline=True):
+        """Wrap and align text to fill width cells.
+
+        Args:
+            text (str): the text to lay out.
+            width (int): width of the area, in cells.
+            align (str): (optional) 'left', 'center' or 'right'.
+            multiline (bool): (optional) False to keep text on a single line,
+                              clipped to width.
+
+        Return:
+            return a tuple of lines, each width cells wide.
+        """
+
+        key = ('layout', text, width, align, multiline)
+
+        return self._cached(key, self._layout, text, width, align, multiline)
+
+    def _layout(self, text, width, align, multiline):
+        if multiline:
+            lines = self.wrap(text, width)
+        else:
+            lines = (text.split('\n', 1)[0],)
+
+        return tuple(self.align(line, width, align) for line in lines)
+
+    def size(self, text, multiline=True):
+        """Get the size of text laid out without a width limit.
+
+        Return:
+            return a tuple containing the number of lines and the width of
+            the widest line.
+        """
+
+        if not multiline:
+            return 1, self.width(text.split('\n', 1)[0])
+
+        lines = text.split('\n')
+
+        return len(lines), max(map(self.width, lines))
+
+    def clear(self):
+        self._cache.clear()
+        self.hits, self.misses = 0, 0
+
+
+# shared by every widget of an application
+text_layout = TextLayout()
@@ -2,20 +2,55 @@
 """
 
 import curses
+import types
+
+from ._colors import color_pairs
+from ._input import Keymap, compile_keymaps, decode_keys
+from ._profile import profiler
+from ._render import renderer
+from ._timers import scheduler
+from .backends import get_backend
 
 
 class TGUI:
     """Base class for Terminal GUI.
     """
 
+    # the screen is shared by every TGUI object (layouts) of an application
+    _stdscr = None
+
+    # ordered set of the layouts derived from the screen, see resize
+    _roots = {}
+
     def __init__(self):
         """Initialize self. See help(type(self)) for accurate signature.
         """
 
         self._unblock = False
-        self._stdscr = None
 
-        self._color_pairs = {}
+        # state of the asyncio run loop, see run_async
+        self._loop = None
+        self._quit = None
+        self._frame = None
+        self._tasks = set()
+
+        # color pairs are allocated lazily, see ColorPairs.get
+        self._color_pairs = color_pairs
+
+        # windows are drawn in batches, one terminal flush per frame
+        self._renderer = renderer
+
+        # timers and animations run on the loop of run_async
+        self._scheduler = scheduler
+
+        # frames are measured once profiling is enabled, see set_profiling
+        self._profiler = profiler
+
+        # keys are routed to the focused widget, then to its layouts, then
+        # to this keymap, see dispatch_keys
+        self.keymap = Keymap()
+        self._focus = None
+        self._keys = None   # (generation, focus) and the table compiled
 
     def __app__(self, arg):
         """Callback method for a wrapper function (curses') called by
@@ -26,40 +61,354 @@ class TGUI:
             arg: first and only parameter to be used by the wrapper function.
         """
 
-        self._stdscr = arg
+        TGUI._stdscr = arg
+        TGUI._roots.clear()
 
         # set screen properties
-        curses.curs_set(0)
+        get_backend().curs_set(0)
 
-        # initilize color pairs
-        self._color_pairs = self._set_color_pairs()
+        # pairs from a previous curses session are no longer valid
+        self._color_pairs.reset()
+        self._renderer.reset()
+        self._profiler.set_screen(arg)
 
         # other curses inits goes here...
 
-    def _set_color_pairs(self):
-        pair_no = 0
-        colors = {}
+    def set_fps(self, fps):
+        """Set or reset the maximum number of frames drawn per second.
 
-        for i in range(curses.COLORS):
-            for j in range(curses.COLORS):
-                pair_no += 1
-                curses.init_pair(pair_no, i, j)
-                color_no = curses.color_pair(pair_no)
+        Args:
+            fps (int): frames per second, None to draw frames as requested.
+        """
+
+        self._renderer.set_fps(fps)
+
+    def set_profiling(self, enabled=True, overlay=False, log=None):
+        """Enable or disable the measures of the frames, see Profiler.
 
-                color = (i, j)  # color = (fg, bg)
-                colors.update([(color, color_no)])
+        Must be enabled before any window is created, e.g. before run, for
+        the curses calls of every window to be counted.
 
-        return colors
+        Args:
+            enabled (bool): (optional) False to stop measuring.
+            overlay (bool): (optional) True to show the measures of the last
+                            frame at the top right of the screen.
+            log (obj): (optional) path of a file, or a text file object, to
+                       append the measures of each frame to, as JSON lines.
+
+        Return:
+            return the Profiler object, e.g. to get the frames measured.
+        """
+
+        if enabled:
+            self._profiler.enable(overlay, log)
+        else:
+            self._profiler.disable()
+
+        return self._profiler
+
+    def render(self, force=False):
+        """Draw all pending changes to the terminal in a single frame.
+
+        Args:
+            force (bool): (optional) draw even if the frame rate cap says it's
+                          too early.
+
+        Return:
+            return True if a frame was drawn, False otherwise.
+        """
+
+        return self._renderer.render(force)
 
     def run(self):
         """Run the terminal GUI application.
         """
 
-        curses.wrapper(self.__app__)
+        backend = get_backend()
+
+        backend.wrapper(self.__app__)
         if not self._unblock:
-            curses.cbreak()
+            backend.cbreak()
+
+            self.render(force=True)
+            while self._stdscr.getch() == curses.KEY_RESIZE:
+                self.resize()
+                self.render(force=True)
+
+            backend.nocbreak()
+            backend.endwin()
+
+    def run_async(self):
+        """Run the terminal GUI application on an asyncio event loop.
+
+        Input, render frames, and tasks started with create_task (e.g.
+        network requests) all run concurrently on the same loop, until quit
+        is called.
+        """
+
+        get_backend().wrapper(self._run_async)
+
+    def _run_async(self, arg):
+        # imported on first use, asyncio alone takes longer to import than
+        # the rest of tgui
+        import asyncio
+
+        self.__app__(arg)
+
+        asyncio.run(self._main_loop())
+
+    async def _main_loop(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        backend = get_backend()
+
+        self._loop = loop
+        self._quit = loop.create_future()
+
+        self._stdscr.nodelay(True)
+        self._stdscr.keypad(True)
+
+        self._renderer.set_callback(self._schedule_frame)
+        self._scheduler.start(loop, self._stop_on_error)
+        backend.add_reader(loop, self._read_keys)
+        try:
+            self._schedule_frame()
+            self.create_task(self.main())
+
+            await self._quit
+        finally:
+            backend.remove_reader(loop)
+            self._scheduler.stop()
+            self._renderer.render(force=True)
+            self._renderer.set_callback(None)
+            if self._frame is not None:
+                self._frame.cancel()
+                self._frame = None
+
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            self._loop = None
+
+    def _schedule_frame(self):
+        """Draw the pending frame as soon as the frame rate cap allows.
+        """
+
+        if self._frame is None and self._loop is not None:
+            self._frame = self._loop.call_later(self._renderer.due(),
+                                                self._draw_frame)
+
+    def _draw_frame(self):
+        self._frame = None
+        if not self._renderer.render() and self._renderer.pending:
+            self._schedule_frame()
+
+    def _read_keys(self):
+        """Read every pending key and dispatch them at once, so that a burst
+        of keys (e.g. pasted text, or a held arrow key) is drawn by a single
+        frame.
+        """
+
+        codes = []
+        while True:
+            key = self._stdscr.getch()
+            if key == -1:
+                break
+
+            codes += [key]
+
+        if codes:
+            self.dispatch_keys(decode_keys(codes))
+
+    @property
+    def focus(self):
+        """The widget keys are routed to first, None if there is none.
+        """
+
+        return self._focus
+
+    def set_focus(self, widget):
+        """Route the keys to a widget first, see dispatch_keys.
+
+        Args:
+            widget (obj): a widget or layout with a keymap, None to route the
+                          keys to this keymap only.
+        """
 
-            self._stdscr.getch()
+        self._focus = widget
+
+    def _key_table(self):
+        """Get the keymaps of the focused widget, its layouts and this
+        object merged into one table, compiled again only when the focus or
+        a keymap changed.
+        """
+
+        key = (self.keymap.generation, self._focus)
+        if self._keys is None or self._keys[0] != key:
+            chain = []
+            node = self._focus
+            while node is not None:
+                keymap = getattr(node, 'keymap', None)
+                if keymap is not None and node is not self:
+                    chain += [(keymap, node)]
+                node = node._parent
+            chain += [(self.keymap, self)]
+
+            self._keys = (key, compile_keymaps(chain))
+
+        return self._keys[1]
+
+    def dispatch_keys(self, events):
+        """Route key events to the actions bound to them.
+
+        Each key goes to the first keymap binding it, from the focused widget
+        up to this object. A run of the same key bound with repeat calls its
+        action once, e.g. a held arrow key scrolls by the whole run, and a
+        run of KEY_RESIZE resizes once. Keys that aren't bound, or whose
+        action returned False, are given to on_key, in order.
+
+        Args:
+            events (list): KeyEvent objects, see decode_keys.
+        """
+
+        table = self._key_table()
+        unhandled = []
+
+        i = 0
+        while i < len(events):
+            name = events[i].name
+            entry = table.get(name)
+
+            count = 1
+            if name == 'resize' or (entry is not None and entry[0].repeat):
+                while i + count < len(events) and \
+                        events[i + count].name == name:
+                    count += 1
+
+            if name == 'resize':
+                self.resize()
+            elif entry is None:
+                unhandled += events[i:i + count]
+            else:
+                binding, target = entry
+                result = binding(target, count)
+                if isinstance(result, types.CoroutineType):
+                    self.create_task(result)
+                elif result is False:
+                    unhandled += events[i:i + count]
+
+            i += count
+
+        if unhandled:
+            self.create_task(self._on_keys(unhandled))
+
+    async def _on_keys(self, events):
+        for event in events:
+            await self.on_key(event.name if event.code is None else event.code)
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+
+        if task.cancelled() or task.exception() is None:
+            return
+
+        self._stop_on_error(task.exception())
+
+    def _stop_on_error(self, error):
+        # let the error propagate out of run_async
+        if self._quit is not None and not self._quit.done():
+            self._quit.set_exception(error)
+
+    def create_task(self, coro):
+        """Run a coroutine alongside input and rendering.
+
+        The task is cancelled when the application quits, and an error
+        raised by it stops the application.
+
+        Return:
+            return the asyncio.Task object.
+        """
+
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+        return task
+
+    def resize(self):
+        """Lay out the screen again after the terminal was resized, on
+        KEY_RESIZE.
+
+        Layouts are re-arranged on the next frame, and only those whose size
+        or position changed move and resize their windows, in place. Windows
+        that aren't managed by a layout are updated by on_resize.
+        """
+
+        get_backend().update_lines_cols()
+
+        for layout in self._roots:
+            self._renderer.request_layout(layout)
+        self._renderer.mark(self._stdscr)
+
+        self.on_resize()
+
+    def on_resize(self):
+        """Called after the terminal was resized, see resize. Does nothing by
+        default, override it to move or resize windows created without a
+        layout.
+        """
+
+    def call_later(self, delay, callback, *args):
+        """Call a function once after a delay, see Scheduler.call_later.
+
+        Return:
+            return the Timer object, cancel it to stop the timer.
+        """
+
+        return self._scheduler.call_later(delay, callback, *args)
+
+    def call_every(self, interval, callback, *args):
+        """Call a function repeatedly, e.g. to animate a spinner, see
+        Scheduler.call_every.
+
+        Return:
+            return the Timer object, cancel it to stop the timer.
+        """
+
+        return self._scheduler.call_every(interval, callback, *args)
+
+    def tween(self, setter, start, end, duration, **kwargs):
+        """Animate a value once per frame, see Scheduler.tween.
+
+        Return:
+            return the Tween object, cancel it to stop the animation.
+        """
+
+        return self._scheduler.tween(setter, start, end, duration, **kwargs)
+
+    def quit(self):
+        """Stop the loop started by run_async.
+        """
+
+        if self._quit is not None and not self._quit.done():
+            self._quit.set_result(None)
+
+    async def main(self):
+        """Coroutine started with the loop of run_async. Does nothing by
+        default, override it to start background work.
+        """
+
+    async def on_key(self, key):
+        """Handle a key pressed while running with run_async, that no keymap
+        handled. Quits on any key by default, like run.
+
+        Args:
+            key (obj): the key code, as returned by getch, or the name of a
+                       key decoded from several codes, e.g. 'C-up', 'M-x' or
+                       a UTF-8 character.
+        """
 
-            curses.nocbreak()
-            curses.endwin()
+        self.quit()
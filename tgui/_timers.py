@@ -0,0 +1,264 @@
+"""Timer and animation scheduler module.
+"""
+
+from ._render import renderer
+
+
+def linear(t):
+    return t
+
+
+def ease_in_out(t):
+    """Cubic easing, slow at both ends.
+    """
+
+    if t < 0.5:
+        return 4 * t * t * t
+
+    return 1 - (-2 * t + 2) ** 3 / 2
+
+
+class Timer:
+    """Handle of a callback scheduled with Scheduler.call_later or
+    Scheduler.call_every.
+    """
+
+    def __init__(self, scheduler, delay, interval, callback, args):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            scheduler (obj): the Scheduler running the timer.
+            delay (float): seconds before the first call.
+            interval (float): seconds between calls, None to call once.
+            callback (callable): the function to call.
+            args (tuple): arguments of the call.
+        """
+
+        self.interval = interval
+
+        self._scheduler = scheduler
+        self._delay = delay
+        self._callback = callback
+        self._args = args
+        self._when = None
+        self._handle = None
+        self._cancelled = False
+
+    def cancelled(self):
+        return self._cancelled
+
+    def _start(self, loop):
+        self._when = loop.time() + self._delay
+        self._handle = loop.call_at(self._when, self._run)
+
+    def _stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _run(self):
+        self._handle = None
+        loop = self._scheduler._loop
+
+        if self.interval is None:
+            self._scheduler._timers.pop(self, None)
+        else:
+            # keep a steady rate, skipping the calls missed while the loop
+            # was busy instead of running them in a burst
+            now = loop.time()
+            self._when += self.interval
+            if self._when <= now:
+                missed = (now - self._when) // self.interval + 1
+                self._when += missed * self.interval
+            self._handle = loop.call_at(self._when, self._run)
+
+        try:
+            self._call()
+        except Exception as error:
+            self.cancel()
+            self._scheduler._error(error)
+
+    def _call(self):
+        self._callback(*self._args)
+
+    def cancel(self):
+        """Stop the timer. Does nothing if it already ran or was cancelled.
+        """
+
+        self._cancelled = True
+        self._stop()
+        self._scheduler._timers.pop(self, None)
+
+
+class Tween(Timer):
+    """Handle of an animation started with Scheduler.tween.
+
+    The value is updated once per frame interval, and set with
+    Renderer.defer so that it's drawn at most once per frame.
+    """
+
+    def __init__(self, scheduler, setter, start, end, duration, easing,
+                 on_done):
+        """Initialize self. See help(type(self)) for accurate signature.
+        """
+
+        super().__init__(scheduler, 0.0, scheduler.frame_interval(), setter,
+                         ())
+
+        self.start = start
+        self.end = end
+        self.duration = duration
+
+        self._easing = easing
+        self._on_done = on_done
+        self._began = None
+
+    def _start(self, loop):
+        self._began = loop.time()
+
+        super()._start(loop)
+
+    def value(self, t):
+        """Get the value at a point of the animation.
+
+        Args:
+            t (float): progress of the animation, from 0 to 1.
+        """
+
+        return self.start + (self.end - self.start) * self._easing(t)
+
+    def _call(self):
+        elapsed = self._scheduler._loop.time() - self._began
+        t = min(1.0, elapsed / self.duration) if self.duration > 0 else 1.0
+
+        renderer.defer(self._callback, self.value(t))
+
+        if t >= 1.0:
+            self.cancel()
+            if self._on_done is not None:
+                self._on_done()
+
+
+class Scheduler:
+    """Timers and animations run on the loop of TGUI.run_async.
+
+    Timers created before the loop runs start with it, and every timer is
+    stopped when the loop stops. Callbacks should only change widgets and
+    models; drawing is left to the next frame, so updates made by many
+    timers at once are drawn together.
+    """
+
+    def __init__(self):
+        """Initialize self. See help(type(self)) for accurate signature.
+        """
+
+        self._loop = None
+        self._timers = {}       # ordered set of the running timers
+        self._on_error = None
+
+    def __len__(self):
+        return len(self._timers)
+
+    def _add(self, timer):
+        self._timers[timer] = None
+        if self._loop is not None:
+            timer._start(self._loop)
+
+        return timer
+
+    def _error(self, error):
+        if self._on_error is None:
+            raise error
+
+        self._on_error(error)
+
+    def start(self, loop, on_error=None):
+        """Start the timers on an event loop.
+
+        Args:
+            loop (obj): the running asyncio loop.
+            on_error (callable): (optional) function called with the error
+                                 raised by a callback. The timer of the
+                                 callback is cancelled.
+        """
+
+        self._loop = loop
+        self._on_error = on_error
+
+        for timer in self._timers:
+            timer._start(loop)
+
+    def stop(self):
+        """Stop and forget every timer.
+        """
+
+        for timer in self._timers:
+            timer._stop()
+
+        self._timers.clear()
+        self._loop = None
+        self._on_error = None
+
+    def frame_interval(self):
+        """Get the interval of animations: the frame rate cap, or 60 frames
+        per second if frames aren't capped.
+        """
+
+        return renderer.interval or 1 / 60
+
+    def call_later(self, delay, callback, *args):
+        """Call a function once after a delay.
+
+        Args:
+            delay (float): seconds to wait.
+            callback (callable): the function to call.
+            args: arguments of the call.
+
+        Return:
+            return the Timer object.
+        """
+
+        return self._add(Timer(self, delay, None, callback, args))
+
+    def call_every(self, interval, callback, *args):
+        """Call a function repeatedly, until the timer is cancelled.
+
+        Args:
+            interval (float): seconds between calls, the first call included.
+            callback (callable): the function to call.
+            args: arguments of the call.
+
+        Return:
+            return the Timer object.
+        """
+
+        if interval <= 0:
+            raise ValueError('interval must be > 0')
+
+        return self._add(Timer(self, interval, interval, callback, args))
+
+    def tween(self, setter, start, end, duration, easing=linear,
+              on_done=None):
+        """Animate a value, e.g. a property of a widget.
+
+        Args:
+            setter (callable): function called with the current value, at
+                               most once per frame.
+            start (float): value at the start of the animation.
+            end (float): value at the end of the animation, set exactly.
+            duration (float): length of the animation in seconds.
+            easing (callable): (optional) function mapping the progress from
+                               0 to 1 to the progress of the value.
+            on_done (callable): (optional) function called once the end value
+                                is set.
+
+        Return:
+            return the Tween object, cancel it to stop the animation.
+        """
+
+        return self._add(Tween(self, setter, start, end, duration, easing,
+                               on_done))
+
+
+# shared by every TGUI object and view of an application
+scheduler = Scheduler()
@@ -0,0 +1,3 @@
+from ._backend import *
+from ._curses import *
+from ._virtual import *
@@ -0,0 +1,43 @@
+"""Backend selection module.
+"""
+
+from ._curses import CursesBackend
+
+
+_backend = None
+
+
+def get_backend():
+    """Get the backend used to create windows and draw frames.
+
+    Return:
+        return the active backend, a CursesBackend unless set otherwise.
+    """
+
+    global _backend
+
+    if _backend is None:
+        _backend = CursesBackend()
+
+    return _backend
+
+
+def set_backend(backend):
+    """Set the backend used to create windows and draw frames.
+
+    Must be called before any window is created, e.g. before TGUI.run.
+
+    Args:
+        backend (obj): a CursesBackend or VirtualBackend object, None to
+                       restore the default curses backend.
+
+    Return:
+        return the previous backend.
+    """
+
+    global _backend
+
+    previous = _backend
+    _backend = backend
+
+    return previous
@@ -0,0 +1,68 @@
+"""Curses backend module.
+"""
+
+import curses
+import curses.panel
+import sys
+
+
+class CursesBackend:
+    """Backend drawing to a real terminal through curses.
+
+    Exposes the subset of the curses and curses.panel API used by tgui, so
+    that it can be swapped for a VirtualBackend.
+    """
+
+    def wrapper(self, func, *args, **kwds):
+        return curses.wrapper(func, *args, **kwds)
+
+    def newwin(self, *args):
+        return curses.newwin(*args)
+
+    def new_panel(self, win):
+        return curses.panel.new_panel(win)
+
+    def update_panels(self):
+        curses.panel.update_panels()
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def init_pair(self, pair_number, fg, bg):
+        curses.init_pair(pair_number, fg, bg)
+
+    def color_pair(self, pair_number):
+        return curses.color_pair(pair_number)
+
+    def colors(self):
+        return curses.COLORS
+
+    def color_pairs(self):
+        return curses.COLOR_PAIRS
+
+    def curs_set(self, visibility):
+        return curses.curs_set(visibility)
+
+    def cbreak(self):
+        curses.cbreak()
+
+    def nocbreak(self):
+        curses.nocbreak()
+
+    def endwin(self):
+        curses.endwin()
+
+    def update_lines_cols(self):
+        """Update curses.LINES and curses.COLS after the terminal was resized.
+        """
+
+        curses.update_lines_cols()
+
+    def add_reader(self, loop, callback):
+        """Call callback on an asyncio event loop whenever input is pending.
+        """
+
+        loop.add_reader(sys.stdin.fileno(), callback)
+
+    def remove_reader(self, loop):
+        loop.remove_reader(sys.stdin.fileno())
@@ -0,0 +1,612 @@
+"""Headless virtual screen backend module.
+"""
+
+import curses
+from collections import deque
+
+from .._text import char_width
+
+
+_SGR = ((curses.A_BOLD, '1'), (curses.A_DIM, '2'), (curses.A_UNDERLINE, '4'),
+        (curses.A_BLINK, '5'), (curses.A_REVERSE, '7'))
+
+
+class VirtualWindow:
+    """In-memory window implementing the subset of curses.window used by tgui.
+
+    Derived windows share the cells of their parent, the same way curses
+    subwindows share memory with the window they were derived from.
+    """
+
+    def __init__(self, backend, nlines, ncols, begin_y, begin_x, parent=None,
+                 par_y=-1, par_x=-1):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            backend (obj): the VirtualBackend owning the window.
+            nlines (int): height of the window.
+            ncols (int): width of the window.
+            begin_y (int): vertical position of the window on the screen.
+            begin_x (int): horizontal position of the window on the screen.
+            parent (obj): (optional) window the new window is derived from.
+            par_y (int): (optional) vertical offset within the parent.
+            par_x (int): (optional) horizontal offset within the parent.
+        """
+
+        self._backend = backend
+        self._nlines, self._ncols = nlines, ncols
+        self._begy, self._begx = begin_y, begin_x
+        self._parent = parent
+        self._pary, self._parx = par_y, par_x
+
+        if parent is None:
+            self._cells = [[(' ', 0)] * ncols for _ in range(nlines)]
+            self._oy, self._ox = 0, 0
+        else:
+            self._cells = parent._cells
+            self._oy, self._ox = parent._oy + par_y, parent._ox + par_x
+
+        self._cy, self._cx = 0, 0
+        self._attrs = 0
+        self._bkgd = (' ', 0)
+
+        self._nodelay = False
+        self._keypad = False
+
+    def _check(self, y, x):
+        if not (0 <= y < self._nlines and 0 <= x < self._ncols):
+            raise curses.error('position outside window')
+
+    def _attr(self, attr):
+        """Merge an attribute with the background of the window.
+        """
+
+        attr = self._attrs if attr is None else attr
+        bkgd = self._bkgd[1]
+        if attr & curses.A_COLOR:
+            bkgd &= ~curses.A_COLOR
+
+        return attr | bkgd
+
+    def _fill(self, y, x, nlines, ncols, cell):
+        for row in self._cells[self._oy + y:self._oy + y + nlines]:
+            row[self._ox + x:self._ox + x + ncols] = [cell] * ncols
+
+    def getmaxyx(self):
+        return self._nlines, self._ncols
+
+    def getbegyx(self):
+        return self._begy, self._begx
+
+    def getparyx(self):
+        return self._pary, self._parx
+
+    def getyx(self):
+        return self._cy, self._cx
+
+    def move(self, y, x):
+        self._check(y, x)
+        self._cy, self._cx = y, x
+
+    def derwin(self, *args):
+        """Create a window sharing the cells of this one.
+
+        Args:
+            args: (nlines, ncols, begin_y, begin_x) or (begin_y, begin_x),
+                  relative to this window. 0 lines or columns extend the new
+                  window to the edge of this one.
+        """
+
+        if len(args) == 2:
+            nlines, ncols, y, x = 0, 0, *args
+        else:
+            nlines, ncols, y, x = args
+
+        nlines = nlines or self._nlines - y
+        ncols = ncols or self._ncols - x
+        if (y < 0 or x < 0 or nlines <= 0 or ncols <= 0 or
+                y + nlines > self._nlines or x + ncols > self._ncols):
+            raise curses.error('derwin() returned NULL')
+
+        return VirtualWindow(self._backend, nlines, ncols, self._begy + y,
+                             self._begx + x, self, y, x)
+
+    def mvderwin(self, y, x):
+        """Move a derived window inside its parent. As with curses, the
+        position of the window on the screen doesn't change.
+        """
+
+        parent = self._parent
+        if (parent is None or y < 0 or x < 0 or
+                y + self._nlines > parent._nlines or
+                x + self._ncols > parent._ncols):
+            raise curses.error('mvderwin() returned ERR')
+
+        self._pary, self._parx = y, x
+        self._oy, self._ox = parent._oy + y, parent._ox + x
+
+    def mvwin(self, y, x):
+        self._begy, self._begx = y, x
+
+    def resize(self, nlines, ncols):
+        if nlines <= 0 or ncols <= 0:
+            raise curses.error('resize() returned ERR')
+
+        if self._parent is None:
+            # resize the cells in place, derived windows keep a reference
+            blank = self._bkgd
+            rows = self._cells
+            for row in rows:
+                if ncols > len(row):
+                    row.extend([blank] * (ncols - len(row)))
+                else:
+                    del row[ncols:]
+            if nlines > len(rows):
+                rows.extend([[blank] * ncols for _ in range(nlines - len(rows))])
+            else:
+                del rows[nlines:]
+        elif (self._oy + nlines > len(self._cells) or
+              self._ox + ncols > len(self._cells[0])):
+            raise curses.error('resize() returned ERR')
+
+        self._nlines, self._ncols = nlines, ncols
+        self._cy = min(self._cy, nlines - 1)
+        self._cx = min(self._cx, ncols - 1)
+
+    def addstr(self, *args):
+        """Write a string at the cursor or at a given position.
+
+        Args:
+            args: ([y, x,] text[, attr]), as with curses.window.addstr.
+        """
+
+        if len(args) >= 3:
+            y, x, text, *attr = args
+            self.move(y, x)
+        else:
+            text, *attr = args
+
+        attr = self._attr(attr[0] if attr else None)
+        y, x = self._cy, self._cx
+        nlines, ncols = self._nlines, self._ncols
+
+        for ch in text:
+            width = char_width(ch)
+            if ch == '\n':
+                self._fill(y, x, 1, ncols - x, self._bkgd)
+                y, x = y + 1, 0
+            elif not width:
+                # combining characters go with the previous cell
+                row = self._cells[self._oy + y]
+                if x and row[self._ox + x - 1][0]:
+                    prev, prev_attr = row[self._ox + x - 1]
+                    row[self._ox + x - 1] = (prev + ch, prev_attr)
+            else:
+                if width > ncols - x:
+                    # wide characters don't straddle lines
+                    self._fill(y, x, 1, ncols - x, self._bkgd)
+                    y, x = y + 1, 0
+                    if y == nlines:
+                        self._cy, self._cx = nlines - 1, ncols - 1
+                        raise curses.error('addstr() returned ERR')
+
+                row = self._cells[self._oy + y]
+                row[self._ox + x] = (ch, attr)
+                if width == 2:
+                    # the second cell of a wide character is left empty
+                    row[self._ox + x + 1] = ('', attr)
+                x += width
+                if x == ncols:
+                    y, x = y + 1, 0
+
+            if y == nlines:
+                # no scrolling, the cursor can't move past the last cell
+                self._cy, self._cx = nlines - 1, ncols - 1
+                raise curses.error('addstr() returned ERR')
+
+        self._cy, self._cx = y, x
+
+    def addch(self, *args):
+        if len(args) >= 3:
+            y, x, ch, *attr = args
+        else:
+            (ch, *attr), (y, x) = args, (self._cy, self._cx)
+
+        ch = chr(ch) if isinstance(ch, int) else ch
+        self.addstr(y, x, ch, *attr)
+
+    def instr(self, y, x, n=None):
+        self._check(y, x)
+        row = self._cells[self._oy + y]
+        end = self._ncols if n is None else min(self._ncols, x + n)
+
+        return ''.join(ch for ch, _ in row[self._ox + x:self._ox + end])
+
+    def attron(self, attr):
+        self._attrs |= attr
+
+    def attroff(self, attr):
+        self._attrs &= ~attr
+
+    def attrset(self, attr):
+        self._attrs = attr
+
+    def bkgd(self, ch, attr=0):
+        """Set the background of the window and apply it to every cell.
+        """
+
+        ch = chr(ch) if isinstance(ch, int) else ch
+        old_ch, old_attr = self._bkgd
+        self._bkgd = (ch, attr)
+
+        for row in self._cells[self._oy:self._oy + self._nlines]:
+            for i in range(self._ox, self._ox + self._ncols):
+                c, a = row[i]
+                c = ch if c == old_ch else c
+                a &= ~old_attr
+                if a & curses.A_COLOR:
+                    a |= attr & ~curses.A_COLOR
+                else:
+                    a |= attr
+                row[i] = (c, a)
+
+    def bkgdset(self, ch, attr=0):
+        """Set the background of the window without changing any cell.
+
+        Args:
+            ch (obj): a character, or a character and attributes as returned
+                      by getbkgd.
+            attr (int): (optional) attributes of the background.
+        """
+
+        if isinstance(ch, int):
+            attr |= ch & ~curses.A_CHARTEXT
+            ch = chr(ch & curses.A_CHARTEXT)
+
+        self._bkgd = (ch, attr)
+
+    def getbkgd(self):
+        ch, attr = self._bkgd
+
+        return ord(ch) | attr
+
+    def erase(self):
+        self._fill(0, 0, self._nlines, self._ncols, self._bkgd)
+        self._cy, self._cx = 0, 0
+
+    def clear(self):
+        self.erase()
+        self._backend._clear = True
+
+    def clrtoeol(self):
+        self._fill(self._cy, self._cx, 1, self._ncols - self._cx, self._bkgd)
+
+    def noutrefresh(self):
+        self._backend._copy(self)
+
+    def refresh(self):
+        self.noutrefresh()
+        self._backend.doupdate()
+
+    def touchwin(self):
+        pass
+
+    def keypad(self, flag):
+        self._keypad = flag
+
+    def nodelay(self, flag):
+        self._nodelay = flag
+
+    def getch(self, *args):
+        """Get the next queued key, see VirtualBackend.push_keys.
+
+        Return:
+            return the key code, -1 if no key is queued.
+        """
+
+        if args:
+            self.move(*args)
+
+        return self._backend._read_key()
+
+
+class VirtualPanel:
+    """In-memory panel implementing the subset of curses.panel used by tgui.
+    """
+
+    def __init__(self, backend, win):
+        """Initialize self. See help(type(self)) for accurate signature.
+        """
+
+        self._backend = backend
+        self._win = win
+
+    def window(self):
+        return self._win
+
+    def replace(self, win):
+        self._win = win
+
+    def hidden(self):
+        return self not in self._backend._panels
+
+    def show(self):
+        self.top()
+
+    def hide(self):
+        self._backend._panels.pop(self, None)
+
+    def top(self):
+        self.hide()
+        self._backend._panels[self] = None
+
+    def bottom(self):
+        panels = self._backend._panels
+        self.hide()
+
+        stack = [self, *panels]
+        panels.clear()
+        panels.update(dict.fromkeys(stack))
+
+    def move(self, y, x):
+        self._win.mvwin(y, x)
+
+
+class VirtualBackend:
+    """Headless backend drawing to an in-memory cell grid.
+
+    Windows and panels are composed into a virtual screen the same way curses
+    does it. Each doupdate compares the virtual screen with the last frame and
+    emits only the cells that changed, as ANSI escape sequences written to an
+    optional binary stream. Pointing the stream at a terminal makes it usable
+    as a renderer; leaving it out allows running and snapshot-testing tgui
+    without a tty.
+    """
+
+    def __init__(self, lines=24, cols=80, stream=None, colors=256,
+                 color_pairs=256):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            lines (int): (optional) height of the screen.
+            cols (int): (optional) width of the screen.
+            stream (obj): (optional) binary file object for the output.
+            colors (int): (optional) number of colors to report.
+            color_pairs (int): (optional) number of color pairs to report.
+        """
+
+        self.lines, self.cols = lines, cols
+        self._stream = stream
+        self._colors = colors
+        self._color_pairs = color_pairs
+
+        self._stdscr = None
+        self._panels = {}   # ordered set of visible panels, bottom to top
+        self._pairs = {0: (-1, -1)}
+        self._keys = deque()
+        self._reader = None     # (loop, callback) waiting for queued keys
+        self._cursor = 1
+        self._clear = True
+
+        self._virtual = self._blank()
+        self._physical = self._blank()
+
+        self.frames = 0
+        self.bytes_written = 0
+        self.changes = []   # (y, x, ch, attr) cells drawn by the last frame
+
+    def _blank(self):
+        return [[(' ', 0)] * self.cols for _ in range(self.lines)]
+
+    def _copy(self, win):
+        """Copy a window to the virtual screen, clipped to the screen size.
+        """
+
+        y0, x0 = win._begy, win._begx
+        top, left = max(0, -y0), max(0, -x0)
+        bottom = min(win._nlines, self.lines - y0)
+        right = min(win._ncols, self.cols - x0)
+        if top >= bottom or left >= right:
+            return
+
+        for y in range(top, bottom):
+            src = win._cells[win._oy + y]
+            self._virtual[y0 + y][x0 + left:x0 + right] = \
+                src[win._ox + left:win._ox + right]
+
+    def _read_key(self):
+        return self._keys.popleft() if self._keys else -1
+
+    def _sgr(self, attr):
+        params = ['0']
+        for flag, code in _SGR:
+            if attr & flag:
+                params += [code]
+
+        fg, bg = self._pairs.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+        if fg >= 0:
+            params += [f'38;5;{fg}']
+        if bg >= 0:
+            params += [f'48;5;{bg}']
+
+        return '\x1b[' + ';'.join(params) + 'm'
+
+    def initscr(self):
+        """Reset the screen and create stdscr.
+
+        Return:
+            return the stdscr window.
+        """
+
+        self._panels = {}
+        self._pairs = {0: (-1, -1)}
+        self._virtual = self._blank()
+        self._physical = self._blank()
+        self._clear = True
+        self._stdscr = VirtualWindow(self, self.lines, self.cols, 0, 0)
+
+        return self._stdscr
+
+    def wrapper(self, func, *args, **kwds):
+        return func(self.initscr(), *args, **kwds)
+
+    def newwin(self, *args):
+        if len(args) == 2:
+            nlines, ncols, y, x = 0, 0, *args
+        else:
+            nlines, ncols, y, x = args
+
+        nlines = nlines or self.lines - y
+        ncols = ncols or self.cols - x
+
+        return VirtualWindow(self, nlines, ncols, y, x)
+
+    def new_panel(self, win):
+        pan = VirtualPanel(self, win)
+        self._panels[pan] = None
+
+        return pan
+
+    def update_panels(self):
+        if self._stdscr is not None:
+            self._copy(self._stdscr)
+
+        for pan in self._panels:
+            self._copy(pan.window())
+
+    def doupdate(self):
+        """Draw the cells that changed since the last frame.
+
+        Return:
+            return the number of bytes emitted.
+        """
+
+        out = []
+        if self._clear:
+            out += ['\x1b[0m\x1b[H\x1b[2J']
+            self._physical = self._blank()
+            self._clear = False
+
+        changes = []
+        pos, cur_attr = None, None
+        for y, (vrow, prow) in enumerate(zip(self._virtual, self._physical)):
+            if vrow == prow:
+                continue
+
+            for x, cell in enumerate(vrow):
+                if cell == prow[x]:
+                    continue
+
+                ch, attr = cell
+                changes += [(y, x, ch, attr)]
+                if pos != (y, x):
+                    out += [f'\x1b[{y + 1};{x + 1}H']
+                if attr != cur_attr:
+                    out += [self._sgr(attr)]
+                    cur_attr = attr
+                out += [ch]
+                pos = (y, x + 1)
+
+            self._physical[y] = vrow[:]
+
+        data = ''.join(out).encode()
+        if data and self._stream is not None:
+            self._stream.write(data)
+            self._stream.flush()
+
+        self.frames += 1
+        self.bytes_written += len(data)
+        self.changes = changes
+
+        return len(data)
+
+    def init_pair(self, pair_number, fg, bg):
+        if not 0 < pair_number < self._color_pairs:
+            raise curses.error('init_pair() returned ERR')
+
+        self._pairs[pair_number] = (fg, bg)
+
+    def color_pair(self, pair_number):
+        return pair_number << 8
+
+    def colors(self):
+        return self._colors
+
+    def color_pairs(self):
+        return self._color_pairs
+
+    def curs_set(self, visibility):
+        previous, self._cursor = self._cursor, visibility
+
+        return previous
+
+    def cbreak(self):
+        pass
+
+    def nocbreak(self):
+        pass
+
+    def endwin(self):
+        pass
+
+    def update_lines_cols(self):
+        pass
+
+    def resize(self, lines, cols):
+        """Resize the screen, as if the terminal was resized.
+
+        stdscr is resized, the next frame redraws the whole screen, and
+        KEY_RESIZE is queued, as done by curses.
+
+        Args:
+            lines (int): new height of the screen.
+            cols (int): new width of the screen.
+        """
+
+        self.lines, self.cols = lines, cols
+
+        if self._stdscr is not None:
+            self._stdscr.resize(lines, cols)
+            self._virtual = self._blank()
+            self._physical = self._blank()
+            self._clear = True
+
+        self.push_keys(curses.KEY_RESIZE)
+
+    def push_keys(self, *keys):
+        """Queue keys to be returned by getch.
+
+        Args:
+            keys: key codes, or strings queued as their UTF-8 bytes, as
+                  curses returns them.
+        """
+
+        for key in keys:
+            if isinstance(key, str):
+                self._keys.extend(key.encode())
+            else:
+                self._keys.append(key)
+
+        if self._reader is not None and self._keys:
+            loop, callback = self._reader
+            loop.call_soon_threadsafe(callback)
+
+    def add_reader(self, loop, callback):
+        """Call callback on an asyncio event loop whenever keys are queued.
+        """
+
+        self._reader = (loop, callback)
+        if self._keys:
+            loop.call_soon(callback)
+
+    def remove_reader(self, loop):
+        self._reader = None
+
+    def snapshot(self):
+        """Get the text currently on the screen.
+
+        Return:
+            return a list of strings, one per line of the last frame.
+        """
+
+        return [''.join(ch for ch, _ in row) for row in self._physical]
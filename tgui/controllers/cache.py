@@ -0,0 +1,150 @@
+"""Host cache module. Keeps the discovered hosts between runs.
+"""
+
+import os
+import sqlite3
+import time
+
+from .registry import Host
+
+
+# seconds a host is kept since it last answered
+DEFAULT_TTL = 7 * 24 * 3600
+
+# maximum number of hosts kept, the most recently seen first
+DEFAULT_SIZE = 1024
+
+
+def default_path():
+    """Get the path of the cache file, in the user cache directory.
+    """
+
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+
+    return os.path.join(root, 'tgui', 'hosts.sqlite3')
+
+
+class HostCache:
+    """Hosts discovered by the previous runs, in a sqlite file.
+
+    Hosts put in the cache are only written by flush, in one transaction,
+    so that a scan finding many hosts doesn't commit for each of them.
+    Hosts that weren't seen for ttl seconds are evicted, and only the
+    max_size most recently seen are kept.
+
+    The cache is a hint: if the file can't be opened or written, it just
+    behaves as an empty cache.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_size=DEFAULT_SIZE):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            path (str): (optional) path of the sqlite file, ':memory:' for a
+                        cache that isn't saved. Defaults to default_path().
+            ttl (float): (optional) seconds a host is kept since it last
+                         answered.
+            max_size (int): (optional) maximum number of hosts kept.
+        """
+
+        self.path = default_path() if path is None else path
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._db = None
+        self._pending = {}      # hosts to write, by address
+
+    def _connect(self):
+        if self._db is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+            db = sqlite3.connect(self.path)
+            db.execute('CREATE TABLE IF NOT EXISTS hosts ('
+                       'addr TEXT PRIMARY KEY, name TEXT, port INTEGER, '
+                       'last_seen REAL, rtt REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS hosts_last_seen '
+                       'ON hosts (last_seen)')
+            self._db = db
+
+        return self._db
+
+    def load(self):
+        """Get the hosts of the cache, once the expired ones are evicted.
+
+        Return:
+            return a list of Host records, the fastest to answer first.
+        """
+
+        try:
+            db = self._connect()
+            with db:
+                self._evict(db)
+            rows = db.execute('SELECT name, addr, port, last_seen, rtt '
+                              'FROM hosts ORDER BY rtt IS NULL, rtt, '
+                              'last_seen DESC').fetchall()
+        except (sqlite3.Error, OSError):
+            return []
+
+        hosts = []
+        for name, addr, port, last_seen, rtt in rows:
+            hosts += [Host(name, addr, port, last_seen=last_seen, rtt=rtt)]
+
+        return hosts
+
+    def put(self, host):
+        """Remember a host that answered, until the next flush.
+        """
+
+        self._pending[host.addr] = (host.addr, host.name, host.port,
+                                    host.last_seen, host.rtt)
+
+    def flush(self):
+        """Write the hosts put since the last flush, and evict the expired
+        ones and the oldest past max_size.
+        """
+
+        rows = list(self._pending.values())
+        self._pending.clear()
+
+        try:
+            db = self._connect()
+            with db:
+                # a host that moved to another address replaces its old one
+                db.executemany('DELETE FROM hosts WHERE name = ? AND '
+                               'addr != ?',
+                               [(name, addr) for addr, name, *_ in rows
+                                if name is not None])
+                db.executemany('INSERT OR REPLACE INTO hosts VALUES '
+                               '(?, ?, ?, ?, ?)', rows)
+                self._evict(db)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _evict(self, db):
+        db.execute('DELETE FROM hosts WHERE last_seen < ?',
+                   (time.time() - self.ttl,))
+        db.execute('DELETE FROM hosts WHERE addr NOT IN (SELECT addr FROM '
+                   'hosts ORDER BY last_seen DESC LIMIT ?)', (self.max_size,))
+
+    def clear(self):
+        """Forget all the hosts.
+        """
+
+        self._pending.clear()
+        try:
+            with self._connect() as db:
+                db.execute('DELETE FROM hosts')
+        except (sqlite3.Error, OSError):
+            pass
+
+    def close(self):
+        """Flush the cache and close the file.
+        """
+
+        if self._pending:
+            self.flush()
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
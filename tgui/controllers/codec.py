@@ -0,0 +1,254 @@
+"""Codec module. Encodes the headers of MagNet messages as JSON, or in a
+compact binary form negotiated during the HEAD handshake.
+
+A binary header starts with a prefix (MAGIC, VERSION, number of fields),
+followed by a table with the key and the length of each field, and by the
+text of all the values, as UTF-8. The key holds the id of the field and the
+type of its value. Field ids are fixed, see FIELDS, so the names of the
+usual fields are never sent; other fields have id 0 and are preceded by
+their name.
+
+The whole table is packed and unpacked by a single struct call, and the
+text encoded and decoded at once, which keeps the per-field work in Python
+to a few operations.
+
+MAGIC can't start a JSON document, so decode tells both forms apart and a
+peer always understands the headers it's sent, whatever was negotiated.
+"""
+
+import json
+import struct
+
+
+JSON = 'json'
+BINARY = 'magnet-bin/1'
+
+# codecs supported, most preferred first, as sent in the accept-codec field
+CODECS = (BINARY, JSON)
+ACCEPT = ', '.join(CODECS)
+
+MAGIC = 0xb1
+VERSION = 1
+
+# MAGIC, VERSION and the number of entries of the table
+PREFIX = struct.Struct('!BBB')
+
+# maximum length of a value, in characters
+MAX_LENGTH = 0xffff
+
+# ids of the fields, by position. Ids are never reused or reordered, new
+# fields are appended, up to 31.
+FIELDS = (None, 'method', 'route', 'host', 'hostname', 'user-agent',
+          'accept-ranges', 'content', 'content-length', 'content-type',
+          'date', 'status', 'port', 'codec', 'accept-codec', 'range',
+          'content-range', 'digest', 'nonce')
+
+# types of the values, in the low 3 bits of the key. The text of a value is
+# the string itself, an int in decimal, a status as 'code reason', JSON for
+# anything else, and nothing for None and bools. A _NAME entry holds the
+# name of the field that follows it.
+_NONE, _FALSE, _TRUE, _INT, _STR, _STATUS, _JSON, _NAME = range(8)
+
+_IDS = {name: i for i, name in enumerate(FIELDS) if name}
+
+_tables = {}
+
+
+def _table(count):
+    """Get the struct of a prefix and a table with count entries.
+    """
+
+    table = _tables.get(count)
+    if table is None:
+        table = _tables[count] = struct.Struct('!BBB' + 'BH' * count)
+
+    return table
+
+
+def _text(value):
+    """Get the type and the text of a value.
+    """
+
+    kind = type(value)
+    if kind is str:
+        return _STR, value
+    if value is None:
+        return _NONE, ''
+    if kind is bool:
+        return (_TRUE if value else _FALSE), ''
+    if kind is int:
+        return _INT, str(value)
+    if (kind in (tuple, list) and len(value) == 2 and
+            type(value[0]) is int and type(value[1]) is str):
+        # a status, e.g. (200, 'OK')
+        return _STATUS, f'{value[0]} {value[1]}'
+
+    return _JSON, json.dumps(value)
+
+
+def encode_binary(header):
+    """Encode a header in the binary form.
+
+    Args:
+        header (dict): the header, by field name.
+
+    Return:
+        return the encoded header, as bytes. Raise ValueError if it has too
+        many fields, or a value longer than MAX_LENGTH.
+    """
+
+    table, texts = [], []
+    for name, value in header.items():
+        field = _IDS.get(name, 0)
+        if not field:
+            name = str(name)
+            table += (_NAME, len(name))
+            texts.append(name)
+
+        # the usual values inlined, see _text
+        if type(value) is str:
+            kind, text = _STR, value
+        elif value is None:
+            kind, text = _NONE, ''
+        else:
+            kind, text = _text(value)
+
+        table += (field << 3 | kind, len(text))
+        texts.append(text)
+
+    count = len(texts)
+    try:
+        prefix = _table(count).pack(MAGIC, VERSION, count, *table)
+    except struct.error:
+        raise ValueError('header too large for the binary codec') from None
+
+    return prefix + ''.join(texts).encode()
+
+
+def decode_binary(data):
+    """Decode a header encoded by encode_binary.
+
+    Args:
+        data (bytes): the encoded header.
+
+    Return:
+        return the header, as a dict. A status is decoded as a tuple. Raise
+        ValueError if the header is malformed or of another version.
+    """
+
+    try:
+        magic, version, count = PREFIX.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'unsupported header {magic:#x}/{version}')
+
+        table = _table(count)
+        entries = iter(table.unpack_from(data))
+    except struct.error:
+        raise ValueError('truncated header') from None
+
+    # skip the prefix
+    next(entries), next(entries), next(entries)
+    text = data[table.size:].decode()
+
+    header = {}
+    pos, name = 0, None
+    for key, length in zip(entries, entries):
+        value = text[pos:pos + length]
+        pos += length
+
+        kind = key & 7
+        if kind == _INT:
+            value = int(value)
+        elif kind == _NONE:
+            value = None
+        elif kind == _STATUS:
+            code, _, reason = value.partition(' ')
+            value = (int(code), reason)
+        elif kind == _JSON:
+            value = json.loads(value)
+        elif kind == _NAME:
+            name = value
+            continue
+        elif kind != _STR:
+            value = kind == _TRUE
+
+        field = key >> 3
+        if field:
+            try:
+                name = FIELDS[field]
+            except IndexError:
+                raise ValueError(f'unknown field {field}') from None
+        elif name is None:
+            raise ValueError('field without a name')
+
+        header[name] = value
+        name = None
+
+    if pos != len(text):
+        raise ValueError('truncated header')
+
+    return header
+
+
+def encode(header, codec=JSON):
+    """Encode a header with a codec.
+
+    Args:
+        header (dict): the header, by field name.
+        codec (str): (optional) JSON or BINARY. A header the binary codec
+                     can't hold is encoded as JSON.
+
+    Return:
+        return the encoded header, as bytes.
+    """
+
+    if codec == BINARY:
+        try:
+            return encode_binary(header)
+        except ValueError:
+            pass
+
+    return json.dumps(header).encode()
+
+
+def decode(data):
+    """Decode a header encoded by either codec.
+
+    Args:
+        data (bytes): the encoded header.
+
+    Return:
+        return the header, as a dict. Raise ValueError if it's malformed.
+    """
+
+    if not data:
+        raise ValueError('empty header')
+
+    if data[0] == MAGIC:
+        return decode_binary(data)
+
+    header = json.loads(data)
+    if not isinstance(header, dict):
+        raise ValueError('header is not an object')
+
+    return header
+
+
+def negotiate(accept):
+    """Choose the codec to answer with, from an accept-codec field.
+
+    Args:
+        accept (str): the codecs accepted by the peer, most preferred first
+                      and separated by commas. None for a peer that only
+                      speaks JSON.
+
+    Return:
+        return the first codec of accept that's supported, or JSON.
+    """
+
+    for codec in (accept or '').split(','):
+        codec = codec.strip()
+        if codec in CODECS:
+            return codec
+
+    return JSON
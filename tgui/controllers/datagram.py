@@ -0,0 +1,201 @@
+"""Datagram module. Discovery of the hosts with a single UDP multicast or
+broadcast probe, instead of a TCP connection to every address.
+
+A probe is a DISCOVER request header, in JSON since the codec of the peers
+isn't known yet, with a random nonce. Each peer answers with the metadata
+it sends to a HEAD request (status, hostname, port, codec) and the nonce,
+in the codec it chose. See Responder for the peer side.
+"""
+
+import asyncio
+import os
+import socket
+import time
+
+from . import codec
+
+
+TCP = 'tcp'
+MULTICAST = 'multicast'
+BROADCAST = 'broadcast'
+
+# discovery modes, see Protocol.discovery
+MODES = (TCP, MULTICAST, BROADCAST)
+
+# administratively scoped group, never routed past the site
+MULTICAST_GROUP = '239.255.20.24'
+BROADCAST_ADDR = '255.255.255.255'
+DISCOVERY_PORT = 2024
+
+MAX_DATAGRAM_SIZE = 64 * 1024
+
+
+def new_nonce():
+    return os.urandom(8).hex()
+
+
+def probe_socket(mode, interface=None, ttl=1):
+    """Create a non-blocking UDP socket sending probes.
+
+    Args:
+        mode (str): MULTICAST or BROADCAST.
+        interface (str): (optional) the ipv4 address of the interface the
+                         multicast probes go out of, e.g. '127.0.0.1'.
+                         Defaults to the one of the default route.
+        ttl (int): (optional) hops a multicast probe may cross.
+
+    Return:
+        return the socket, bound to an ephemeral port.
+    """
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        if mode == BROADCAST:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        else:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            if interface:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                socket.inet_aton(interface))
+
+        sock.bind(('', 0))
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+
+    return sock
+
+
+def responder_socket(port=DISCOVERY_PORT, group=MULTICAST_GROUP,
+                     interface='0.0.0.0'):
+    """Create a non-blocking UDP socket receiving probes, joined to the
+    multicast group. Several may share the port, e.g. on loopback.
+
+    Return:
+        return the socket.
+    """
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        sock.bind(('', port))
+        if group:
+            membership = socket.inet_aton(group) + socket.inet_aton(interface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                            membership)
+
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+
+    return sock
+
+
+class Prober(asyncio.DatagramProtocol):
+    """Collects the answers to the probes of one discovery.
+    """
+
+    def __init__(self, nonce):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            nonce (str): the nonce of the probes, answers to others are
+                         dropped.
+        """
+
+        self.nonce = nonce
+        self.sent = None        # time of the first probe
+        self.answers = asyncio.Queue()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, header, addr):
+        if self.sent is None:
+            self.sent = time.perf_counter()
+
+        self.transport.sendto(codec.encode(header), addr)
+
+    def datagram_received(self, data, addr):
+        try:
+            header = codec.decode(data)
+        except ValueError:
+            return
+
+        if header.get('nonce') != self.nonce:
+            return
+
+        rtt = time.perf_counter() - (self.sent or time.perf_counter())
+        self.answers.put_nowait((header, addr[0], rtt))
+
+    def error_received(self, exc):
+        # e.g. no route for the group, the discovery just finds nothing
+        pass
+
+
+class Responder(asyncio.DatagramProtocol):
+    """Answers the DISCOVER probes, on the peer side.
+    """
+
+    def __init__(self, hostname, port):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            hostname (str): the human friendly name of the peer.
+            port (int): the TCP port the peer serves requests on.
+        """
+
+        self.hostname = hostname
+        self.port = port
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            request = codec.decode(data)
+        except ValueError:
+            return
+
+        if request.get('method') != 'DISCOVER':
+            return
+
+        answer = codec.negotiate(request.get('accept-codec'))
+        response = {'status': (200, 'OK'), 'hostname': self.hostname,
+                    'port': self.port, 'codec': answer,
+                    'nonce': request.get('nonce')}
+
+        self.transport.sendto(codec.encode(response, answer), addr)
+
+
+async def respond(hostname, port, discovery_port=DISCOVERY_PORT,
+                  group=MULTICAST_GROUP, interface='0.0.0.0'):
+    """Answer the probes of the clients discovering hosts.
+
+    Args:
+        hostname (str): the human friendly name of the peer.
+        port (int): the TCP port the peer serves requests on.
+        discovery_port (int): (optional) the UDP port probes are sent to.
+        group (str): (optional) the multicast group joined, None to only
+                     answer broadcast probes.
+        interface (str): (optional) the ipv4 address of the interface the
+                         group is joined on.
+
+    Return:
+        return the DatagramTransport, to close to stop answering.
+    """
+
+    loop = asyncio.get_running_loop()
+    sock = responder_socket(discovery_port, group, interface)
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: Responder(hostname, port), sock=sock)
+
+    return transport
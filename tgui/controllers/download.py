@@ -0,0 +1,447 @@
+"""Download module. Destination files of resumable downloads.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import time
+from collections import deque
+
+
+# the journal of a download is kept next to its file until it's complete
+JOURNAL_SUFFIX = '.journal'
+
+# bytes written between two saves of the journal
+JOURNAL_INTERVAL = 4 * 1024 * 1024
+
+# size of the segments of a download fetched from several hosts
+SEGMENT_SIZE = 2 * 1024 * 1024
+
+
+def parse_content_range(value):
+    """Parse a content-range field, e.g. 'bytes 0-1023/4096'.
+
+    Return:
+        return a tuple containing the start and end (excluded) of the range,
+        and the total size, None if unknown ('*'). Raise ValueError if the
+        field is malformed.
+    """
+
+    unit, _, spec = (value or '').partition(' ')
+    span, _, total = spec.partition('/')
+    start, _, last = span.partition('-')
+    if unit != 'bytes' or not total:
+        raise ValueError(f'invalid content-range {value!r}')
+
+    start, end = int(start), int(last) + 1
+    total = None if total == '*' else int(total)
+    if start < 0 or end <= start or (total is not None and end > total):
+        raise ValueError(f'invalid content-range {value!r}')
+
+    return start, end, total
+
+
+def range_spec(start, end=None):
+    """Format a range field, the reverse of parse_content_range.
+
+    Args:
+        start (int): first byte of the range.
+        end (int): (optional) end of the range, excluded. None for the rest
+                   of the file.
+
+    Return:
+        return the range field, e.g. 'bytes=0-1023'.
+    """
+
+    return f'bytes={start}-' + ('' if end is None else str(end - 1))
+
+
+def parse_digest(value):
+    """Parse a digest field, e.g. 'sha256=<hex digest>'.
+
+    Return:
+        return a tuple containing a new hashlib object of the algorithm and
+        the expected hex digest. return None if there's no digest, or if the
+        algorithm isn't supported.
+    """
+
+    name, _, expected = (value or '').partition('=')
+    if not expected or name.lower() not in hashlib.algorithms_available:
+        return None
+
+    return hashlib.new(name.lower()), expected.lower()
+
+
+class Download:
+    """Destination of a download: a file preallocated to the size of the
+    content and memory-mapped, and the journal of the ranges written to it.
+
+    Chunks are copied into the map at their offset as they arrive, so the
+    body is never held in memory, and ranges may be written in any order.
+    The journal is saved every JOURNAL_INTERVAL bytes, after the map is
+    flushed, so that it never lists bytes that aren't on disk. A download
+    created again with the path of an interrupted one only fetches the
+    missing ranges.
+    """
+
+    def __init__(self, path, route=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            path (str): path of the destination file.
+            route (str): (optional) location of the content on the host. A
+                         journal left by a download of another route is
+                         discarded.
+        """
+
+        self.path = path
+        self.route = route
+
+        self.size = None        # size of the content, None until known
+        self.ranges = []        # [start, end) written, sorted and disjoint
+
+        self._fd = None
+        self._map = None
+        self._unsaved = 0
+
+        self._load()
+
+    @property
+    def journal_path(self):
+        return self.path + JOURNAL_SUFFIX
+
+    def _load(self):
+        try:
+            with open(self.journal_path) as file:
+                journal = json.load(file)
+
+            if journal.get('route') != self.route:
+                return
+
+            size = journal['size']
+            ranges = [(int(start), int(end))
+                      for start, end in journal['ranges']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+        # the file may have been removed or truncated since
+        try:
+            if size is None or os.path.getsize(self.path) != size:
+                return
+        except OSError:
+            return
+
+        self.size = size
+        for start, end in ranges:
+            self.add(start, end)
+
+    @property
+    def done(self):
+        """Number of bytes written.
+        """
+
+        return sum(end - start for start, end in self.ranges)
+
+    def complete(self):
+        """True once every byte of the content is written.
+        """
+
+        if self.size is None:
+            return False
+
+        return self.size == 0 or self.ranges == [(0, self.size)]
+
+    def missing(self):
+        """Get the ranges left to download.
+
+        Return:
+            return a list of (start, end) tuples, end excluded. The end of the
+            only range is None while the size is unknown.
+        """
+
+        if self.size is None:
+            return [(0, None)]
+
+        missing, pos = [], 0
+        for start, end in self.ranges:
+            if start > pos:
+                missing += [(pos, start)]
+            pos = end
+
+        if pos < self.size:
+            missing += [(pos, self.size)]
+
+        return missing
+
+    def add(self, start, end):
+        """Record a range as written, merging it with its neighbours.
+        """
+
+        if end <= start:
+            return
+
+        ranges = self.ranges
+        i = bisect.bisect_left(ranges, (start, start))
+
+        # merge with the previous range if it reaches start
+        if i and ranges[i - 1][1] >= start:
+            i -= 1
+            start = ranges[i][0]
+            end = max(end, ranges[i][1])
+
+        # and with the next ones up to end
+        j = i
+        while j < len(ranges) and ranges[j][0] <= end:
+            end = max(end, ranges[j][1])
+            j += 1
+
+        ranges[i:j] = [(start, end)]
+
+    def open(self, size):
+        """Preallocate and map the file, once the size of the content is
+        known.
+
+        Args:
+            size (int): size of the content. The ranges of the journal are
+                        dropped if it changed.
+        """
+
+        if self._fd is not None and size == self.size:
+            return
+
+        if size != self.size:
+            self.ranges = []
+        self.close()
+
+        self.size = size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+
+        # reserve the blocks up front, where the file system supports it
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, size)
+            except OSError:
+                pass
+
+        if size:
+            self._map = mmap.mmap(self._fd, size)
+
+    def write(self, offset, data, commit=True):
+        """Copy a chunk of the content into the file.
+
+        Args:
+            offset (int): position of the chunk in the content.
+            data (bytes): the chunk. Raise ValueError if it overflows the
+                          size of the content.
+            commit (bool): (optional) False to leave the chunk out of the
+                           journal until it's verified, see commit.
+        """
+
+        end = offset + len(data)
+        if end > (self.size or 0):
+            raise ValueError('chunk past the end of the content')
+
+        self._map[offset:end] = data
+        if commit:
+            self.commit(offset, end)
+
+    def commit(self, start, end):
+        """Record a range written to the file in the journal.
+        """
+
+        self.add(start, end)
+
+        self._unsaved += end - start
+        if self._unsaved >= JOURNAL_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Flush the file, then write the journal atomically.
+        """
+
+        if self._map is not None:
+            self._map.flush()
+        self._unsaved = 0
+
+        if self.complete():
+            self._remove_journal()
+
+            return
+
+        journal = {'route': self.route, 'size': self.size,
+                   'ranges': self.ranges}
+
+        tmp = self.journal_path + '.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(journal, file)
+        os.replace(tmp, self.journal_path)
+
+    def _remove_journal(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Save the journal and release the file.
+        """
+
+        if self._fd is None:
+            return
+
+        self.save()
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        os.close(self._fd)
+        self._fd = None
+
+
+class Segment:
+    """Range of a download, fetched by one host or, near the end, by two.
+    """
+
+    __slots__ = ('start', 'end', 'hosts', 'done')
+
+    def __init__(self, start, end):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            start (int): first byte of the segment.
+            end (int): end of the segment, excluded.
+        """
+
+        self.start = start
+        self.end = end
+        self.hosts = {}         # start time of each fetch, by host
+        self.done = False
+
+    def __repr__(self):
+        return f'Segment({self.start!r}, {self.end!r})'
+
+
+class Segments:
+    """Queue of the segments of a download shared by several hosts.
+
+    Each host takes the next segment once it's done with its last one, so
+    faster hosts fetch more of them. Once the queue is empty, a host left
+    idle fetches again the segment expected to finish last, usually held by
+    a slow host, and the first copy to be verified wins. The transfer rate
+    of each host is kept to make that guess.
+    """
+
+    def __init__(self, ranges, segment_size=SEGMENT_SIZE, copies=2):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            ranges (list): the (start, end) ranges left to download, see
+                           Download.missing. The size must be known.
+            segment_size (int): (optional) maximum size of a segment.
+            copies (int): (optional) maximum number of hosts fetching the
+                          same segment at once.
+        """
+
+        self.segment_size = segment_size
+        self.copies = copies
+
+        self.queue = deque()
+        self.active = []        # segments being fetched
+        self.rates = {}         # bytes per second, by host
+
+        self.extend(ranges)
+
+    def extend(self, ranges):
+        """Split ranges into segments and queue them.
+        """
+
+        for start, end in ranges:
+            for pos in range(start, end, self.segment_size):
+                self.queue.append(
+                    Segment(pos, min(pos + self.segment_size, end)))
+
+    def __bool__(self):
+        return bool(self.queue or self.active)
+
+    def _eta(self, segment, now):
+        """Guess when a segment being fetched will be done.
+        """
+
+        best = None
+        for host, started in segment.hosts.items():
+            rate = self.rates.get(host)
+            if not rate:
+                # nothing known about the host yet, it may well be stuck
+                return float('inf')
+
+            eta = started + (segment.end - segment.start) / rate - now
+            best = eta if best is None else min(best, eta)
+
+        return best
+
+    def take(self, host):
+        """Get the next segment for a host to fetch.
+
+        Return:
+            return a tuple containing a Segment, and whether another host is
+            fetching it already. return (None, False) if there is nothing
+            to fetch for now.
+        """
+
+        now = time.monotonic()
+
+        if self.queue:
+            segment = self.queue.popleft()
+            segment.hosts[host] = now
+            self.active.append(segment)
+
+            return segment, False
+
+        candidates = [segment for segment in self.active
+                      if host not in segment.hosts and
+                      len(segment.hosts) < self.copies]
+        if not candidates:
+            return None, False
+
+        segment = max(candidates, key=lambda segment: self._eta(segment, now))
+        segment.hosts[host] = now
+
+        return segment, True
+
+    def finish(self, segment, host):
+        """Mark a segment as fetched by a host.
+
+        Return:
+            return True if the host was the first to fetch it, False if its
+            copy is to be dropped.
+        """
+
+        started = segment.hosts.pop(host, None)
+        if started is not None:
+            elapsed = max(time.monotonic() - started, 1e-6)
+            rate = (segment.end - segment.start) / elapsed
+            old = self.rates.get(host)
+            self.rates[host] = rate if old is None else (old + rate) / 2
+
+        if segment.done:
+            return False
+
+        segment.done = True
+        self.active.remove(segment)
+
+        return True
+
+    def fail(self, segment, host):
+        """Give back a segment a host failed to fetch. It's queued again,
+        first, unless another host is still fetching it.
+        """
+
+        segment.hosts.pop(host, None)
+        if not segment.done and not segment.hosts:
+            self.active.remove(segment)
+            self.queue.appendleft(segment)
@@ -0,0 +1,303 @@
+"""Metrics module. Latency histograms and status counters of the requests
+made to each host.
+"""
+
+import asyncio
+import bisect
+import os
+from itertools import accumulate
+
+
+# upper bounds of the latency buckets, in seconds. The last bucket, past
+# the last bound, is +Inf.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0)
+
+# operations measured: connecting, a HEAD request and a GET request up to
+# the response header, and reading the body of a GET response
+OPERATIONS = ('connect', 'head', 'get', 'body')
+
+# host of the connections that failed while scanning, which are not kept
+# per address since a scan may probe millions of them
+ANY = '*'
+
+# statuses of the requests that succeeded
+SUCCESS = (200, 206)
+
+# prefix of the names of the Prometheus metrics
+PREFIX = 'magnet'
+
+
+def error_status(error):
+    """Get the status of an operation that failed with an error, e.g. a
+    connection.
+
+    Return:
+        return (504, 'Gateway Timeout') for a timeout, (503, 'Bad Gateway')
+        otherwise.
+    """
+
+    # asyncio.TimeoutError is a TimeoutError, itself an OSError, since 3.11
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return 504, 'Gateway Timeout'
+
+    return 503, 'Bad Gateway'
+
+
+def _status_code(status):
+    try:
+        return int(status[0])
+    except (TypeError, ValueError, IndexError):
+        # no status at all, e.g. a malformed response
+        return 0
+
+
+def _bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _label(value):
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+    return value.replace('\n', '\\n')
+
+
+class Histogram:
+    """Fixed-bucket histogram of latencies.
+
+    Samples are counted in the bucket of the first bound they don't exceed,
+    so observing costs a bisect and three additions.
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=BUCKETS):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            buckets (tuple): (optional) upper bounds of the buckets, sorted.
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # by bucket, +Inf last
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Count a sample, in seconds.
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Get the number of samples up to each bound, as with Prometheus.
+
+        Return:
+            return a list of (bound, count) tuples, the last bound being
+            float('inf').
+        """
+
+        bounds = (*self.buckets, float('inf'))
+
+        return list(zip(bounds, accumulate(self.counts)))
+
+    def quantile(self, q):
+        """Estimate a quantile, e.g. 0.99, as the bound of its bucket.
+
+        Return:
+            return the bound in seconds, float('inf') if the quantile is
+            past the last bound, None if there is no sample.
+        """
+
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        for bound, count in self.cumulative():
+            if count >= rank:
+                return bound
+
+        return float('inf')
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class Series:
+    """Measures of one operation with one host.
+    """
+
+    __slots__ = ('latency', 'statuses')
+
+    def __init__(self, buckets=BUCKETS):
+        """Initialize self. See help(type(self)) for accurate signature.
+        """
+
+        self.latency = Histogram(buckets)
+        self.statuses = {}      # number of responses, by status code
+
+    @property
+    def errors(self):
+        """Number of operations that failed.
+        """
+
+        return sum(count for code, count in self.statuses.items()
+                   if code not in SUCCESS)
+
+
+class Metrics:
+    """Per-host latency histograms and status counters of the requests.
+
+    Each operation (see OPERATIONS) made with a host is counted by the
+    status it ended with, and timed unless it failed before any wait.
+    Hosts are keyed by 'addr:port', as in request headers.
+
+    The counters are plain ints updated from the event loop the requests run
+    on, so recording a sample takes no lock; snapshot copies them.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            buckets (tuple): (optional) upper bounds of the latency buckets,
+                             in seconds.
+        """
+
+        self.buckets = buckets
+        self._series = {}       # (host, operation) -> Series
+
+    def series(self, host, operation):
+        """Get the measures of an operation with a host, creating them if
+        needed.
+        """
+
+        key = (host, operation)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = Series(self.buckets)
+
+        return series
+
+    def observe(self, host, operation, seconds, status):
+        """Record an operation.
+
+        Args:
+            host (str): the host, as 'addr:port'.
+            operation (str): one of OPERATIONS.
+            seconds (float): time the operation took, None to only count its
+                             status.
+            status (tuple): the status it ended with, e.g. (200, 'OK').
+        """
+
+        series = self.series(host, operation)
+        if seconds is not None:
+            series.latency.observe(seconds)
+
+        code = _status_code(status)
+        series.statuses[code] = series.statuses.get(code, 0) + 1
+
+    def hosts(self):
+        """List of the hosts measured, in the order they were first seen.
+        """
+
+        return list(dict.fromkeys(host for host, _ in self._series))
+
+    def slowest(self, operation='head', count=10):
+        """Get the hosts with the highest mean latency for an operation.
+
+        Return:
+            return a list of (host, mean seconds) tuples, slowest first.
+        """
+
+        means = [(host, series.latency.mean)
+                 for (host, op), series in self._series.items()
+                 if op == operation and series.latency.count and host != ANY]
+        means.sort(key=lambda item: item[1], reverse=True)
+
+        return means[:count]
+
+    def snapshot(self):
+        """Get the measures of every host.
+
+        Return:
+            return a dict of dicts, by host then by operation, each with the
+            count, sum, mean and estimated p50 and p99 of the latencies in
+            seconds, the cumulative count of each bucket, the count of each
+            status code, and the number of errors.
+        """
+
+        snapshot = {}
+        for (host, operation), series in list(self._series.items()):
+            latency = series.latency
+            snapshot.setdefault(host, {})[operation] = {
+                'count': latency.count,
+                'sum': latency.sum,
+                'mean': latency.mean,
+                'p50': latency.quantile(0.5),
+                'p99': latency.quantile(0.99),
+                'buckets': {_bound(bound): count
+                            for bound, count in latency.cumulative()},
+                'statuses': dict(series.statuses),
+                'errors': series.errors,
+            }
+
+        return snapshot
+
+    def prometheus(self):
+        """Format the measures in the Prometheus text exposition format.
+
+        Return:
+            return the text, with a latency histogram and a counter of the
+            statuses labelled by host and operation.
+        """
+
+        histogram = f'{PREFIX}_request_duration_seconds'
+        counter = f'{PREFIX}_requests_total'
+
+        lines = [f'# HELP {histogram} Latency of the operations with each '
+                 f'host.',
+                 f'# TYPE {histogram} histogram']
+        items = list(self._series.items())
+
+        for (host, operation), series in items:
+            latency = series.latency
+            labels = f'host="{_label(host)}",operation="{_label(operation)}"'
+            for bound, count in latency.cumulative():
+                lines += [f'{histogram}_bucket{{{labels},le="{_bound(bound)}"}}'
+                          f' {count}']
+            lines += [f'{histogram}_sum{{{labels}}} {latency.sum!r}',
+                      f'{histogram}_count{{{labels}}} {latency.count}']
+
+        lines += [f'# HELP {counter} Operations with each host, by status '
+                  f'code.',
+                  f'# TYPE {counter} counter']
+
+        for (host, operation), series in items:
+            labels = f'host="{_label(host)}",operation="{_label(operation)}"'
+            for code, count in sorted(series.statuses.items()):
+                lines += [f'{counter}{{{labels},code="{code}"}} {count}']
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the measures to a file in the Prometheus text format,
+        atomically, e.g. for the textfile collector of node_exporter.
+
+        Args:
+            path (str): path of the file, e.g. 'magnet.prom'.
+        """
+
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as file:
+            file.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def reset(self):
+        """Forget all the measures.
+        """
+
+        self._series.clear()
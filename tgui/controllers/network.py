@@ -0,0 +1,144 @@
+"""Network module. Lazy ranges of the host addresses of a network.
+"""
+
+import ipaddress
+import socket
+
+
+def prefix_length(netmask):
+    """Get the prefix length of a netmask.
+
+    Args:
+        netmask (str): an IPv4 netmask, e.g. '255.255.240.0', or an IPv6 one,
+                       e.g. 'ffff:ffff:ffff:ffff::' or 'ffff:ffff::/32'.
+
+    Return:
+        return the number of bits set. Raise ValueError if the netmask is
+        malformed.
+    """
+
+    netmask, _, prefixlen = netmask.partition('/')
+    if prefixlen:
+        return int(prefixlen)
+
+    return bin(int(ipaddress.ip_address(netmask))).count('1')
+
+
+class HostRange:
+    """Host addresses of a network, generated on demand from integers.
+
+    Addresses are neither stored nor built as ipaddress objects: the range
+    holds the first and last address as ints, so a /8 or an IPv6 /64 costs
+    no more than a /24. As with ipaddress, the network and broadcast
+    addresses of an IPv4 network are left out, and the Subnet-Router
+    anycast address of an IPv6 one.
+
+    The range can be split into shards, each a HostRange with a stride, so
+    that workers probe disjoint addresses without sharing an iterator.
+    """
+
+    __slots__ = ('version', 'ints', 'scope')
+
+    def __init__(self, addr, prefixlen, scope=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            addr (str): any address of the network, with or without a
+                        %scope suffix.
+            prefixlen (int): the prefix length of the network.
+            scope (str): (optional) the interface an IPv6 link-local address
+                         is reached through, e.g. 'eth0'.
+        """
+
+        addr, _, suffix = str(addr).partition('%')
+        ip = ipaddress.ip_address(addr)
+
+        bits = ip.max_prefixlen
+        if not 0 <= prefixlen <= bits:
+            raise ValueError(f'invalid prefix length {prefixlen}')
+
+        size = 1 << (bits - prefixlen)
+        first = int(ip) & ~(size - 1)
+        stop = first + size
+
+        if ip.version == 4 and prefixlen < 31:
+            first, stop = first + 1, stop - 1
+        elif ip.version == 6 and prefixlen < 127:
+            first += 1
+
+        self.version = ip.version
+        self.ints = range(first, stop)
+        self.scope = (scope or suffix or None) if ip.version == 6 else None
+
+    @classmethod
+    def _from_ints(cls, version, ints, scope):
+        hosts = cls.__new__(cls)
+        hosts.version, hosts.ints, hosts.scope = version, ints, scope
+
+        return hosts
+
+    def __repr__(self):
+        ints = self.ints
+        if not ints:
+            return 'HostRange(<empty>)'
+
+        return (f'HostRange({self.format(ints[0])!r}..'
+                f'{self.format(ints[-1])!r}, step={ints.step})')
+
+    def format(self, n):
+        """Format an address given as an int.
+        """
+
+        if self.version == 4:
+            return f'{n >> 24}.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}'
+
+        addr = socket.inet_ntop(socket.AF_INET6, n.to_bytes(16, 'big'))
+
+        return f'{addr}%{self.scope}' if self.scope else addr
+
+    def __len__(self):
+        # raises OverflowError past sys.maxsize, e.g. for an IPv6 /64
+        return len(self.ints)
+
+    @property
+    def size(self):
+        """Number of addresses, even past sys.maxsize.
+        """
+
+        ints = self.ints
+
+        return max(0, (ints.stop - ints.start + ints.step - 1) // ints.step)
+
+    def __iter__(self):
+        format = self.format
+        for n in self.ints:
+            yield format(n)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._from_ints(self.version, self.ints[index],
+                                   self.scope)
+
+        return self.format(self.ints[index])
+
+    def __contains__(self, addr):
+        addr = str(addr).partition('%')[0]
+        try:
+            ip = ipaddress.ip_address(addr)
+        except ValueError:
+            return False
+
+        return ip.version == self.version and int(ip) in self.ints
+
+    def shard(self, index, count):
+        """Get every count-th address, starting from the index-th.
+
+        Args:
+            index (int): the shard, from 0 to count - 1.
+            count (int): the number of shards.
+
+        Return:
+            return the shard, as a HostRange.
+        """
+
+        return self[index::count]
@@ -0,0 +1,180 @@
+"""Connection pool module. Keeps connections to hosts alive for reuse.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from .metrics import error_status
+
+
+class _Entry:
+    """Connections of a single (addr, port).
+    """
+
+    __slots__ = ('idle', 'semaphore')
+
+    def __init__(self, max_size):
+        self.idle = deque()     # (reader, writer, last_used), warmest last
+        self.semaphore = asyncio.Semaphore(max_size)
+
+
+class ConnectionPool:
+    """Per-(addr, port) pool of keep-alive connections.
+
+    At most max_size connections per host are in use at once; acquiring more
+    waits for one to be released. Released connections are kept idle for
+    reuse until idle_timeout, and are checked before being handed out again,
+    so a connection closed by the host is replaced by a new one.
+
+    The idle connections of every host are pruned at most once per
+    idle_timeout as connections are acquired or added, so that the hosts
+    found by a scan don't each keep a socket open. An application idle for
+    longer should call prune from a timer, and close once it's done.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=30.0, connect_timeout=1.0,
+                 metrics=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            max_size (int): (optional) maximum connections in use per host.
+            idle_timeout (float): (optional) seconds an idle connection is
+                                  kept open.
+            connect_timeout (float): (optional) seconds to wait for a new
+                                     connection.
+            metrics (obj): (optional) Metrics object the new connections are
+                           timed in, as 'connect' operations.
+        """
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.metrics = metrics
+
+        self._entries = {}
+        self._pruned = time.monotonic()
+
+    def _entry(self, addr, port):
+        key = (addr, port)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(self.max_size)
+
+        return entry
+
+    def _healthy(self, reader, writer, last_used, now):
+        return (not writer.is_closing() and not reader.at_eof() and
+                now - last_used < self.idle_timeout)
+
+    async def acquire(self, addr, port, fresh=False):
+        """Get a connection to a host, reusing an idle one if possible.
+
+        Args:
+            addr (str): ip address of the host.
+            port (int): port on which the host is binded to.
+            fresh (bool): (optional) True to make a new connection even if
+                          one is idle, e.g. after a reused one was dead.
+
+        Return:
+            return a tuple containing a StreamReader, a StreamWriter, and
+            whether the connection was reused. Raise OSError or
+            asyncio.TimeoutError if a new connection can't be made.
+        """
+
+        entry = self._entry(addr, port)
+        await entry.semaphore.acquire()
+
+        now = time.monotonic()
+        self._maybe_prune(now)
+        while entry.idle and not fresh:
+            reader, writer, last_used = entry.idle.pop()
+            if self._healthy(reader, writer, last_used, now):
+                return reader, writer, True
+
+            writer.close()
+
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(addr, port), self.connect_timeout)
+        except BaseException as error:
+            entry.semaphore.release()
+            if self.metrics is not None and \
+                    isinstance(error, (OSError, asyncio.TimeoutError)):
+                self.metrics.observe(f'{addr}:{port}', 'connect',
+                                     time.perf_counter() - start,
+                                     error_status(error))
+            raise
+
+        if self.metrics is not None:
+            self.metrics.observe(f'{addr}:{port}', 'connect',
+                                 time.perf_counter() - start, (200, 'OK'))
+
+        return reader, writer, False
+
+    def release(self, addr, port, reader, writer, reuse=True):
+        """Give back a connection obtained from acquire.
+
+        Args:
+            addr (str): ip address of the host.
+            port (int): port on which the host is binded to.
+            reader (obj): the StreamReader of the connection.
+            writer (obj): the StreamWriter of the connection.
+            reuse (bool): (optional) False to close the connection, e.g. if
+                          it's left in an unknown state by a failed request.
+        """
+
+        entry = self._entry(addr, port)
+        entry.semaphore.release()
+
+        self.put(addr, port, reader, writer, reuse)
+
+    def put(self, addr, port, reader, writer, reuse=True):
+        """Add an open connection to the idle connections of a host.
+
+        Args:
+            addr (str): ip address of the host.
+            port (int): port on which the host is binded to.
+            reader (obj): the StreamReader of the connection.
+            writer (obj): the StreamWriter of the connection.
+            reuse (bool): (optional) False to close the connection instead.
+        """
+
+        entry = self._entry(addr, port)
+        now = time.monotonic()
+        self._maybe_prune(now)
+
+        if (reuse and len(entry.idle) < self.max_size and
+                self._healthy(reader, writer, now, now)):
+            entry.idle.append((reader, writer, now))
+        else:
+            writer.close()
+
+    def _maybe_prune(self, now):
+        if now - self._pruned >= self.idle_timeout:
+            self.prune()
+
+    def prune(self):
+        """Close idle connections that timed out or were closed by the host.
+        """
+
+        now = time.monotonic()
+        self._pruned = now
+        for entry in self._entries.values():
+            idle = entry.idle
+            for _ in range(len(idle)):
+                reader, writer, last_used = idle.popleft()
+                if self._healthy(reader, writer, last_used, now):
+                    idle.append((reader, writer, last_used))
+                else:
+                    writer.close()
+
+    def close(self):
+        """Close all idle connections.
+        """
+
+        for entry in self._entries.values():
+            while entry.idle:
+                _, writer, _ = entry.idle.pop()
+                writer.close()
@@ -4,14 +4,44 @@
 import asyncio
 import getpass
 import ipaddress
-import json
 import netifaces
+import struct
 import sys
 import time
 
+from . import codec
+from .datagram import (BROADCAST_ADDR, DISCOVERY_PORT, MULTICAST,
+                       MULTICAST_GROUP, TCP, Prober, new_nonce, probe_socket)
+from .download import (SEGMENT_SIZE, Download, Segments, parse_content_range,
+                       parse_digest, range_spec)
+from .metrics import ANY, Metrics, error_status
+from .network import HostRange, prefix_length
+from .pool import ConnectionPool
+from .registry import HostRegistry
+
+
+# every message is framed with its length, as a 4-byte big-endian integer
+FRAME_HEADER = struct.Struct('!I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# size of the chunks a response body is read in
+CHUNK_SIZE = 64 * 1024
+
+# statuses of the responses followed by a body
+OK = (200, 'OK')
+PARTIAL_CONTENT = (206, 'Partial Content')
+
+# a host that can't send a range, or sent one that doesn't match its digest
+NOT_IMPLEMENTED = (501, 'Not Implemented')
+BAD_DIGEST = (502, 'Bad Digest')
+
 
 class NetInfo:
     """Network information on which the client runs.
+
+    The interface is detected from the default route, and what's found
+    about each interface is cached until refresh is called, e.g. after the
+    network changed.
     """
 
     def __init__(self, *args, **kwargs):
@@ -19,58 +49,113 @@ class NetInfo:
 
         """
 
-    def get_netinfo(self, interface='wlan0'):
+        self._netinfo = {}  # (interface, family) -> result of get_netinfo
+
+    def refresh(self):
+        """Forget the interfaces and addresses found so far.
+        """
+
+        self._netinfo.clear()
+
+    def default_interface(self, family=netifaces.AF_INET):
+        """Find the interface the local network is reached through.
+
+        Args:
+            family (int): (optional) netifaces.AF_INET or netifaces.AF_INET6.
+
+        Return:
+            return the name of the interface of the default route if any,
+            else of the first interface with an address of the family which
+            isn't a loopback one (a link-local one for IPv6). return None if
+            there is none.
+        """
+
+        try:
+            gateway = netifaces.gateways().get('default', {}).get(family)
+            if gateway:
+                return gateway[1]
+        except (ValueError, OSError):
+            pass
+
+        for interface in netifaces.interfaces():
+            try:
+                addrs = netifaces.ifaddresses(interface).get(family, ())
+            except ValueError:
+                continue
+
+            for info in addrs:
+                addr = info.get('addr', '').partition('%')[0]
+                try:
+                    ip = ipaddress.ip_address(addr)
+                except ValueError:
+                    continue
+
+                if not ip.is_loopback and (family != netifaces.AF_INET6 or
+                                           ip.is_link_local):
+                    return interface
+
+        return None
+
+    def get_netinfo(self, interface=None, family=netifaces.AF_INET):
         """Gets network information for a given interface of a device.
 
         Args:
-            interface (str): (optional) a valid interface.
+            interface (str): (optional) a valid interface. Detected if not
+                             given, see default_interface.
+            family (int): (optional) netifaces.AF_INET, or netifaces.AF_INET6
+                          for the link-local address of the interface.
 
         Return:
             return a tuple containing the interface, the local ip address, and
             the prefix length.
         """
 
-        try:
-            # get the addresses for the specified interface
-            addrs = netifaces.ifaddresses(interface)
+        key = (interface, family)
+        if key in self._netinfo:
+            return self._netinfo[key]
 
-            # get the IPv4 address information
-            ipv4_info = addrs[netifaces.AF_INET][0]
+        if interface is None:
+            interface = self.default_interface(family)
 
-            ipaddr = ipv4_info['addr']
-            netmask = ipv4_info['netmask']
+        info = interface, None, None
+        try:
+            # get the addresses of the family for the specified interface
+            for entry in netifaces.ifaddresses(interface)[family]:
+                ipaddr = entry['addr']
+                ip = ipaddress.ip_address(ipaddr.partition('%')[0])
+                if family == netifaces.AF_INET6 and not ip.is_link_local:
+                    continue
 
-            # calculate the prefix length from netmask
-            prefixlen = sum([bin(int(i)).count('1') for i in netmask.split('.')])
+                info = interface, ipaddr, prefix_length(entry['netmask'])
 
-            return interface, ipaddr, prefixlen
+                break
+        except (ValueError, KeyError, IndexError, TypeError):
+            pass
 
-        except (ValueError, KeyError, IndexError):
-            return interface, None, None
+        self._netinfo[key] = info
 
+        return info
 
-    def get_hosts(self):
-        """Get a list of active hosts within a network range.
+    def get_hosts(self, interface=None, family=netifaces.AF_INET):
+        """Get the addresses of the hosts within the network of an interface.
+
+        Args:
+            interface (str): (optional) a valid interface. Detected if not
+                             given, see default_interface.
+            family (int): (optional) netifaces.AF_INET, or netifaces.AF_INET6
+                          for the link-local network of the interface.
 
         Return:
-            return a list of ip addresses.
+            return a tuple containing a flag (False if not connected to a
+            network) and the addresses, as a lazy HostRange.
         """
 
-        _, ipaddr, prefixlen = self.get_netinfo()
+        interface, ipaddr, prefixlen = self.get_netinfo(interface, family)
 
         if ipaddr and prefixlen:
-            subnet = ipaddr.rsplit('.', 1)[0]
-            subnet = subnet + '.' + '0'
-            subnet = subnet + '/' + str(prefixlen)
+            return True, HostRange(ipaddr, prefixlen, interface)
 
-            network = ipaddress.IPv4Network(subnet)
-            hosts = list(network.hosts())
-            flag = True
-        else:
-            hosts = []
-            flag = False
-
-        return flag, hosts
+        return False, []
 
 
 class Protocol(NetInfo):
@@ -88,11 +173,46 @@ class Protocol(NetInfo):
         self.hostname = None
         self.host = {'name': None, 'io': (None, None), 'addr': None, 'port': 2024}
 
-        self.hostnames = [self.hostname]
-        self.hosts = [self.host]
+        # discovered hosts, indexed by hostname and address
+        self.registry = HostRegistry()
+
+        # latency and statuses of the requests to each host, see Metrics
+        self.metrics = Metrics()
+
+        # keep-alive connections, reused by HEAD and GET requests
+        self.pool = ConnectionPool(metrics=self.metrics)
+
+        # hosts found by the previous runs, probed first by discover. None
+        # to always scan from scratch.
+        self.cache = None
+
+        # how discover finds the hosts: TCP to sweep every address of the
+        # network, MULTICAST or BROADCAST for a single UDP probe answered by
+        # the hosts, falling back to TCP if none answers
+        self.discovery = TCP
+        self.discovery_port = DISCOVERY_PORT
+        self.multicast_interface = None     # ipv4 address, None for default
+
+        # codec of the request headers, negotiated with each 'addr:port' by
+        # the HEAD handshake. JSON until then.
+        self.codecs = {}
 
         self.status = (None, None)  # status handler for requests and response
 
+    @property
+    def hostnames(self):
+        """List of the names of the discovered hosts.
+        """
+
+        return self.registry.names()
+
+    @property
+    def hosts(self):
+        """List of the discovered hosts, as Host records.
+        """
+
+        return list(self.registry)
+
     def content_types(self):
         images = ['jpeg', 'png', 'gif', 'svg+xml', 'bmp', 'tiff', 'ico',
                   'x-icon', 'x-xbitmap', 'x-xpixmap']
@@ -112,9 +232,23 @@ class Protocol(NetInfo):
         return all
 
     async def send(self, writer, message):
+        """Send a message to server, framed with its length.
+
+        Args:
+            writer (obj): a StreamWriter object to write data to.
+            message (str): the message to send, str or bytes.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
         if writer:
+            if isinstance(message, str):
+                message = message.encode()
+
             try:
-                writer.write(message.encode())
+                writer.write(FRAME_HEADER.pack(len(message)))
+                writer.write(message)
                 await writer.drain()
 
                 return (200, 'OK')
@@ -123,7 +257,7 @@ class Protocol(NetInfo):
 
         return 503, 'Bad Gateway'
 
-    async def recv(reader):
+    async def recv(self, reader):
         """Get response/message from server.
 
         Args:
@@ -134,45 +268,188 @@ class Protocol(NetInfo):
             return None on failure.
         """
 
+        data = await self.recv_frame(reader)
+
+        return None if data is None else data.decode()
+
+    async def recv_frame(self, reader):
+        """Get a framed message from server, as is.
+
+        Args:
+            reader (obj): a StreamReader object to read data from.
+
+        Return:
+            return the received bytes on success.
+            return None on failure.
+        """
+
         if reader:
-            data = await reader.read(1024)
+            try:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                length, = FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_SIZE:
+                    return None
 
-            return data.decode()
+                data = await reader.readexactly(length)
+            except (asyncio.IncompleteReadError, ConnectionResetError, OSError):
+                return None
+
+            return data
 
         return None
 
-    async def connect(self, reader, writer, host, port, route, hostname=''):
-        addr = header.get('host').split(':')
-        host = addr[0]
-        port = addr[1]
+    async def send_header(self, writer, header):
+        """Send a request header, encoded with the codec negotiated with its
+        host.
 
-        hostname = header.get('hostname')
-        route = header.get('route')
+        Args:
+            writer (obj): a StreamWriter object to write data to.
+            header (dict): the request header, see send_request.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        name = self.codecs.get(header.get('host'), codec.JSON)
+
+        return await self.send(writer, codec.encode(header, name))
+
+    async def recv_header(self, reader):
+        """Get a response header, in either codec.
+
+        Args:
+            reader (obj): a StreamReader object to read data from.
+
+        Return:
+            return the header as a dict on success.
+            return None on failure, or if the header is malformed.
+        """
+
+        data = await self.recv_frame(reader)
+        if not data:
+            return None
 
         try:
-            reader, writer = await asyncio.open_connection(host, port)
+            return codec.decode(data)
+        except ValueError:
+            return None
 
-            # check headers for validation (user agent? right source?...)
-            status = await self.send_request(reader, writer, host, port,
-                                             'HEAD', '/', hostname)
-        except ConnectionRefusedError:
-            status = (404, 'Bad Gateway')   # TODO
+    async def recv_body(self, reader, length, chunk_size=CHUNK_SIZE):
+        """Read a response body, following its header, chunk by chunk.
 
-        return status
+        Args:
+            reader (obj): a StreamReader object to read data from.
+            length (int): the content-length of the body.
+            chunk_size (int): (optional) maximum size of each chunk.
+
+        Yield:
+            yield the body in chunks of at most chunk_size bytes, as they
+            arrive. Raise asyncio.IncompleteReadError if the connection is
+            closed before the whole body is read.
+        """
+
+        remaining = length
+        while remaining:
+            chunk = await reader.read(min(chunk_size, remaining))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', remaining)
+
+            remaining -= len(chunk)
+
+            yield chunk
+
+    async def connect(self, reader, writer, host, port, route, hostname=''):
+        """Connect to a host, or check a pooled connection, with a HEAD
+        request.
+        """
+
+        # check headers for validation (user agent? right source?...)
+        return await self.request(host, 'HEAD', '/', hostname, port)
+
+    async def request(self, host, method, route='/', hostname=None, port=None,
+                      sink=None):
+        """Send a request to a host over a pooled keep-alive connection.
+
+        A reused connection that turns out to be dead is replaced by a new
+        one and the request is sent again, once, unless part of a body may
+        already have been written to sink.
+
+        Args:
+            host (str): local ip address of host.
+            method (str): the kind request to send (GET, HEAD).
+            route (str): (optional) location of data on server.
+            hostname (str): (optional) the human friendly name of the host.
+            port (int): (optional) port on which the host is binded to.
+            sink (obj): (optional) file-like object a GET body is written to.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        port = self.port if port is None else port
+
+        fresh = False
+        while True:
+            try:
+                reader, writer, reused = await self.pool.acquire(host, port,
+                                                                 fresh)
+            except (OSError, asyncio.TimeoutError):
+                return 503, 'Bad Gateway'
+
+            status = 503, 'Bad Gateway'
+            try:
+                status = await self.send_request(reader, writer, host, port,
+                                                 method, route, hostname,
+                                                 sink=sink)
+            except ValueError:
+                pass
+            finally:
+                self.pool.release(host, port, reader, writer,
+                                  reuse=status == (200, 'OK'))
+
+            if (status != (503, 'Bad Gateway') or not reused or
+                    (method == 'GET' and sink is not None)):
+                return status
+
+            # the other idle connections may be as stale, don't reuse them
+            fresh = True
 
     async def head(self, reader, writer, header):
-        request = json.dumps(header)
-        status = await self.send(writer, request)
+        """Send a HEAD request, registering the host that answers it.
+
+        HEAD is also the handshake of the codec: the request lists the codecs
+        the client accepts, and the host answers with the one it chose for
+        the next requests. A host that doesn't answer a binary request goes
+        back to JSON. The request is timed in metrics.
+
+        Args:
+            reader (obj): a StreamReader object to read the response from.
+            writer (obj): a StreamWriter object to send the request to.
+            header (dict): the request header, see send_request.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        start = time.perf_counter()
+        status = await self._head(reader, writer, header)
+        self.metrics.observe(header.get('host'), 'head',
+                             time.perf_counter() - start, status)
+
+        return status
+
+    async def _head(self, reader, writer, header):
+        status = await self.send_header(writer, header)
         if status != (200, 'OK'):
             return status
 
-        response = await self.recv(reader)
+        response = await self.recv_header(reader)
         if not response:
+            self.codecs.pop(header.get('host'), None)
             status = (404, 'Bad Gateway')
         else:
-            response = json.loads(response)
             try:
-                status = response.get('status')
+                status = tuple(response.get('status') or ())
                 if status != (200, 'OK'):
                     return status
 
@@ -180,21 +457,9 @@ class Protocol(NetInfo):
                 addr = response.get('host')
                 port = response.get('port')
 
-                host = {'name': hostname, 'io': (reader, writer),
-                        'addr': addr, 'port': port}
-
-
-                if self.hostnames and self.hosts:
-                    if hostname in self.hostnames:
-                        length = len(self.hosts)
-                        for i in range(length):
-                            if self.hosts[i].get('name') == hostname:
-                                self.hosts[i] = host
-
-                                return (200, 'OK')
-
-                self.hostnames += [hostname]
-                self.hosts += [host]
+                self.registry.update(hostname, addr, port, (reader, writer))
+                self.codecs[header.get('host')] = codec.negotiate(
+                    response.get('codec'))
                 status = (200, 'OK')
 
             except (KeyError):
@@ -202,55 +467,103 @@ class Protocol(NetInfo):
 
         return status
 
-    async def get(self, reader, writer, header):
-        route = header.get('route')
-        request = json.dumps(route).encode()
-        status = await self.send(writer, request)
+    async def get_stream(self, reader, writer, header,
+                         chunk_size=CHUNK_SIZE):
+        """Send a GET request and stream the body of the response.
+
+        The response is a framed header, in either codec, followed by
+        content-length bytes of body, which are never concatenated in memory.
+        The body of a range request comes with a PARTIAL_CONTENT status.
+
+        Args:
+            reader (obj): a StreamReader object to read the response from.
+            writer (obj): a StreamWriter object to send the request to.
+            header (dict): the request header, see send_request.
+            chunk_size (int): (optional) maximum size of each chunk.
+
+        Return:
+            return a tuple containing the status, the response header, and an
+            async iterator over the body (empty unless the status is OK or
+            PARTIAL_CONTENT).
+        """
+
+        # the body is timed by the callers, as a 'body' operation
+        start = time.perf_counter()
+        status, response, chunks = await self._get_stream(
+            reader, writer, header, chunk_size)
+        self.metrics.observe(header.get('host'), 'get',
+                             time.perf_counter() - start, status)
+
+        return status, response, chunks
+
+    async def _get_stream(self, reader, writer, header, chunk_size):
+        async def empty():
+            return
+            yield
+
+        status = await self.send_header(writer, header)
         if status != (200, 'OK'):
-            return status
+            return status, None, empty()
 
-        response = await self.recv(reader)
+        response = await self.recv_header(reader)
         if not response:
-            status = 503, 'Bad Gateway'
-        else:
-            response = json.loads(response)
-            try:
-                content = response.get('content')
-                cotent_type = response.get('content-type')
-                content_length = response.get('content-length')
+            return (503, 'Bad Gateway'), None, empty()
 
-                status = response.get('status')
-            except (KeyError):
-                status = 503, 'Bad Gateway'
+        try:
+            status = tuple(response.get('status') or ())
+            length = int(response.get('content-length') or 0)
+        except (ValueError, TypeError, AttributeError):
+            return (503, 'Bad Gateway'), None, empty()
 
-        # do something with the response if all good
+        if status not in (OK, PARTIAL_CONTENT):
+            return status, response, empty()
 
-        return status
+        return status, response, self.recv_body(reader, length, chunk_size)
 
-    async def send_request(self, reader, writer, host, port, method, route,
-                   hostname, user_agent='magnet/0.0'):
-        """Sends a HEAD request to host.
+    async def get(self, reader, writer, header, sink=None):
+        """Send a GET request and read the body of the response.
 
         Args:
-            reader (stream): a StreamReader object to read response.
-            writer (stream): a StreamWriter object to send requests.
-            host (str): local ip address of host.
-            port (str): port on which the host is binded to.
-            method (str): the kind request to send (GET, HEAD, POST, PUT).
-            request (obj): can be any object type, the content of request to make.
-            hostname (str): (optional) the human friendly name used to identify
-                            the host/
-            route (str): (optional) location of data on server, tells the host
-                         where to look for the data.
-            proto (str): (optional) protocol factory.
-            user_agent (str): (optional) the user agent used to make the
-                              request.
+            reader (obj): a StreamReader object to read the response from.
+            writer (obj): a StreamWriter object to send the request to.
+            header (dict): the request header, see send_request.
+            sink (obj): (optional) file-like object the body is written to,
+                        chunk by chunk. The body is discarded if not given.
 
         Return:
             return the a tuple object contaning status_code and status_string
         """
 
-        print(route)
+        status, response, chunks = await self.get_stream(reader, writer, header)
+        if status not in (OK, PARTIAL_CONTENT):
+            return status
+
+        start = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                if sink is not None:
+                    sink.write(chunk)
+        except (asyncio.IncompleteReadError, ConnectionResetError, OSError):
+            status = 503, 'Bad Gateway'
+
+        self.metrics.observe(header.get('host'), 'body',
+                             time.perf_counter() - start, status)
+
+        return OK if status == PARTIAL_CONTENT else status
+
+    def request_header(self, host, port, method, route, hostname,
+                       user_agent='magnet/0.0', byte_range=None):
+        """Build the header of a request, see send_request.
+
+        Args:
+            byte_range (tuple): (optional) (start, end) of the part of the
+                                content to get, end excluded or None for the
+                                rest of the content.
+
+        Return:
+            return the header, as a dict.
+        """
+
         accept_ranges = '*/*'   # TODO to be determined by the data type
         addr = f'{host}:{port}'
         date = time.strftime('%a, %d %b %Y %H:%M:%S %z')
@@ -266,8 +579,41 @@ class Protocol(NetInfo):
                   'content-length': None,   # to be set by POST and PUT methods
                   'content-type': None,   # to be set by POST and PUT methods
                   'date': date,
+                  'accept-codec': codec.ACCEPT,
                  }
 
+        if byte_range is not None:
+            header['range'] = range_spec(*byte_range)
+
+        return header
+
+    async def send_request(self, reader, writer, host, port, method, route,
+                   hostname, user_agent='magnet/0.0', sink=None):
+        """Sends a HEAD request to host.
+
+        Args:
+            reader (stream): a StreamReader object to read response.
+            writer (stream): a StreamWriter object to send requests.
+            host (str): local ip address of host.
+            port (str): port on which the host is binded to.
+            method (str): the kind request to send (GET, HEAD, POST, PUT).
+            request (obj): can be any object type, the content of request to make.
+            hostname (str): (optional) the human friendly name used to identify
+                            the host/
+            route (str): (optional) location of data on server, tells the host
+                         where to look for the data.
+            proto (str): (optional) protocol factory.
+            user_agent (str): (optional) the user agent used to make the
+                              request.
+            sink (obj): (optional) file-like object a GET body is written to.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        header = self.request_header(host, port, method, route, hostname,
+                                     user_agent)
+
         if method == 'CONNECT':
             status = await self.connect(reader, writer, host, port, route,
                                         hostname)
@@ -275,43 +621,676 @@ class Protocol(NetInfo):
             return status
 
         else:
+            status = 503, 'Bad Gateway'
             if writer:
                 if method == 'HEAD':
                     status = await self.head(reader, writer, header)
 
                 elif method == 'GET':
-                    status = await self.get(reader, writer, header)
-                else:
-                    status = 503, 'Bad Gateway'
+                    status = await self.get(reader, writer, header, sink)
 
         return status
 
-    async def get_active_hosts(self, hosts=None, start=0, stop=256):
+    async def fetch_range(self, host, port, route, hostname, target, start,
+                          end=None, chunk_size=CHUNK_SIZE, progress=None):
+        """Download a range of the content of a route into a Download.
+
+        The host may answer with the whole content instead, which is then
+        written from its start.
+
+        Args:
+            host (str): local ip address of host.
+            port (int): port on which the host is binded to.
+            route (str): location of data on server.
+            hostname (str): the human friendly name of the host.
+            target (obj): the Download the range is written to.
+            start (int): first byte of the range.
+            end (int): (optional) end of the range, excluded. None for the
+                       rest of the content.
+            chunk_size (int): (optional) maximum size of each chunk.
+            progress (callable): (optional) function called with the number
+                                 of bytes written so far and the size of the
+                                 content after each chunk.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        try:
+            reader, writer, _ = await self.pool.acquire(host, port)
+        except (OSError, asyncio.TimeoutError):
+            return 503, 'Bad Gateway'
+
+        status, body = (503, 'Bad Gateway'), None
+        try:
+            header = self.request_header(host, port, 'GET', route, hostname,
+                                         byte_range=(start, end))
+            status, response, chunks = await self.get_stream(
+                reader, writer, header, chunk_size)
+
+            if status == PARTIAL_CONTENT:
+                offset, _, size = parse_content_range(
+                    response.get('content-range'))
+            elif status == OK:
+                offset, size = 0, int(response.get('content-length') or 0)
+
+            if status in (OK, PARTIAL_CONTENT):
+                if size is None:
+                    raise ValueError('size of the content unknown')
+                target.open(size)
+
+                body = time.perf_counter()
+                async for chunk in chunks:
+                    target.write(offset, chunk)
+                    offset += len(chunk)
+                    if progress is not None:
+                        progress(target.done, size)
+
+                status = OK
+        except (asyncio.IncompleteReadError, ConnectionResetError, OSError,
+                ValueError, TypeError):
+            status = 503, 'Bad Gateway'
+        except asyncio.CancelledError:
+            # not the host's fault
+            body = None
+            raise
+        finally:
+            # a body left half read makes the connection unusable
+            self.pool.release(host, port, reader, writer, reuse=status == OK)
+
+            if body is not None:
+                self.metrics.observe(f'{host}:{port}', 'body',
+                                     time.perf_counter() - body, status)
+
+        return status
+
+    async def download(self, host, route, path, hostname=None, port=None,
+                       chunk_size=CHUNK_SIZE, progress=None):
+        """Download the content of a route to a file, with range requests.
+
+        The file is preallocated and written through a memory map, and the
+        ranges written are kept in a journal next to it, see Download. If
+        the download is interrupted, calling download again with the same
+        path only fetches the missing ranges.
+
+        Args:
+            host (str): local ip address of host.
+            route (str): location of data on server.
+            path (str): path of the destination file.
+            hostname (str): (optional) the human friendly name of the host.
+            port (int): (optional) port on which the host is binded to.
+            chunk_size (int): (optional) maximum size of each chunk.
+            progress (callable): (optional) function called with the number
+                                 of bytes written so far and the size of the
+                                 content after each chunk.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        port = self.port if port is None else port
+        target = Download(path, route)
+
+        try:
+            while not target.complete():
+                start, end = target.missing()[0]
+                done = target.done
+                status = await self.fetch_range(host, port, route, hostname,
+                                                target, start, end,
+                                                chunk_size, progress)
+                if status != OK:
+                    return status
+
+                if target.done == done:
+                    # the host sent an empty body
+                    return 503, 'Bad Gateway'
+        finally:
+            target.close()
+
+        return OK
+
+    async def fetch_segment(self, host, port, route, hostname, target, start,
+                            end, buffer=False, chunk_size=CHUNK_SIZE):
+        """Download a segment of the content of a route, checking it against
+        the digest sent by the host.
+
+        The segment is written to target, but left out of its journal, see
+        Download.commit. The size of target is set by the first segment.
+
+        Args:
+            host (str): local ip address of host.
+            port (int): port on which the host is binded to.
+            route (str): location of data on server.
+            hostname (str): the human friendly name of the host.
+            target (obj): the Download the segment is written to.
+            start (int): first byte of the segment.
+            end (int): end of the segment, excluded. Clipped to the size of
+                       the content.
+            buffer (bool): (optional) True to keep the segment in memory
+                           instead, e.g. while another host may be writing
+                           it to target.
+            chunk_size (int): (optional) maximum size of each chunk.
+
+        Return:
+            return a tuple containing the status, and the segment if buffer
+            is True. The status is NOT_IMPLEMENTED if the host ignored the
+            range, and BAD_DIGEST if the segment doesn't match the digest.
+        """
+
+        try:
+            reader, writer, _ = await self.pool.acquire(host, port)
+        except (OSError, asyncio.TimeoutError):
+            return (503, 'Bad Gateway'), None
+
+        status, data, body = (503, 'Bad Gateway'), None, None
+        try:
+            header = self.request_header(host, port, 'GET', route, hostname,
+                                         byte_range=(start, end))
+            status, response, chunks = await self.get_stream(
+                reader, writer, header, chunk_size)
+
+            if status == OK:
+                status = NOT_IMPLEMENTED
+            elif status == PARTIAL_CONTENT:
+                first, last, size = parse_content_range(
+                    response.get('content-range'))
+                if size is not None and target.size is None:
+                    target.open(size)
+                if (first, last, size) != (start, min(end, target.size),
+                                           target.size):
+                    raise ValueError('range or size mismatch')
+
+                digest = parse_digest(response.get('digest'))
+                data = bytearray() if buffer else None
+
+                body = time.perf_counter()
+                offset = start
+                async for chunk in chunks:
+                    if digest is not None:
+                        digest[0].update(chunk)
+                    if buffer:
+                        data += chunk
+                    else:
+                        target.write(offset, chunk, commit=False)
+                    offset += len(chunk)
+
+                if digest is not None and digest[0].hexdigest() != digest[1]:
+                    status = BAD_DIGEST
+                else:
+                    status = OK
+        except (asyncio.IncompleteReadError, ConnectionResetError, OSError,
+                ValueError, TypeError):
+            status = 503, 'Bad Gateway'
+        except asyncio.CancelledError:
+            # e.g. the copy of a segment another host was faster to fetch
+            body = None
+            raise
+        finally:
+            self.pool.release(host, port, reader, writer, reuse=status == OK)
+
+            if body is not None:
+                self.metrics.observe(f'{host}:{port}', 'body',
+                                     time.perf_counter() - body, status)
+
+        return status, data
+
+    async def download_segmented(self, route, path, hosts=None, streams=2,
+                                 segment_size=SEGMENT_SIZE,
+                                 chunk_size=CHUNK_SIZE, progress=None,
+                                 max_failures=3):
+        """Download the content of a route to a file, from several hosts at
+        once.
+
+        The content is split into segments, fetched concurrently from all
+        the hosts that serve it and checked against their digests, see
+        Segments. Faster hosts take more segments, and near the end the
+        segments held by slow hosts are fetched again by idle ones. The file
+        and its journal are handled as by download, so an interrupted
+        transfer resumes, possibly from other hosts.
+
+        A host is dropped if it doesn't serve the route or ranges, or once
+        it failed max_failures segments.
+
+        Args:
+            route (str): location of data on server.
+            path (str): path of the destination file.
+            hosts (iterable): (optional) Host records or addresses to
+                              download from. Defaults to the discovered
+                              hosts, see get_active_hosts.
+            streams (int): (optional) segments fetched at once per host.
+            segment_size (int): (optional) maximum size of a segment.
+            chunk_size (int): (optional) maximum size of each chunk.
+            progress (callable): (optional) function called with the number
+                                 of bytes written so far and the size of the
+                                 content after each segment.
+            max_failures (int): (optional) failed segments before a host is
+                                dropped.
+
+        Return:
+            return the a tuple object contaning status_code and status_string
+        """
+
+        if hosts is None:
+            hosts = self.hosts
+
+        # (addr, port, hostname) of each host
+        peers = [(str(getattr(host, 'addr', host)),
+                  getattr(host, 'port', None) or self.port,
+                  getattr(host, 'name', None)) for host in hosts]
+        failures = dict.fromkeys(peers, 0)
+        alive = set(peers)
+
+        def failed(peer, status):
+            failures[peer] += 1
+            if (status not in ((503, 'Bad Gateway'), BAD_DIGEST) or
+                    failures[peer] >= max_failures):
+                alive.discard(peer)
+
+        target = Download(path, route)
+        workers = []
+        running = {}    # tasks fetching each segment, by host
+        try:
+            # the size of the content comes with the first segment, kept
+            # small since it's fetched from a single host
+            first = min(segment_size, chunk_size)
+            while target.size is None and alive:
+                peer = next(peer for peer in peers if peer in alive)
+                status, _ = await self.fetch_segment(
+                    *peer[:2], route, peer[2], target, 0, first,
+                    chunk_size=chunk_size)
+                if status == OK:
+                    target.commit(0, min(first, target.size))
+                else:
+                    failed(peer, status)
+
+            segments = Segments(target.missing(), segment_size)
+            changed = asyncio.Condition()
+
+            async def worker(peer):
+                addr, port, name = peer
+
+                while peer in alive:
+                    segment, copy = segments.take(peer)
+                    if segment is None:
+                        if not segments:
+                            return
+
+                        async with changed:
+                            await changed.wait()
+
+                        continue
+
+                    task = asyncio.ensure_future(self.fetch_segment(
+                        addr, port, route, name, target, segment.start,
+                        segment.end, buffer=copy, chunk_size=chunk_size))
+                    running.setdefault(segment, {})[peer] = task
+                    await asyncio.wait([task])
+                    running.get(segment, {}).pop(peer, None)
+
+                    if task.cancelled():
+                        # another host was first
+                        segments.fail(segment, peer)
+                        continue
+
+                    status, data = task.result()
+                    if status == OK and segments.finish(segment, peer):
+                        if data is not None:
+                            target.write(segment.start, data, commit=False)
+                        target.commit(segment.start, segment.end)
+
+                        for other in running.pop(segment, {}).values():
+                            other.cancel()
+
+                        if progress is not None:
+                            progress(target.done, target.size)
+                    elif status != OK:
+                        segments.fail(segment, peer)
+                        failed(peer, status)
+
+                    async with changed:
+                        changed.notify_all()
+
+                # the segments of the host may have been queued again
+                async with changed:
+                    changed.notify_all()
+
+            workers = [asyncio.ensure_future(worker(peer))
+                       for peer in peers if peer in alive
+                       for _ in range(streams)]
+            if workers:
+                await asyncio.gather(*workers)
+        finally:
+            tasks = workers + [task for fetches in running.values()
+                               for task in fetches.values()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            target.close()
+
+        return OK if target.complete() else (503, 'Bad Gateway')
+
+    async def probe(self, addr, timeout=1.0, port=None):
+        """Connect to an address and send it a HEAD request.
+
+        Args:
+            addr (str): ip address of the host to probe.
+            timeout (float): (optional) seconds to wait for the connection and
+                             for the response, each.
+            port (int): (optional) port to connect to. Defaults to self.port.
+
+        Return:
+            return the Host record registered by the HEAD request on
+            success. return None if the host is down, silent, or not a
+            MagNet host.
+        """
+
+        addr = str(addr)
+        port = self.port if port is None else port
+        key = f'{addr}:{port}'
+
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(addr, port), timeout)
+        except (OSError, asyncio.TimeoutError) as error:
+            # most addresses of a scan don't answer, they are counted
+            # together
+            self.metrics.observe(ANY, 'connect', time.perf_counter() - start,
+                                 error_status(error))
+            return None
+        self.metrics.observe(key, 'connect', time.perf_counter() - start, OK)
+
+        host = None
+        start = time.perf_counter()
+        try:
+            try:
+                status = await asyncio.wait_for(
+                    self.send_request(reader, writer, addr, port, 'HEAD', '/',
+                                      None), timeout)
+            except (OSError, asyncio.TimeoutError) as error:
+                status = None
+                # the HEAD request was cancelled before it was timed
+                self.metrics.observe(key, 'head', time.perf_counter() - start,
+                                     error_status(error))
+            except ValueError:
+                status = None
+            rtt = time.perf_counter() - start
+
+            if status == (200, 'OK'):
+                host = self.registry.get_by_addr(addr)
+                if host is None or host.io[1] is not writer:
+                    # the host reported an address other than the one probed
+                    host = next((host for host in self.registry
+                                 if host.io[1] is writer), None)
+
+            if host is not None:
+                host.rtt = rtt
+
+                # keep the connection warm for the next requests to the host
+                self.pool.put(addr, port, reader, writer)
+
+            return host
+        finally:
+            # also when the scan is closed or cancelled during the request
+            if host is None:
+                writer.close()
+
+    async def scan(self, hosts=None, concurrency=256, timeout=1.0,
+                   progress=None, first=()):
+        """Probe hosts concurrently, yielding each host as it answers.
+
+        The probes are run by `concurrency` worker tasks, each going through
+        its own shard of `hosts` if it's a HostRange, see HostRange.shard, or
+        else all taking the next address from a shared iterator. Addresses
+        are taken lazily, so `hosts` may be a generator. Closing the
+        generator, or cancelling the task consuming it, cancels the probes
+        still running.
+
+        Args:
+            hosts (iterable): (optional) addresses to probe. Defaults to the
+                              hosts of the local network, see get_hosts.
+            concurrency (int): (optional) maximum number of probes in flight.
+            timeout (float): (optional) per-host timeout in seconds.
+            progress (callable): (optional) function called with the number
+                                 of hosts probed so far and the total number
+                                 of hosts (None if unknown) after each probe.
+            first (list): (optional) addresses, or (addr, port) tuples, to
+                          probe before hosts, e.g. known hosts. Those on
+                          self.port aren't probed again with hosts, nor
+                          counted by progress.
+
+        Yield:
+            yield the Host record of each host that answered.
+        """
+
+        if hosts is None:
+            _, hosts = self.get_hosts()
+
+        try:
+            total = len(hosts)
+        except (TypeError, OverflowError):
+            # a generator, or more addresses than len allows
+            total = getattr(hosts, 'size', None)
+
+        first = [entry if isinstance(entry, tuple) else (entry, self.port)
+                 for entry in first]
+        count = concurrency if total is None else min(concurrency, total)
+        count = max(count, min(concurrency, len(first)))
+        if hasattr(hosts, 'shard'):
+            shards = [hosts.shard(i, count) for i in range(count)]
+        else:
+            shards = [iter(hosts)] * count
+
+        probed = 0
+        queue = asyncio.Queue()
+        done = object()     # sentinel, put after the last probe
+
+        # taken by the workers from a shared iterator, before their shards
+        known = {addr for addr, port in first if port == self.port}
+        first = iter(first)
+
+        async def work(shard):
+            nonlocal probed
+
+            for addr, port in first:
+                host = await self.probe(addr, timeout, port)
+                if host is not None:
+                    queue.put_nowait(host)
+
+            for addr in shard:
+                if addr not in known:
+                    host = await self.probe(addr, timeout)
+                    if host is not None:
+                        queue.put_nowait(host)
+
+                probed += 1
+                if progress is not None:
+                    progress(probed, total)
+
+        async def join():
+            if workers:
+                await asyncio.wait(workers)
+
+            queue.put_nowait(done)
+
+        workers = [asyncio.ensure_future(work(shard)) for shard in shards]
+        joiner = asyncio.ensure_future(join())
+        try:
+            while True:
+                host = await queue.get()
+                if host is done:
+                    break
+
+                yield host
+        finally:
+            for task in [joiner, *workers]:
+                task.cancel()
+
+            await asyncio.gather(joiner, *workers, return_exceptions=True)
+
+    async def datagram_scan(self, mode=None, wait=1.0, retries=3):
+        """Discover hosts with a UDP probe, yielding each host as it answers.
+
+        The probe is sent once to the multicast group or broadcast address,
+        and again up to retries times within wait since datagrams may be
+        lost, so the cost grows with the number of hosts answering rather
+        than with the size of the network.
+
+        Args:
+            mode (str): (optional) MULTICAST or BROADCAST. Defaults to
+                        self.discovery.
+            wait (float): (optional) seconds to wait for answers.
+            retries (int): (optional) number of probes sent.
+
+        Yield:
+            yield the Host record of each host that answered, with its rtt
+            measured since the first probe.
+        """
+
+        mode = self.discovery if mode is None else mode
+        addr = MULTICAST_GROUP if mode == MULTICAST else BROADCAST_ADDR
+        target = addr, self.discovery_port
+
+        loop = asyncio.get_running_loop()
+        nonce = new_nonce()
+        try:
+            sock = probe_socket(mode, self.multicast_interface)
+            transport, prober = await loop.create_datagram_endpoint(
+                lambda: Prober(nonce), sock=sock)
+        except OSError:
+            return
+
+        header = self.request_header(addr, self.discovery_port, 'DISCOVER',
+                                     '/', None)
+        header['nonce'] = nonce
+
+        seen = set()
+        sent, next_send = 0, loop.time()
+        deadline = next_send + wait
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    break
+
+                if sent < retries and now >= next_send:
+                    prober.send(header, target)
+                    sent += 1
+                    next_send = now + wait / retries
+
+                until = next_send if sent < retries else deadline
+                try:
+                    response, addr, rtt = await asyncio.wait_for(
+                        prober.answers.get(), min(until, deadline) - now)
+                except asyncio.TimeoutError:
+                    continue
+
+                try:
+                    status = tuple(response.get('status') or ())
+                    port = int(response.get('port') or self.port)
+                except (TypeError, ValueError):
+                    continue
+
+                if status != OK or (addr, port) in seen:
+                    continue
+                seen.add((addr, port))
+
+                host = self.registry.update(response.get('hostname'), addr,
+                                            port)
+                host.rtt = rtt
+                self.codecs[f'{addr}:{port}'] = codec.negotiate(
+                    response.get('codec'))
+
+                yield host
+        finally:
+            transport.close()
+
+    async def discover(self, hosts=None, concurrency=256, timeout=1.0,
+                       progress=None):
+        """Probe the hosts of the cache first, then the others, yielding each
+        host as it answers, see scan.
+
+        With a MULTICAST or BROADCAST discovery, the hosts are found by
+        datagram_scan instead, and hosts is only swept if none answered.
+
+        The hosts that answer are saved to the cache once the discovery is
+        over, or stopped. Without a cache, this is the same as scan.
+
+        Args:
+            hosts (iterable): (optional) addresses to probe. Defaults to the
+                              hosts of the local network, see get_hosts.
+            concurrency (int): (optional) maximum number of probes in flight.
+            timeout (float): (optional) per-host timeout in seconds.
+            progress (callable): (optional) see scan.
+
+        Yield:
+            yield the Host record of each host that answered.
+        """
+
+        cache = self.cache
+
+        try:
+            if self.discovery != TCP:
+                found = 0
+                async for host in self.datagram_scan(wait=timeout):
+                    found += 1
+                    if cache is not None:
+                        cache.put(host)
+                    if progress is not None:
+                        progress(found, None)
+
+                    yield host
+
+                if found:
+                    return
+
+            known = [] if cache is None else cache.load()
+            first = list(dict.fromkeys((host.addr, host.port or self.port)
+                                       for host in known))
+
+            async for host in self.scan(hosts, concurrency, timeout, progress,
+                                        first):
+                if cache is not None:
+                    cache.put(host)
+
+                yield host
+        finally:
+            if cache is not None:
+                cache.flush()
+
+    def close(self):
+        """Close the idle connections of the pool, e.g. when the application
+        quits.
+        """
+
+        self.pool.close()
+
+    async def get_active_hosts(self, hosts=None, concurrency=256, timeout=1.0):
+        """Probe hosts within a network range and register the active ones,
+        starting with the hosts of the cache, see discover.
+
+        Args:
+            hosts (iterable): (optional) addresses to probe. Defaults to the
+                              hosts of the local network, see get_hosts.
+            concurrency (int): (optional) maximum number of probes in flight.
+            timeout (float): (optional) per-host timeout in seconds.
+
+        Return:
+            return a tuple containing a flag (False if not connected to a
+            network), the list of hostnames, and the list of hosts.
+        """
+
         flag = True
         if hosts is None:
             flag, hosts = self.get_hosts()
         if flag is False:
-            self.hostnames = []
-            self.hosts = []
+            self.registry.clear()
 
             return (flag, self.hostnames, self.hosts)
 
-        tasks = []
-        length = len(hosts)
-        port = self.port
-        hostname = None
-
-        for i in range(start, length):
-            if i == stop:
-                # get the remaining indices left
-                await self.get_active_hosts(hosts, i, stop * 2)
-
-                break
-
-            reader, writer = None, None
-            tasks += [self.send_request(reader, writer, hosts[i], port, 'HEAD',
-                                        '/', hostname)]
-            await asyncio.gather(*tasks)
+        async for _ in self.discover(hosts, concurrency, timeout):
+            pass
 
         return (flag, self.hostnames, self.hosts)
 
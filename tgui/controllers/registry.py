@@ -0,0 +1,171 @@
+"""Host registry module. Keeps track of the hosts discovered on the network.
+"""
+
+import time
+
+
+class Host:
+    """Record of a discovered host.
+    """
+
+    __slots__ = ('name', 'addr', 'port', 'io', 'last_seen', 'rtt')
+
+    def __init__(self, name, addr, port, io=(None, None), last_seen=None,
+                 rtt=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            name (str): the human friendly name used to identify the host.
+            addr (str): local ip address of the host.
+            port (int): port on which the host is binded to.
+            io (tuple): (optional) (reader, writer) of the last connection.
+            last_seen (float): (optional) time the host last answered, in
+                               seconds since the epoch. Defaults to now.
+            rtt (float): (optional) seconds the host took to answer a HEAD
+                         request, None if unknown.
+        """
+
+        self.name = name
+        self.addr = addr
+        self.port = port
+        self.io = io
+        self.last_seen = time.time() if last_seen is None else last_seen
+        self.rtt = rtt
+
+    def __repr__(self):
+        return f'Host({self.name!r}, {self.addr!r}, {self.port!r})'
+
+
+class HostRegistry:
+    """Hosts indexed by hostname and by address.
+
+    A host that reports no hostname is indexed by its address instead, and
+    an address belongs to a single host: the record of a host that answers
+    from the address of another replaces it.
+
+    Listeners subscribed to the registry are called with the host and the
+    kind of change ('added', 'changed' or 'removed') so that views can
+    re-render only the hosts that changed.
+    """
+
+    def __init__(self):
+        """Initialize self. See help(type(self)) for accurate signature.
+        """
+
+        self._by_name = {}
+        self._by_addr = {}
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __iter__(self):
+        return iter(list(self._by_name.values()))
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def _notify(self, host, event):
+        for listener in self._listeners:
+            listener(host, event)
+
+    def subscribe(self, listener):
+        """Call listener(host, event) on every change.
+        """
+
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    @staticmethod
+    def _key(name, addr):
+        return name if name else addr
+
+    def _evict(self, host):
+        del self._by_name[self._key(host.name, host.addr)]
+        if self._by_addr.get(host.addr) is host:
+            del self._by_addr[host.addr]
+        self._notify(host, 'removed')
+
+    def get(self, name):
+        """Get a host by hostname, or by address if it has no hostname.
+
+        Return:
+            return the Host, None if unknown.
+        """
+
+        return self._by_name.get(name)
+
+    def get_by_addr(self, addr):
+        """Get a host by ip address.
+
+        Return:
+            return the Host, None if unknown.
+        """
+
+        return self._by_addr.get(addr)
+
+    def names(self):
+        return list(self._by_name)
+
+    def update(self, name, addr, port, io=(None, None)):
+        """Add a host, or refresh the record of a known one.
+
+        Args:
+            name (str): the human friendly name used to identify the host,
+                        None if it reported none.
+            addr (str): local ip address of the host.
+            port (int): port on which the host is binded to.
+            io (tuple): (optional) (reader, writer) of the connection.
+
+        Return:
+            return the Host record.
+        """
+
+        key = self._key(name, addr)
+        host = self._by_name.get(key)
+
+        # the address now answers under another name, or the host got one
+        owner = self._by_addr.get(addr)
+        if owner is not None and owner is not host:
+            self._evict(owner)
+
+        if host is None:
+            host = Host(name, addr, port, io)
+            self._by_name[key] = host
+            self._by_addr[addr] = host
+            self._notify(host, 'added')
+
+            return host
+
+        changed = host.addr != addr or host.port != port
+        if host.addr != addr:
+            if self._by_addr.get(host.addr) is host:
+                del self._by_addr[host.addr]
+            self._by_addr[addr] = host
+
+        host.addr, host.port, host.io = addr, port, io
+        host.last_seen = time.time()
+
+        if changed:
+            self._notify(host, 'changed')
+
+        return host
+
+    def remove(self, name):
+        """Forget a host, by hostname or by address if it has no hostname.
+
+        Return:
+            return the removed Host, None if unknown.
+        """
+
+        host = self._by_name.get(name)
+        if host is not None:
+            self._evict(host)
+
+        return host
+
+    def clear(self):
+        for name in list(self._by_name):
+            self.remove(name)
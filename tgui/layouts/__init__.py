@@ -1 +1,2 @@
-# from ._layout import *
+from ._layout import *
+from ._linear import *
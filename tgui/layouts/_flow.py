@@ -1,9 +1,7 @@
 """Module to handle layouts.
 """
 
-import curses
-from curses import panel
-
+from ..backends import get_backend
 from ..widgets import Label
 
 
@@ -25,11 +23,11 @@ class FlowLayout:
 
         self.master = kw.get('master')
         if self.master is None:
-            win = curses.newwin(0, 0, 0, 0)
+            win = get_backend().newwin(0, 0, 0, 0)
         else:
             win = self.master.derwin(0, 0, 0, 0)
 
-        pan = panel.new_panel(win)
+        pan = get_backend().new_panel(win)
 
         self.scr = (win, pan)
 
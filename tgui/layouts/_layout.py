@@ -1,90 +1,135 @@
-import curses
-from curses import panel
-
-from .. import _tgui
+from .._geometry import Node, size_spec
+from .._props import ARRANGE, Prop
 from .._tgui import TGUI
 
 
-class Layout(TGUI):
+class Layout(TGUI, Node):
     """Base layout class.
     """
 
-    def __init__(self, **kwargs):
+    size = Prop(0, ARRANGE)
+
+    def __init__(self, layout=None, **kwargs):
         """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            layout (obj): (optional) the parent layout, None for the screen.
+            kwargs (dict): values of the props of the layout.
         """
 
-        super().__init__()
+        TGUI.__init__(self)
+        Node.__init__(self, layout, **kwargs)
 
-        self._kwargs = kwargs
+        self._children = []
+        self._dirty = False     # children need to be re-arranged
 
-    def _create_layout(self, layout, fg, bg, *args):
-        """Create a new layout.
-        """
+    def _parent_win(self):
+        if self._layout is None:
+            return self._stdscr
 
-        if layout is None:
-            self._win = self._stdscr.derwin(*args)
-        else:
-            self._win = layout._win.derwin(*args)
+        return self._layout._win
+
+    def _anchor_yx(self):
+        anchor = super()._anchor_yx()
+        if anchor is None and self._layout is None:
+            # at the top left corner of the screen
+            return 0, 0
 
-        self._pan = panel.new_panel(self._win)
+        return anchor
 
-        self.set_color(fg, bg)
+    def _create(self):
+        super()._create()
 
-        self.hide()
+        if self._layout is None:
+            self._roots[self] = None
 
-    def _create_linear(self):
-        """Create a new linear layout.
+    def set_color(self, fg, bg):
+        """Set or reset the foreground and background color of the layout.
         """
 
-        size = self._kwargs.get('size')
-        orient = self._kwargs.get('orient')
-        wrap = self._kwargs.get('wrap')
-        color = self._kwargs.get('color')
-        # TODO padding = self._kwargs.get('padding')
+        self.color = (fg, bg)
 
-        # current anchor position for widgets or sub-layouts
-        self._cur_y, self._cur_x = 0, 0
+    def add_widget(self, widget):
+        """Add a widget or a sub-layout, arranged after the last child on the
+        next frame (or on update_layout).
 
-        if size is None:
-            error = 'wrap content: get the size of all widgets and sub-layouts'
+        Args:
+            widget (obj): a widget or layout created with this layout.
+        """
 
-            raise NotImplementedError(error)
+        if widget._layout is not self:
+            error = 'widget must be created with the layout it is added to'
 
-        if isinstance(size, tuple):
-            height, width = size
-        else:
-            height, width = size, size
+            raise ValueError(error)
 
-        if anchor is None:
-            error = 'anchor layout at next available position'
+        widget._parent = self
+        self._children += [widget]
 
-            raise NotImplementedError(error)
+        self._invalidate()
 
-        if isinstance(anchor, tuple):
-            y, x = anchor
-        else:
-            y, x = anchor, anchor
+    def _invalidate(self):
+        """Re-arrange the children on the next frame.
+
+        The parent layout is invalidated too if the layout wraps its content,
+        since its own size may change; otherwise only this layout is
+        re-arranged.
+        """
 
-        if color is None:
-            # TODO use the terminal default display color
-            fg, bg = curses.COLOR_BLACK, curses.COLOR_WHITE
-        elif isinstance(color, tuple):
-            fg, bg = color
+        if self._dirty:
+            return
+
+        self._dirty = True
+        if self._parent is not None and None in size_spec(self.size):
+            self._measured = None
+            self._parent._invalidate()
         else:
-            fg, bg = color, color
+            self._renderer.request_layout(self)
+
+    def _arrange_children(self, force=False):
+        """Position every child within the layout window. Implemented by
+        subclasses.
+        """
 
-        self._create_layout(self.layout, fg, bg, height, width, y, x)
+        self._dirty = False
 
-    def _set_color_pair(self, fg, bg):
-        """Initialize color pair for the layout.
+    def arrange(self, y, x, height, width, force=False):
+        if force or self._slot != (y, x, height, width):
+            super().arrange(y, x, height, width, force)
+        elif self._dirty:
+            self._arrange_children()
 
-        Args:
-            fg (int): foreground color for the layout.
-            bg (int): background color for the layout.
+    def _arrange(self, y, x, height, width, force):
+        self._place(y, x, height, width, force)
+
+        # children are derived from the window and share its cells, which
+        # were erased and repainted, so they are all moved along and redrawn
+        self._arrange_children(force=True)
+
+    def _update_layout(self):
+        """Run a layout pass requested by _invalidate.
+        """
+
+        if self._parent is not None:
+            # the slot given by the parent didn't change
+            if self._dirty:
+                self._arrange_children()
+
+            return
+
+        self._measured = None
+        self.arrange(*self._anchored_slot())
+
+    def _rearrange(self):
+        self._measured = None
+
+        if self._parent is not None:
+            self._parent._invalidate()
+        else:
+            self._renderer.request_layout(self)
 
-        Return:
-            return the pair number of the color.
+    def update_layout(self):
+        """Measure and arrange every layout that changed now, instead of
+        waiting for the next frame.
         """
 
-        _COLOR_PAIR_NO += 1
-        curses.init_pair(self._color_pair_no, fg, bg)
+        self._renderer.update_layouts()
@@ -1,63 +1,121 @@
-import curses
-from curses import panel
-
+from .._props import MEASURE, Prop
 from ._layout import Layout
 
 
 class LinearLayout(Layout):
+    orient = Prop('horizontal', MEASURE)
+    wrap = Prop(False, MEASURE)
+
     def __init__(self, layout=None, **kwargs):
         """None means to fit content (curses.window.resize is called)
         0 means to fill parent
         """
 
-        kw = {'size': 0, 'anchor': None, 'orient': 'horizontal', 'wrap': False,
-              'color': None, 'padding': 0}
+        super().__init__(layout, **kwargs)
 
-        for key, value in kwargs.items():
-            if key not in kw.keys():
-                error = 'LinearLayout.__init__() '
-                error += f"got an unexpected keyword argument '{key}'"
+        # now create a new view as the layout
+        self._create()
 
-                raise TypeError(error)
+    def set_size(self, height, width):
+        """Set or reset the layout size.
+        """
 
-            kw[key] = value
+        self.size = (height, width)
 
-        super().__init__(layout, kw)
+    def _content_size(self):
+        """Get the size wrapping all the children, with their padding.
+        """
 
-        self._layout = layout if layout is None else self
-        self._height = kw.get('height'), self._width = kw.get('width')
-        self._anchor_y = kw.get('anchor_y'), self._anchor_x = kw.get('anchor_x'
-                                                                    )
-        self._fg = kw.get('fg'), self._bg = kw.get('bg')
-        self._y, self._x = 0, 0     # current anchor position for children
-        self._orient = kw.get('orient')
-        self._padding_l, self._padding_r, self._padding_t, self._padding_b  = \
-            (kw.get('padding_l'), kw.get('padding_r'), kw.get('padding_t'), kw.
-             get('padding_b'))
+        vertical = self.orient == 'vertical'
+        main, cross = 0, 0
 
-        # now create a new view as the layout
-        self._win, self._pan = self._create_layout(master, height, width,
-                                                   anchor_y, anchor_x, fg, bg)
+        for child in self._children:
+            height, width = child.measure()
+            pd_l, pd_r, pd_t, pd_b = child.margins()
 
-    def set_size(self, height, width):
-        """Set or reset the layout size.
+            if vertical:
+                main += height + pd_t + pd_b
+                cross = max(cross, width + pd_l + pd_r)
+            else:
+                main += width + pd_l + pd_r
+                cross = max(cross, height + pd_t + pd_b)
+
+        main, cross = max(main, 1), max(cross, 1)
+
+        return (main, cross) if vertical else (cross, main)
+
+    def _arrange_children(self, force=False):
+        """Place the children one after the other along the orientation,
+        starting a new line if wrap is set and a child doesn't fit.
+
+        Children whose slot didn't change are left untouched, unless force is
+        set because the layout window was re-created.
         """
 
-        self._win.resize(height, width)
-        self._win.refresh()
+        self._dirty = False
+        if not self._visible():
+            return
+
+        vertical = self.orient == 'vertical'
+        wrap = self.wrap
+
+        height, width = self._win.getmaxyx()
+        avail_main, avail_cross = (height, width) if vertical else \
+            (width, height)
+
+        # measure pass, cached by each child
+        items = []
+        used, fills = 0, 0
+        for child in self._children:
+            child_h, child_w = child.measure()
+            pd_l, pd_r, pd_t, pd_b = child.margins()
+
+            if vertical:
+                item = (child, child_h, child_w, pd_t, pd_b, pd_l, pd_r)
+            else:
+                item = (child, child_w, child_h, pd_l, pd_r, pd_t, pd_b)
+
+            items += [item]
+            used += item[1] + item[3] + item[4]
+            fills += not item[1]
+
+        # children filling the parent share what is left along the main axis
+        share = max(0, avail_main - used) // fills if fills else 0
+
+        # arrange pass
+        slots = []
+        pos_main, pos_cross, line = 0, 0, 0
+        for child, main, cross, before, after, side, other_side in items:
+            if not main:
+                main = share
+
+            if wrap and pos_main and pos_main + before + main + after > \
+                    avail_main:
+                # start a new line
+                pos_main, pos_cross, line = 0, pos_cross + line, 0
+
+            if not cross:
+                cross = max(0, avail_cross - pos_cross - side - other_side)
+
+            m, c = pos_main + before, pos_cross + side
+            if vertical:
+                slots += [(child, (m, c, main, cross))]
+            else:
+                slots += [(child, (c, m, cross, main))]
+
+            pos_main += before + main + after
+            line = max(line, side + cross + other_side)
 
-    def add_widget(self, widget):
-        if isinstance(widget, Label):
-            text = widget._text
-            height, width = widget._height, widget._width
-            anchor_y, anchor_x = self._y, self._x
-            fg, bg = widget.fg, widget.bg
-            pd_l, pd_r, pd_t, pd_b = (widget._padding_l, widget.padding_r,
-                                      widget.padding_t, widget.padding_b)
+        changed = [force or child._slot != slot for child, slot in slots]
 
-            self._create_label(text, height, width, anchor_y, anchor_x, fg, bg)
+        # erase every old window before drawing any new one
+        if not force:
+            for (child, _), moved in zip(slots, changed):
+                if moved:
+                    child._erase()
 
-            self._x += width + pd_l + pd_r if self._orient == 'horizontal' \
-                else 0
-            self._y += height + pd_t + pd_b if self._orient == 'vertical' \
-                else 0
+        for (child, slot), moved in zip(slots, changed):
+            if moved:
+                child._arrange(*slot, force)
+            elif isinstance(child, Layout) and child._dirty:
+                child._arrange_children()
@@ -0,0 +1 @@
+from ._list import *
@@ -0,0 +1,119 @@
+"""List model module.
+"""
+
+
+class ListModel:
+    """Sequence of items shown by a ListView.
+
+    Listeners subscribed to the model are called with the (start, stop)
+    range of indexes that changed, so that views can redraw only the rows
+    showing them. stop is None if every item from start changed, e.g. after
+    an insertion or removal shifted the items after it.
+    """
+
+    def __init__(self, items=None):
+        """Initialize self. See help(type(self)) for accurate signature.
+
+        Args:
+            items (obj): (optional) iterable of the initial items.
+        """
+
+        self._items = [] if items is None else list(items)
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index, item):
+        if isinstance(index, slice):
+            self._set_slice(index, item)
+
+            return
+
+        if index < 0:
+            index += len(self._items)
+
+        self._items[index] = item
+        self._notify(index, index + 1)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            rows = range(*index.indices(len(self._items)))
+            del self._items[index]
+            if rows:
+                self._notify(min(rows), None)
+
+            return
+
+        if index < 0:
+            index += len(self._items)
+
+        del self._items[index]
+        self._notify(index, None)
+
+    def _set_slice(self, index, items):
+        """Replace a slice of the items, notified as the range of rows that
+        changed, or every row from the slice if the items shifted.
+        """
+
+        size = len(self._items)
+        rows = range(*index.indices(size))
+        self._items[index] = items
+
+        start = min(rows) if rows else rows.start
+        if len(self._items) != size:
+            self._notify(start, None)
+        elif rows:
+            self._notify(start, max(rows) + 1)
+
+    def _notify(self, start, stop):
+        for listener in self._listeners:
+            listener(start, stop)
+
+    def subscribe(self, listener):
+        """Call listener(start, stop) on every change.
+        """
+
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def append(self, item):
+        self._items.append(item)
+
+        size = len(self._items)
+        self._notify(size - 1, size)
+
+    def extend(self, items):
+        """Append several items at once, notified as a single change.
+        """
+
+        start = len(self._items)
+        self._items.extend(items)
+
+        if len(self._items) > start:
+            self._notify(start, len(self._items))
+
+    def insert(self, index, item):
+        index = max(0, min(index if index >= 0 else index + len(self._items),
+                           len(self._items)))
+
+        self._items.insert(index, item)
+        self._notify(index, None)
+
+    def set_items(self, items):
+        """Replace every item.
+        """
+
+        self._items = list(items)
+        self._notify(0, None)
+
+    def clear(self):
+        self.set_items([])
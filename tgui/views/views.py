@@ -1,12 +1,19 @@
 """Module to handle views.
 """
 
-import asyncio
 import curses
 import curses.panel
 
-#from .. import controllers
-from controllers import protocol
+from .._colors import color_pairs
+from .._render import renderer
+from .._text import text_layout
+from .._tgui import TGUI
+from ..backends import get_backend
+from ..controllers import protocol
+from ..controllers.cache import HostCache
+
+
+SPINNER = '⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏'
 
 
 class Widgets:
@@ -16,7 +23,6 @@ class Widgets:
     def __init__(self, *args, **kwargs):
         """Initialize self. See help(type(self)) for accurate signature.
         """
-        self.color_pair_no = 0
 
     def create_panel(self, height, width, y, x):
         """Create a new panel with a specific height and width, while providing
@@ -32,10 +38,12 @@ class Widgets:
             return a tuple containing a window object and a panel object.
         """
 
-        win = curses.newwin(height, width, y, x)
+        backend = get_backend()
+
+        win = backend.newwin(height, width, y, x)
         win.erase()
 
-        pan = curses.panel.new_panel(win)
+        pan = backend.new_panel(win)
 
         return win, pan
 
@@ -61,27 +69,40 @@ class Widgets:
         pair_no = self.set_color(fg, bg)
         win.bkgd(' ', pair_no)
 
+        self.draw_about(win)
+
+        return win, panel
+
+    def draw_about(self, win):
+        """Draw the banner of the about widget, centered in its window.
+
+        Args:
+            win (window): the window created by about.
+        """
+
+        win.erase()
         win.attron(curses.A_BOLD)
         y, x = win.getmaxyx()
 
         r0 = '▀█▀ █▀▀ █░█ █▀█ ▀█▀'
         r1 = '░█░ █▄▄ █▀█ █▀█ ░█░'
 
-        text = r0 + '\n' + r1
-
         y = int(y / 2)
-        win.addstr(y, int(x / 2) - 10, r0)
-        win.addstr(y + 1, int(x / 2) - 10, r1)
-
-        win.addstr(y - 4, x - 3, u'\u25CF')
-        win.addstr(y - 3, x - 3, '\u25CF')
-        win.addstr(y - 2, x - 3, '\u25CF')
+        x0 = max(0, (x - text_layout.width(r0)) // 2)
+        try:
+            win.addstr(y, x0, r0)
+            win.addstr(y + 1, x0, r1)
+
+            win.addstr(y - 4, x - 3, u'\u25CF')
+            win.addstr(y - 3, x - 3, '\u25CF')
+            win.addstr(y - 2, x - 3, '\u25CF')
+        except curses.error:
+            # clipped by a small terminal
+            pass
 
         win.attroff(curses.A_BOLD)
 
-        curses.panel.update_panels()
-
-        return win, panel
+        renderer.mark()
 
     def refresh(self, win=None):
         """Refresh a window object.
@@ -93,7 +114,8 @@ class Widgets:
 
         win = win if win else self.stdscr
 
-        win.refresh()
+        renderer.mark(win)
+        renderer.render(force=True)
 
     def set_color(self, fg, bg):
         """Initialize color pair to be used by a widget.
@@ -106,11 +128,7 @@ class Widgets:
             return the pair number.
         """
 
-        self.color_pair_no += 1
-        curses.init_pair(self.color_pair_no, fg, bg)
-        pair_no = curses.color_pair(self.color_pair_no)
-
-        return pair_no
+        return color_pairs.get((fg, bg))
 
     def status_bar(self, parent=None, fg=curses.COLOR_WHITE, bg=60):
         """Status bar: displays the status of the connection, whether it's
@@ -135,74 +153,212 @@ class Widgets:
         pair_no = self.set_color(fg, bg)
         win.bkgd(' ', pair_no)
 
+        # the text and progress are drawn by draw_status
         win.attron(curses.A_BOLD)
-        y, x = win.getmaxyx()
-        win.addstr(int(y / 2), 1,
-                   'TODO: Searching for hosts... (3 hosts found)')
-        win.addstr(int(y / 2), x - 4, '57%')
-        # win.attroff(curses.A_BOLD)
 
-        curses.panel.update_panels()
+        renderer.mark()
 
         return win, panel
 
 
-class Home(Widgets):
+class Home(Widgets, TGUI):
     def __init__(self, *args, **kwargs):
         """Initializs self. See help(type(self)) for accurate signature.
         """
 
         super().__init__(args, kwargs)
+        TGUI.__init__(self)
 
         self.protocol = protocol.Protocol()
 
+        # the hosts found by the last runs are shown first
+        self.protocol.cache = HostCache()
+
         self.windows = []
         self.panels = []
 
-    def main(self, stdscr):
-        """
+        # status bar, updated at most once per frame, see set_status
+        self.status = ''
+        self.progress = None    # percentage shown, None to hide it
+        self.spinner = None     # Timer animating SPINNER
+        self.pruner = None      # Timer closing the idle connections
+        self._spin = 0
+        self._tween = None
+
+    def __app__(self, stdscr):
+        """Draw the home screen, see TGUI.__app__.
         """
 
-        asyncio.run(self.home(stdscr))
+        super().__app__(stdscr)
 
-    async def home(self, stdscr):
         self.stdscr = stdscr
 
-        curses.curs_set(0)
-
         pair_no = self.set_color(57, curses.COLOR_WHITE)
         self.stdscr.bkgd(' ', pair_no)
 
-        y, x = self.stdscr.getmaxyx()
-        #self.stdscr.addstr(y - 3, 2, '██████')
-        self.stdscr.addstr(y - 2, 2, '██████')
-        self.stdscr.addstr(y - 1, 2, '▀▀▀▀▀▀')
+        self.draw_background()
 
         win, pan = self.about(self.stdscr)
         win1, pan1 = self.status_bar(self.stdscr)
 
+        self.windows += [win, win1]
+        self.panels += [pan, pan1]
+
+    def draw_background(self):
+        """Draw the decorations of stdscr.
+        """
+
+        self.stdscr.erase()
+
+        y, x = self.stdscr.getmaxyx()
+        try:
+            #self.stdscr.addstr(y - 3, 2, '██████')
+            self.stdscr.addstr(y - 2, 2, '██████')
+            self.stdscr.addstr(y - 1, 2, '▀▀▀▀▀▀')
+        except curses.error:
+            # clipped by a small terminal
+            pass
+
+        renderer.mark(self.stdscr)
+
+    def on_resize(self):
+        """Resize the windows in place to the new size of the terminal.
+        """
+
+        y, x = self.stdscr.getmaxyx()
+        about, status = self.windows
+        _, status_pan = self.panels
+
+        self.draw_background()
+
+        about.resize(max(int(y / 2), 1), x)
+        self.draw_about(about)
+
+        # resized before being moved, so that it fits on the screen
+        status.resize(1, x)
+        status_pan.move(min(int(y / 2), y - 1), 0)
+        self.draw_status()
+
+    async def main(self):
+        """Search for hosts in the background, updating the status bar as
+        they answer. The hosts found by the last runs are probed first.
         """
-        flag, self.hostnames, self.hosts = await self.protocol.get_active_hosts()
+
+        # the hosts found keep a connection open until it's idle for too long
+        pool = self.protocol.pool
+        self.pruner = self.call_every(pool.idle_timeout, pool.prune)
+
+        flag, hosts = self.protocol.get_hosts()
         if flag is False:
-            # change status bar string.
-            win1.clear()
-            y, x = win1.getmaxyx()
-            win1.addstr(int(y / 2), 1, 'You\'re not connected to a local network')
+            self.set_status('You\'re not connected to a local network')
+
+            return
+
+        found = 0
+        self.set_status('Searching for hosts... (0 hosts found)')
+        self.set_progress(0, len(hosts))
+        self.spinner = self.call_every(0.1, self._spin_status)
+
+        try:
+            async for _ in self.protocol.discover(hosts,
+                                                  progress=self.set_progress):
+                found += 1
+                self.set_status(
+                    f'Searching for hosts... ({found} hosts found)')
+        finally:
+            self.spinner.cancel()
+            self.spinner = None
+
+        self.set_status(f'{found} hosts found')
+
+    async def on_key(self, key):
+        self.quit()
+
+    def quit(self):
+        """Close the connections to the hosts, and stop the loop, see
+        TGUI.quit.
         """
 
-        self.windows += [win, win1]
-        self.panels += [pan, pan1]
+        if self.pruner is not None:
+            self.pruner.cancel()
+            self.pruner = None
+        self.protocol.close()
+
+        super().quit()
+
+    def set_status(self, text):
+        """Change the text of the status bar.
+
+        Args:
+            text (str): the new status.
+        """
+
+        self.status = text
+        renderer.defer(self.draw_status)
+
+    def set_progress(self, done, total):
+        """Change the progress shown in the status bar. The percentage is
+        animated towards the new value.
 
-        win.refresh()
+        Called for every probed host, so the animation is only restarted once
+        per frame.
+
+        Args:
+            done (int): amount of work done.
+            total (int): total amount of work, None if unknown.
+        """
+
+        renderer.defer(self._animate_progress, done, total)
+
+    def _animate_progress(self, done, total):
+        if not total:
+            self._set_percent(None)
+
+            return
+
+        if self._tween is not None:
+            self._tween.cancel()
+
+        start = self.progress or 0
+        self._tween = self.tween(self._set_percent, start,
+                                 100 * done / total, 0.25)
+
+    def _set_percent(self, percent):
+        self.progress = percent
+        self.draw_status()
+
+    def _spin_status(self):
+        self._spin = (self._spin + 1) % len(SPINNER)
+        renderer.defer(self.draw_status)
+
+    def draw_status(self):
+        """Draw the status text, spinner and progress in the status bar.
+        """
+
+        win = self.windows[1]
+        win.erase()
+
+        y, x = win.getmaxyx()
+        y = int(y / 2)
 
-        win1.refresh()
+        left, right = 1, x - 1
+        try:
+            if self.spinner is not None:
+                win.addstr(y, left, SPINNER[self._spin])
+                left += 2
 
-        win.getch()
-        # XXX test
+            if self.progress is not None:
+                percent = f'{int(self.progress)}%'
+                right -= text_layout.width(percent)
+                win.addstr(y, right, percent)
 
-        self.stdscr.getch()
+            width = max(0, right - left - 1)
+            win.addstr(y, left, text_layout.clip(self.status, width))
+        except curses.error:
+            # clipped by a small terminal
+            pass
 
-        self.refresh()
+        renderer.mark()
 
     def show(self):
         """Display the home view/screen.
@@ -215,4 +371,5 @@ class Home(Widgets):
         for panel in self.panels:
             panel.hide()
 
-curses.wrapper(Home().main)
+if __name__ == '__main__':
+    Home().run_async()
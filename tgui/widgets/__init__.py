@@ -1,2 +1,3 @@
 from ._widget import *
 from ._label import *
+from ._listview import *
@@ -2,12 +2,21 @@
 """
 
 import curses
-from curses import panel
 
+from .._geometry import size_spec
+from .._props import ARRANGE, MEASURE, PAINT, Prop
+from .._text import text_layout
 from ._widget import Widget
 
 
 class Label(Widget):
+    text = Prop(None, MEASURE)
+    multiline = Prop(False, MEASURE)
+    align = Prop('left', PAINT)
+    padding = Prop(1, ARRANGE)
+
+    __slots__ = ('_wrap_width',)
+
     def __init__(self, layout, **kwargs):
         """None means to fit content (curses.window.resize is called).
         0 means to fill parent.
@@ -37,27 +46,90 @@ class Label(Widget):
                 -> padding = (int(left), int(right), int(top), int(bottom))
         """
 
-        kw = {'text': None, 'multiline': False, 'align': 'left', 'size': None,
-              'anchor': None, 'color': None, 'padding': 1}
+        # width the text was wrapped to when measured, for a multiline
+        # label filling the width of its parent
+        self._wrap_width = None
 
-        for key, value in kwargs.items():
-            if key not in kw.keys():
-                err = 'Label.__init__() got an unexpected keyword argument '
-                err += f"'{key}'"
-                raise TypeError(err)
+        # TODO check if layout is a valid layout object
+        super().__init__(layout, **kwargs)
 
-                return 1    # XXX kinda buggy
+        # now create a new label widget
+        self._create()
 
-            kw[key] = value
+    def _fill_width(self):
+        """Get the width given to a label filling its parent, None if it
+        isn't known yet.
+        """
 
-        super().__init__(**kw)
+        if self._slot is not None and self._slot[3]:
+            return self._slot[3]
 
-        # TODO check if layout is a valid layout object
-        self._layout = layout
+        anchor = self._anchor_yx()
+        if self._parent is None and anchor is not None:
+            return max(self._parent_win().getmaxyx()[1] - anchor[1], 0) or None
 
-        # now create a new label widget
-        self._create_label()
+        return None
+
+    def _content_size(self):
+        """Get the size of the text in cells, wrapped if multiline and the
+        width is fixed, or fills the parent and was given.
+        """
+
+        text = self.text or ''
+        multiline = self.multiline
+
+        width = size_spec(self.size)[1]
+        if multiline and width == 0:
+            width = self._wrap_width = self._fill_width()
+        if multiline and width:
+            return len(text_layout.wrap(text, width)), width
+
+        height, width = text_layout.size(text, multiline)
+
+        return height, width + 1
+
+    def _arrange(self, y, x, height, width, force):
+        super()._arrange(y, x, height, width, force)
+
+        # the height of the text wrapped to a width the layout just gave
+        if self.multiline and size_spec(self.size) == (None, 0) and \
+                self._slot[3] and self._slot[3] != self._wrap_width:
+            self._invalidate()
+
+    def paint(self):
+        """Draw the label text in its window.
+        """
+
+        text = self.text or ''
+        multiline = self.multiline
+        align = self.align
+
+        win = self._win
+        win.bkgd(' ', self._attr)
+        win.erase()
+
+        height, width = win.getmaxyx()
+        lines = text_layout.layout(text, width, align, multiline)
+
+        for y, line in enumerate(lines[:height]):
+            try:
+                win.addstr(y, 0, line)
+            except curses.error:
+                # the last cell of the window can't be written without
+                # scrolling
+                pass
+
+    def set_text(self, text):
+        """Set or reset the text of the label.
+
+        Only the label is redrawn if its size doesn't change, otherwise the
+        layouts containing it are re-arranged on the next frame.
+        """
+
+        self.text = text
 
     def set_anchor(self, y, x):
         """Set anchor for the label.
         """
+
+        self.anchor = (y, x)
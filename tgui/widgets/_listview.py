@@ -0,0 +1,308 @@
+"""List view module.
+"""
+
+import curses
+
+from .._geometry import size_spec
+from .._input import Keymap, parse_key
+from .._props import MEASURE, Prop
+from .._text import text_layout
+from ..models import ListModel
+from ._widget import Widget
+
+
+class ListView(Widget):
+    """Scrollable list of items.
+
+    Only the rows in view are drawn, each from the item at top + row, so the
+    cost of scrolling, jumping, or appending to the model doesn't depend on
+    the number of items.
+    """
+
+    follow = Prop(False, None)
+    size = Prop(0, MEASURE)
+
+    __slots__ = ('_model', '_top', '_selected', '_widest', '_keymap')
+
+    # keys handled while the view has the focus, see TGUI.set_focus. Held
+    # keys move the selection once per frame, by the number of presses.
+    # Each view binds keys on its own copy, see keymap.
+    default_keymap = Keymap()
+    default_keymap.bind('up', 'move', -1, repeat=True)
+    default_keymap.bind('down', 'move', 1, repeat=True)
+    default_keymap.bind('pgup', 'move_page', -1, repeat=True)
+    default_keymap.bind('pgdn', 'move_page', 1, repeat=True)
+    default_keymap.bind('home', 'select', 0)
+    default_keymap.bind('end', 'select_last')
+
+    def __init__(self, layout, items=None, **kwargs):
+        """None means to fit content (curses.window.resize is called).
+        0 means to fill parent.
+        anchor depends on master (the current layout in view/use).
+
+        Args:
+            layout (obj): layout object, can't be a Nonetype object.
+            items (obj): (optional) a ListModel, or an iterable of the items.
+            kwargs (dict): variable length keyworded arguments.
+                follow = bool(x)
+                -> keep the last item in view when items are appended
+
+                size = 0
+                -> size = (int(height), int(width))
+
+                anchor = None
+                -> anchor = (int(y), int(x))
+
+                color = None
+                -> color = (int(fg), int(bg))
+
+                padding = int(value)
+                -> padding = (int(left), int(right), int(top), int(bottom))
+        """
+
+        super().__init__(layout, **kwargs)
+
+        model = items
+        if not isinstance(model, ListModel):
+            model = ListModel(model)
+
+        self._model = model
+        self._top = 0
+        self._selected = None
+        self._widest = 0
+        self._keymap = self.default_keymap.copy()
+
+        if size_spec(self.size)[1] is None:
+            self._widest = max((text_layout.width(str(item))
+                                for item in model), default=0)
+        model.subscribe(self._on_change)
+
+        # now create a new list view widget
+        self._create()
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def keymap(self):
+        """Keys of this view, a copy of default_keymap. A keymap assigned
+        to it is copied as well.
+        """
+
+        return self._keymap
+
+    @keymap.setter
+    def keymap(self, keymap):
+        self._keymap = keymap.copy()
+
+    @property
+    def top(self):
+        """Index of the item in the first row.
+        """
+
+        return self._top
+
+    @property
+    def selected(self):
+        """Index of the selected item, None if no item is selected.
+        """
+
+        return self._selected
+
+    def _content_size(self):
+        return max(len(self._model), 1), self._widest + 1
+
+    def _rows(self):
+        """Get the number of rows in view.
+        """
+
+        return self._win.getmaxyx()[0] if self._visible() else 0
+
+    def _clamp_top(self, top):
+        return max(0, min(top, len(self._model) - self._rows()))
+
+    def _paint_row(self, index):
+        """Draw the item at index in its row, which must be in view.
+        """
+
+        win = self._win
+        width = win.getmaxyx()[1]
+        row = index - self._top
+
+        win.move(row, 0)
+        win.clrtoeol()
+        if index >= len(self._model):
+            return
+
+        text = str(self._model[index])
+        attr = self._attr
+        if index == self._selected:
+            text = text_layout.align(text, width)
+            attr |= curses.A_REVERSE
+        else:
+            text = text_layout.clip(text, width)
+
+        try:
+            win.addstr(row, 0, text, attr)
+        except curses.error:
+            # the last cell of the window can't be written without scrolling
+            pass
+
+    def _paint_range(self, start, stop):
+        """Draw the rows in view showing the items from start to stop.
+        """
+
+        if not self._visible():
+            return
+
+        top = self._top
+        start = max(start, top)
+        stop = min(stop, top + self._rows())
+
+        for index in range(start, stop):
+            self._paint_row(index)
+
+        if start < stop:
+            self._layout._renderer.mark()
+
+    def paint(self):
+        """Draw the rows in view.
+        """
+
+        win = self._win
+        win.bkgd(' ', self._attr)
+        win.erase()
+
+        self._top = self._clamp_top(self._top)
+        top = self._top
+        for index in range(top, min(top + self._rows(), len(self._model))):
+            self._paint_row(index)
+
+    def _on_change(self, start, stop):
+        """Redraw the rows showing the items that changed, see ListModel.
+        """
+
+        size = len(self._model)
+        end = size if stop is None else stop
+
+        if size_spec(self.size)[1] is None:
+            if start == 0 and stop is None:
+                self._widest = 0
+            for index in range(start, end):
+                width = text_layout.width(str(self._model[index]))
+                self._widest = max(self._widest, width)
+
+        if self._selected is not None and self._selected >= size:
+            self._selected = size - 1 if size else None
+
+        if None in size_spec(self.size):
+            # the size of the view may change
+            self._invalidate()
+        elif self.follow and stop == size and \
+                size > self._top + self._rows():
+            self.scroll_to(size - 1)
+        elif self._clamp_top(self._top) != self._top:
+            self._set_top(self._clamp_top(self._top))
+        elif stop is None:
+            # the items shifted, and rows past the new end show stale items
+            self._paint_range(start, self._top + self._rows())
+        else:
+            self._paint_range(start, end)
+
+    def _set_top(self, top):
+        top = self._clamp_top(top)
+        if top != self._top:
+            self._top = top
+            if self._visible():
+                self._draw()
+                self._layout._renderer.mark()
+
+    def scroll(self, lines):
+        """Scroll the view by a number of rows, up if lines is negative.
+        """
+
+        self._set_top(self._top + lines)
+
+    def scroll_to(self, index):
+        """Scroll the view just enough for an item to be in view.
+        """
+
+        # a view without rows keeps the item at its top
+        rows = max(self._rows(), 1)
+        if index < self._top:
+            self._set_top(index)
+        elif index >= self._top + rows:
+            self._set_top(index - rows + 1)
+
+    def select(self, index):
+        """Select an item and scroll it into view.
+
+        Args:
+            index (int): index of the item, None to clear the selection.
+        """
+
+        old = self._selected
+        if index is not None:
+            if not len(self._model):
+                index = None
+            else:
+                index = max(0, min(index, len(self._model) - 1))
+
+        self._selected = index
+
+        top = self._top
+        if index is not None:
+            self.scroll_to(index)
+
+        if self._top == top:
+            # not redrawn by the scroll
+            for row in (old, index):
+                if row is not None:
+                    self._paint_range(row, row + 1)
+
+    def select_last(self):
+        self.select(len(self._model) - 1)
+
+    def move(self, rows, count=1):
+        """Move the selection by a number of rows, up if rows is negative.
+
+        Args:
+            rows (int): rows to move by.
+            count (int): (optional) number of moves, e.g. of presses of a key.
+        """
+
+        selected = self._top if self._selected is None else self._selected
+        self.select(selected + rows * count)
+
+    def move_page(self, pages, count=1):
+        """Move the selection by a number of pages, up if pages is negative.
+        """
+
+        self.move(pages * max(self._rows() - 1, 1), count)
+
+    def handle_key(self, key):
+        """Move the selection with the arrow, page, home and end keys, see
+        keymap.
+
+        Args:
+            key (obj): a key code or name, see parse_key.
+
+        Return:
+            return True if the key was handled.
+        """
+
+        binding = self.keymap.get(parse_key(key))
+        if binding is None:
+            return False
+
+        return binding(self) is not False
+
+    def append(self, item):
+        self._model.append(item)
+
+    def extend(self, items):
+        self._model.extend(items)
+
+    def set_items(self, items):
+        self._model.set_items(items)